@@ -1,7 +1,7 @@
 #!/bin/bash
 
 if [[ "$1" == "worker" ]]; then
-    exec rq worker
+    exec python3 -m src.worker "${@:2}"
 else
     exec python3 -m src.main
 fi
\ No newline at end of file
@@ -1,6 +1,6 @@
 import secrets
 from pathlib import Path
-from typing import Any, List, Optional, Union
+from typing import Any, List, Literal, Optional, Union
 
 from fastapi.responses import JSONResponse
 from pydantic import AnyHttpUrl, PostgresDsn, ValidationInfo, field_validator
@@ -38,6 +38,28 @@ class Settings(BaseSettings):
     TMP_DIR: str = str(APP_DIR / "tmp_inference")
     INFER_DIR: str = str(APP_DIR / "infer_models")
     DATASETS_DIR: str = str(APP_DIR / "datasets")
+    # How datasets are staged for evaluations: "hardlink" (symlinks across
+    # filesystems), "symlink", or "copy" when pods cannot see DATASETS_DIR
+    DATASET_STAGING: Literal["hardlink", "symlink", "copy"] = "hardlink"
+
+    UPLOAD_MAX_BYTES: int = 8 * 1024 ** 3
+    # Upper bound for everything in TMP_DIR, uploads in progress included
+    UPLOAD_QUOTA_BYTES: int = 64 * 1024 ** 3
+    UPLOAD_CHUNK_BYTES: int = 4 * 1024 ** 2
+
+    # Length of the video segment covered by each prediction
+    INFERENCE_SEGMENT_SECONDS: float = 0.96
+    # Longer videos are split into workflows running in parallel, each
+    # covering at most this much of the video, 0 to never split. Requires an
+    # inference-workflow template taking startSeconds and durationSeconds
+    INFERENCE_MAX_SEGMENT_SECONDS: float = 0
+    FFPROBE_PATH: str = "ffprobe"
+    # A queued or running job not refreshed for this long lost the API
+    # process running it, and is taken over by another one
+    INFERENCE_JOB_LEASE_SECONDS: int = 120
+
+    INFERENCE_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7  # 7 days
+    INFERENCE_CACHE_MAX_ENTRIES: int = 10000
 
     BACKEND_CORS_ORIGINS: List[str] = []
 
@@ -62,6 +84,46 @@ class Settings(BaseSettings):
     REDIS_PORT: int | None = 6379
     REDIS_PASSWORD: str | None = None
 
+    SCORE_MATRIX_TTL_SECONDS: int = 300
+
+    # Evaluation worker (python -m src.worker). Evaluations mostly wait on
+    # Argo, so one worker supervises many of them at once
+    WORKER_CONCURRENCY: int = 32
+    # Evaluations running at once across all workers, 0 for no limit
+    WORKER_GLOBAL_CONCURRENCY: int = 64
+    WORKER_JOB_TIMEOUT_SECONDS: int = 60 * 60 * 6  # 6 hours
+    WORKER_MAX_RETRIES: int = 2
+    # Doubled after every attempt
+    WORKER_RETRY_BACKOFF_SECONDS: float = 30
+    # Time given to running jobs on SIGTERM before they are put back
+    WORKER_DRAIN_SECONDS: int = 60 * 5
+    WORKER_FAILED_JOBS_KEPT: int = 1000
+
+    # Where inference and evaluation workflows run: "argo", or "local" to
+    # run the cloned models as processes of this host, without Kubernetes
+    EXECUTION_BACKEND: Literal["argo", "local"] = "argo"
+    # Local runs at once, per process
+    LOCAL_BACKEND_WORKERS: int = 4
+    # Script of the model repository run by the local backend, with the
+    # workflow template and parameters as arguments
+    LOCAL_BACKEND_ENTRYPOINT: str = "main.py"
+    LOCAL_BACKEND_PYTHON: str = "python3"
+
+    ARGO_NAMESPACE: str = "argo"
+    # Workflows running at once, inference and evaluations together
+    WORKFLOW_MAX_IN_FLIGHT: int = 32
+    # A slot request not refreshed for this long belongs to a dead process
+    WORKFLOW_SLOT_LEASE_SECONDS: int = 120
+    WORKFLOW_SCHEDULER_POLL_SECONDS: float = 1.0
+    # Used for the estimated wait until workflows have been timed
+    WORKFLOW_DEFAULT_DURATION_SECONDS: float = 600
+    # Threads, and pooled connections, shared by all Kubernetes API calls
+    KUBE_CLIENT_WORKERS: int = 16
+
+    # A statement shape running more often than this in one request is logged
+    QUERY_REPEAT_THRESHOLD: int = 10
+    QUERY_STATS_HISTORY: int = 200
+
     @field_validator("PSQL_DATABASE_URL", mode="before")
     @classmethod
     def assemble_db_connection(cls, v: Optional[str], values: ValidationInfo) -> Any:
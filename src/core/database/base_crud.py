@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import base64
+import binascii
 import inspect
+import json
 from functools import wraps
-from typing import (Any, Callable, Dict, List, Literal, Type, TypeVar)
+from typing import (Any, Callable, Dict, List, Literal, Tuple, Type, TypeVar)
 
 from sqlalchemy import func
 from sqlalchemy.orm import Query, noload, raiseload, selectinload, subqueryload
@@ -10,6 +13,8 @@ from sqlalchemy.sql.elements import BinaryExpression
 from sqlmodel import SQLModel, exists, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.core.database.loader import clear_loaders, get_loader
+
 Self = TypeVar("Self", bound="Base")
 LoadStrategy = Literal["subquery", "selectin",
                        "raise", "raise_on_sql", "noload"]
@@ -29,6 +34,26 @@ class InvalidTable(RuntimeError):
     """
 
 
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    payload = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor(f'Invalid cursor "{cursor}"') from exc
+    if not isinstance(values, dict):
+        raise InvalidCursor(f'Invalid cursor "{cursor}"')
+    return values
+
+
 def is_table(cls: Type[Self]) -> bool:
     if hasattr(cls, '__tablename__'):
         return True
@@ -76,6 +101,51 @@ class Base(SQLModel):
         result = await session.exec(query.filter(*args).filter_by(**kwargs))
         return result.first()
 
+    @classmethod
+    @validate_table
+    async def load(
+        cls: Type[Self],
+        session: AsyncSession,
+        value: Any,
+        key: str = "id",
+        load_strategy: Dict[str, LoadStrategy] | None = None,
+        **kwargs: Any,
+    ) -> Self | None:
+        """Like `get` by a single key, but batched and memoized per session.
+
+        Concurrent loads (e.g. from `asyncio.gather`) share one `IN (...)` query.
+        """
+        return await cls._loader(session, key, load_strategy, kwargs).load(value)
+
+    @classmethod
+    @validate_table
+    async def load_many(
+        cls: Type[Self],
+        session: AsyncSession,
+        values: List[Any],
+        key: str = "id",
+        load_strategy: Dict[str, LoadStrategy] | None = None,
+        **kwargs: Any,
+    ) -> List[Self | None]:
+        return await cls._loader(session, key, load_strategy, kwargs).load_many(values)
+
+    @classmethod
+    def _loader(
+        cls: Type[Self],
+        session: AsyncSession,
+        key: str,
+        load_strategy: Dict[str, LoadStrategy] | None,
+        filters: Dict[str, Any],
+    ):
+        identity = (
+            cls,
+            key,
+            tuple(sorted((load_strategy or {}).items())),
+            tuple(sorted(filters.items())),
+        )
+        query = _prepare_query(cls, load_strategy).filter_by(**filters)
+        return get_loader(session, identity, query, getattr(cls, key))
+
     @classmethod
     @validate_table
     async def get_multi(
@@ -84,21 +154,55 @@ class Base(SQLModel):
         *args: BinaryExpression,
         load_strategy: Dict[str, LoadStrategy] | None = None,
         offset: int = 0,
-        limit: int = 100,
+        limit: int | None = None,
         **kwargs: Any,
     ) -> List[Self]:
         query = _prepare_query(cls, load_strategy)
-        result = await session.exec(
-            query.filter(*args).filter_by(**kwargs).offset(offset).limit(limit)
-        )
+        query = query.filter(*args).filter_by(**kwargs).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        result = await session.exec(query)
         return result.all()
 
+    @classmethod
+    @validate_table
+    async def get_page(
+        cls: Type[Self],
+        session: AsyncSession,
+        *args: BinaryExpression,
+        load_strategy: Dict[str, LoadStrategy] | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+        **kwargs: Any,
+    ) -> Tuple[List[Self], str | None]:
+        """Keyset pagination ordered by the primary key.
+
+        Returns the page and the cursor of the next one, or None on the last page.
+        """
+        key = cls.__table__.primary_key.columns.values()[0]
+        query = _prepare_query(cls, load_strategy)
+        query = query.filter(*args).filter_by(**kwargs)
+        if cursor is not None:
+            values = decode_cursor(cursor)
+            # The type must match, or the comparison fails in the database
+            if key.name not in values or type(values[key.name]) is not key.type.python_type:
+                raise InvalidCursor(f'Invalid cursor "{cursor}"')
+            query = query.filter(key > values[key.name])
+
+        result = await session.exec(query.order_by(key).limit(limit + 1))
+        items = result.all()
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, encode_cursor({key.name: getattr(items[-1], key.name)})
+
     @classmethod
     @validate_table
     async def create(cls: Type[Self], session: AsyncSession, **kwargs: Any) -> Self:
         db_obj = cls(**kwargs)
         session.add(db_obj)
         await session.commit()
+        clear_loaders(session, cls)
         return db_obj
 
     @validate_table
@@ -109,6 +213,7 @@ class Base(SQLModel):
                 setattr(self, field, kwargs[field])
         session.add(self)
         await session.commit()
+        clear_loaders(session, type(self))
         await session.refresh(self)
         return self
 
@@ -120,6 +225,7 @@ class Base(SQLModel):
         db_obj = await cls.get(session, *args, **kwargs)
         await session.delete(db_obj)
         await session.commit()
+        clear_loaders(session, cls)
         return db_obj
 
     @classmethod
@@ -132,12 +238,13 @@ class Base(SQLModel):
     ) -> List[Self]:
         statement = select(cls).filter(*args).filter_by(**kwargs)
         result = await session.exec(statement)
-        db_objs = result.scalars().all()
+        db_objs = result.all()
 
         for obj in db_objs:
             await session.delete(obj)
 
         await session.commit()
+        clear_loaders(session, cls)
         return db_objs
 
     @classmethod
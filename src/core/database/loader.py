@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, Dict, Hashable, Iterable, List
+
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+LOADERS_KEY = "loaders"
+
+
+class Loader:
+    """Coalesces by-key lookups of one query into a single `IN (...)` query.
+
+    Loads requested in the same event loop tick, for instance from
+    `asyncio.gather`, are fetched together, and every result (including
+    misses) is memoized for the lifetime of the session, which is one
+    request. Like the session itself, a loader must not be used while
+    another query is running on that session.
+    """
+
+    def __init__(self, session: AsyncSession, query: SelectOfScalar, key: InstrumentedAttribute):
+        self._session = session
+        self._query = query
+        self._key = key
+        self._results: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+
+    def _enqueue(self, key: Hashable) -> asyncio.Future:
+        future = self._results.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._results[key] = future
+            self._queue.append(key)
+        return future
+
+    async def _flush(self) -> None:
+        keys, self._queue = self._queue, []
+        if not keys:
+            return
+        try:
+            result = await self._session.exec(self._query.where(self._key.in_(keys)))
+            found = {}
+            for item in result.all():
+                found.setdefault(getattr(item, self._key.key), item)
+        except Exception as exc:  # pylint: disable=broad-except
+            # Failures are not memoized; every waiter of the batch gets the error
+            for key in keys:
+                self._results.pop(key).set_exception(exc)
+            return
+        for key in keys:
+            self._results[key].set_result(found.get(key))
+
+    async def load(self, key: Hashable) -> Any:
+        future = self._results.get(key)
+        if future is None:
+            future = self._enqueue(key)
+            # Let the other pending loads of this tick join the batch
+            await asyncio.sleep(0)
+            await self._flush()
+        return await future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        futures = [self._enqueue(key) for key in keys]
+        await self._flush()
+        return [await future for future in futures]
+
+    def clear(self, key: Hashable | None = None) -> None:
+        if key is None:
+            self._results.clear()
+        else:
+            self._results.pop(key, None)
+
+
+def get_loader(session: AsyncSession, identity: Hashable, query: SelectOfScalar, key: InstrumentedAttribute) -> Loader:
+    loaders = session.info.setdefault(LOADERS_KEY, {})
+    if identity not in loaders:
+        loaders[identity] = Loader(session, query, key)
+    return loaders[identity]
+
+
+def clear_loaders(session: AsyncSession, model: type) -> None:
+    for identity, loader in session.info.get(LOADERS_KEY, {}).items():
+        if identity[0] is model:
+            loader.clear()
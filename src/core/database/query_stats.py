@@ -0,0 +1,98 @@
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_stats: ContextVar["QueryStats | None"] = ContextVar("query_stats", default=None)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w$])\d+(?:\.\d+)?\b")
+_PARAMETER_LISTS = re.compile(r"\(\s*(?:\?|\$\d+|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|\$\d+|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape with literals and parameter lists collapsed, so that the
+    same query issued for different rows counts as one shape."""
+    statement = _LITERALS.sub("?", statement)
+    statement = _PARAMETER_LISTS.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    """Statements executed while tracking, usually during one HTTP request."""
+
+    def __init__(self, label: str | None = None):
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        return {shape: count for shape, count in self.fingerprints.items() if count > threshold}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "label": self.label,
+            "count": self.count,
+            "duration_ms": round(self.duration * 1000, 3),
+            "repeated": self.repeated(settings.QUERY_REPEAT_THRESHOLD),
+        }
+
+
+history: Deque[Dict[str, Any]] = deque(maxlen=settings.QUERY_STATS_HISTORY)
+
+
+@contextmanager
+def track_queries(label: str | None = None) -> Iterator[QueryStats]:
+    stats = QueryStats(label)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def report(stats: QueryStats) -> None:
+    """Keeps the stats for the debug endpoint and warns about likely N+1 loops."""
+    for shape, count in stats.repeated(settings.QUERY_REPEAT_THRESHOLD).items():
+        logger.warning("%s ran the same statement %d times: %s", stats.label, count, shape)
+    history.append(stats.to_dict())
+
+
+def get_history(limit: int | None = None) -> List[Dict[str, Any]]:
+    entries = list(history)
+    return entries[-limit:] if limit else entries
+
+
+# The start time lives on the execution context, not the pooled connection,
+# so that statements which raise, skipping `after_cursor_execute`, leave nothing behind
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context._query_start)
+
+
+def instrument(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -7,6 +7,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core.config import settings
+from src.core.database.query_stats import instrument
 
 DB_POOL_SIZE = 83
 WEB_CONCURRENCY = 9
@@ -38,6 +39,7 @@ else:
         poolclass=AsyncAdaptedQueuePool,
     )
 
+instrument(engine)
 
 SessionLocal = sessionmaker(
     autocommit=False,
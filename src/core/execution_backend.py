@@ -0,0 +1,141 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, NamedTuple
+
+from src.core.config import settings
+
+__all__ = ["ExecutionBackend", "ExecutionError", "WorkflowEvent", "WorkflowRun",
+           "create_backend", "execution_backend"]
+
+
+class WorkflowEvent(NamedTuple):
+    kind: str  # "workflow" or "pod"
+    name: str
+    phase: str
+
+
+class ExecutionError(Exception):
+    """A backend call failed, or the workflow does not exist."""
+
+
+@dataclass
+class WorkflowRun:
+    name: str
+    # Argo WorkflowTemplate, also the task given to local runs
+    template: str
+    parameters: Dict[str, str] = field(default_factory=dict)
+
+
+class ExecutionBackend(ABC):
+    """Runs inference and evaluation workflows.
+
+    A run reads its inputs from, and writes `results.npy` to, its data
+    directory under TMP_DIR. Its progress is reported as `WorkflowEvent`s
+    with the phases of Argo workflows and pods: Pending, Running,
+    Succeeded, Failed, Error, and Deleted once it is gone.
+    """
+
+    @abstractmethod
+    async def submit(self, run: WorkflowRun) -> None: ...
+
+    @abstractmethod
+    def subscribe(self, workflow_name: str) -> AsyncIterator[WorkflowEvent]:
+        """Yields the current phase of the workflow and of its pods, then
+        every phase change until the iterator is closed.
+
+        Raises ExecutionError when the workflow does not exist.
+        """
+
+    @abstractmethod
+    async def terminate(self, workflow_name: str) -> None: ...
+
+    @abstractmethod
+    async def delete(self, workflow_name: str) -> None: ...
+
+    @abstractmethod
+    async def read_logs(self, pod_name: str, container: str | None = None) -> str: ...
+
+    def result_path(self, workflow_name: str) -> Path:
+        return Path(settings.TMP_DIR) / workflow_name / "results.npy"
+
+
+class ArgoBackend(ExecutionBackend):
+    """Submits runs as Argo workflows of the WorkflowTemplate they name."""
+
+    # The Kubernetes client is only imported, and configured, on first use,
+    # so that the local backend runs without a cluster
+
+    @property
+    def client(self):
+        from src.core.workflow_client import workflow_client
+        return workflow_client
+
+    @property
+    def informer(self):
+        from src.core.workflow_informer import workflow_informer
+        return workflow_informer
+
+    @property
+    def api_exception(self):
+        from src.core.workflow_client import ApiException
+        return ApiException
+
+    def manifest(self, run: WorkflowRun) -> Dict[str, Any]:
+        return {
+            "apiVersion": "argoproj.io/v1alpha1",
+            "kind": "Workflow",
+            "metadata": {
+                "name": run.name,
+                "namespace": self.client.namespace
+            },
+            "spec": {
+                "workflowTemplateRef": {
+                    "name": run.template
+                },
+                "arguments": {
+                    "parameters": [{"name": name, "value": value} for name, value in run.parameters.items()]
+                }
+            }
+        }
+
+    async def submit(self, run: WorkflowRun) -> None:
+        try:
+            await self.client.create_workflow(self.manifest(run))
+        except self.api_exception as exc:
+            raise ExecutionError(str(exc)) from exc
+
+    async def subscribe(self, workflow_name: str) -> AsyncIterator[WorkflowEvent]:
+        try:
+            async for event in self.informer.subscribe(workflow_name):
+                yield event
+        except self.api_exception as exc:
+            raise ExecutionError(str(exc)) from exc
+
+    async def terminate(self, workflow_name: str) -> None:
+        try:
+            await self.client.terminate_workflow(workflow_name)
+        except self.api_exception as exc:
+            raise ExecutionError(str(exc)) from exc
+
+    async def delete(self, workflow_name: str) -> None:
+        try:
+            await self.client.delete_workflow(workflow_name)
+        except self.api_exception as exc:
+            raise ExecutionError(str(exc)) from exc
+
+    async def read_logs(self, pod_name: str, container: str | None = None) -> str:
+        try:
+            return await self.client.read_pod_logs(pod_name, container)
+        except self.api_exception as exc:
+            raise ExecutionError(str(exc)) from exc
+
+
+def create_backend(name: str = settings.EXECUTION_BACKEND) -> ExecutionBackend:
+    if name == "local":
+        from src.core.local_backend import LocalBackend
+        return LocalBackend()
+    return ArgoBackend()
+
+
+execution_backend = create_backend()
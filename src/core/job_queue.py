@@ -0,0 +1,207 @@
+import asyncio
+import importlib
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, List
+from uuid import uuid4
+
+import redis.asyncio as redis
+from redis.exceptions import WatchError
+
+from src.core.config import settings
+
+KEY_PREFIX = "jobs"
+
+
+def function_path(function: Callable[..., Any]) -> str:
+    return f"{function.__module__}:{function.__qualname__}"
+
+
+def resolve_function(path: str) -> Callable[..., Any]:
+    module_name, _, qualname = path.partition(":")
+    target: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        target = getattr(target, name)
+    return target
+
+
+@dataclass
+class Job:
+    function: str
+    args: List[Any] = field(default_factory=list)
+    # Called with the same arguments once every attempt failed
+    on_failure: str | None = None
+    id: str = field(default_factory=lambda: str(uuid4()))
+    attempt: int = 0
+    error: str | None = None
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def loads(cls, value: str | bytes) -> "Job":
+        return cls(**json.loads(value))
+
+
+class JobQueue:
+    """Reliable Redis queue of coroutine calls, consumed by `src.worker`.
+
+    Taking a job moves it atomically from the pending list to a list owned
+    by the worker, where it stays until it completes, fails or is retried,
+    so jobs of a worker that died are found and put back by the others. The
+    liveness of a worker is a key it keeps refreshing. Retries wait in a
+    sorted set scored by the time they are due.
+
+    The processing lists also count the jobs running across all workers,
+    which never exceed `max_running` (WORKER_GLOBAL_CONCURRENCY, 0 for no
+    limit): a job is only taken while the count is below it.
+    """
+
+    def __init__(self, name: str = "evaluation", client: redis.Redis | None = None, max_running: int | None = None):
+        self.name = name
+        self._client = client
+        self.max_running = settings.WORKER_GLOBAL_CONCURRENCY if max_running is None else max_running
+
+    @property
+    def client(self) -> redis.Redis:
+        # Created lazily, so that it binds to the event loop using it
+        if self._client is None:
+            self._client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT,
+                                       password=settings.REDIS_PASSWORD)
+        return self._client
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((KEY_PREFIX, self.name) + parts)
+
+    @property
+    def pending_key(self) -> str:
+        return self._key("pending")
+
+    @property
+    def scheduled_key(self) -> str:
+        return self._key("scheduled")
+
+    @property
+    def failed_key(self) -> str:
+        return self._key("failed")
+
+    @property
+    def workers_key(self) -> str:
+        return self._key("workers")
+
+    def processing_key(self, worker_id: str) -> str:
+        return self._key("processing", worker_id)
+
+    def heartbeat_key(self, worker_id: str) -> str:
+        return self._key("worker", worker_id)
+
+    # -- PRODUCER METHODS -- #
+
+    async def enqueue(self, function: Callable[..., Any], *args: Any, on_failure: Callable[..., Any] | None = None) -> Job:
+        job = Job(function=function_path(function), args=list(args),
+                  on_failure=function_path(on_failure) if on_failure else None)
+        await self.client.lpush(self.pending_key, job.dumps())
+        return job
+
+    async def enqueue_many(self, function: Callable[..., Any], args_list: List[List[Any]], on_failure: Callable[..., Any] | None = None) -> List[Job]:
+        """Enqueues one call per argument list, in a single round trip."""
+        jobs = [Job(function=function_path(function), args=list(args),
+                    on_failure=function_path(on_failure) if on_failure else None) for args in args_list]
+        if jobs:
+            await self.client.lpush(self.pending_key, *(job.dumps() for job in jobs))
+        return jobs
+
+    # -- WORKER METHODS -- #
+
+    async def dequeue(self, worker_id: str, timeout: float) -> tuple[Job, bytes] | None:
+        """Takes the oldest pending job, waiting up to `timeout` seconds when
+        there is none or when the global limit of running jobs is reached.
+
+        Returns the job with its raw entry, needed to acknowledge it.
+        """
+        await self.promote_scheduled()
+        workers = await self.client.smembers(self.workers_key)
+        processing_keys = [self.processing_key(worker.decode("utf-8")) for worker in workers]
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                # Taking the job fails if any of the counted lists changed meanwhile
+                await pipe.watch(self.pending_key, *processing_keys)
+                available = await pipe.llen(self.pending_key)
+                if available and self.max_running:
+                    running = 0
+                    for key in processing_keys:
+                        running += await pipe.llen(key)
+                    available = running < self.max_running
+                if not available:
+                    await pipe.reset()
+                    await asyncio.sleep(timeout)
+                    return None
+                pipe.multi()
+                pipe.lmove(self.pending_key, self.processing_key(worker_id), "RIGHT", "LEFT")
+                raw, = await pipe.execute()
+            except WatchError:
+                # Another worker took a job first
+                return None
+        if raw is None:
+            return None
+        return Job.loads(raw), raw
+
+    async def complete(self, worker_id: str, raw: bytes) -> None:
+        await self.client.lrem(self.processing_key(worker_id), 1, raw)
+
+    async def retry(self, worker_id: str, raw: bytes, job: Job, delay: float) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key(worker_id), 1, raw)
+            pipe.zadd(self.scheduled_key, {job.dumps(): time.time() + delay})
+            await pipe.execute()
+
+    async def requeue(self, worker_id: str, raw: bytes) -> None:
+        """Puts a job that was interrupted back first in line, as it was."""
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key(worker_id), 1, raw)
+            pipe.rpush(self.pending_key, raw)
+            await pipe.execute()
+
+    async def fail(self, worker_id: str, raw: bytes, job: Job) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key(worker_id), 1, raw)
+            pipe.lpush(self.failed_key, job.dumps())
+            pipe.ltrim(self.failed_key, 0, settings.WORKER_FAILED_JOBS_KEPT - 1)
+            await pipe.execute()
+
+    async def promote_scheduled(self) -> None:
+        due = await self.client.zrangebyscore(self.scheduled_key, "-inf", time.time())
+        for raw in due:
+            # Only the worker that removes the entry pushes it
+            if await self.client.zrem(self.scheduled_key, raw):
+                await self.client.rpush(self.pending_key, raw)
+
+    async def heartbeat(self, worker_id: str, ttl: int) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.sadd(self.workers_key, worker_id)
+            pipe.set(self.heartbeat_key(worker_id), 1, ex=ttl)
+            await pipe.execute()
+
+    async def stop_heartbeat(self, worker_id: str) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.srem(self.workers_key, worker_id)
+            pipe.delete(self.heartbeat_key(worker_id))
+            await pipe.execute()
+
+    async def recover_orphans(self) -> int:
+        """Puts back the jobs held by workers that stopped heartbeating."""
+        recovered = 0
+        prefix = self.processing_key("")
+        async for key in self.client.scan_iter(match=f"{prefix}*"):
+            worker_id = key.decode("utf-8")[len(prefix):]
+            if await self.client.exists(self.heartbeat_key(worker_id)):
+                continue
+            # Newest first to the front of the line, so the oldest runs first
+            while await self.client.lmove(key, self.pending_key, "LEFT", "RIGHT") is not None:
+                recovered += 1
+            await self.client.srem(self.workers_key, worker_id)
+        return recovered
+
+
+evaluation_queue = JobQueue("evaluation")
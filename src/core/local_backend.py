@@ -0,0 +1,176 @@
+import asyncio
+import os
+import signal
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, List
+
+from src.core.config import settings
+from src.core.execution_backend import (ExecutionBackend, ExecutionError,
+                                        WorkflowEvent, WorkflowRun)
+
+# Output kept per run, served as the logs of its pod
+LOG_TAIL_BYTES = 64 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+# Finished runs remembered for late subscribers and log readers
+FINISHED_RUNS_KEPT = 1000
+# Time given to a terminated run to exit before it is killed
+TERMINATE_GRACE_SECONDS = 10
+
+FINISHED_PHASES = ("Succeeded", "Failed", "Error")
+
+
+@dataclass
+class LocalRun:
+    run: WorkflowRun
+    phase: str = "Pending"
+    process: asyncio.subprocess.Process | None = None
+    task: asyncio.Task | None = None
+    logs: bytearray = field(default_factory=bytearray)
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+    @property
+    def finished(self) -> bool:
+        return self.phase in FINISHED_PHASES
+
+
+class LocalBackend(ExecutionBackend):
+    """Runs workflows as processes of this host, with no pod to schedule.
+
+    A run executes the LOCAL_BACKEND_ENTRYPOINT script of the model
+    repository (`modelPath`/`model`), from that directory, with the
+    template name then `--<name> <value>` for every parameter. At most
+    `workers` runs execute at once, the others stay Pending. A run that
+    exits with a nonzero status fails; its output is the log of a pod named
+    after the workflow.
+
+    Runs live in the process that submitted them, they are lost when it
+    stops.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.LOCAL_BACKEND_WORKERS,
+        entrypoint: str = settings.LOCAL_BACKEND_ENTRYPOINT,
+        python: str = settings.LOCAL_BACKEND_PYTHON,
+    ):
+        self.workers = workers
+        self.entrypoint = entrypoint
+        self.python = python
+        self._runs: OrderedDict[str, LocalRun] = OrderedDict()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    def command(self, run: WorkflowRun) -> List[str]:
+        arguments = [self.python, self.entrypoint, run.template]
+        for name, value in run.parameters.items():
+            arguments += [f"--{name}", str(value)]
+        return arguments
+
+    def working_directory(self, run: WorkflowRun) -> Path:
+        return Path(run.parameters.get("modelPath", settings.INFER_DIR)) / run.parameters["model"]
+
+    def _get(self, workflow_name: str) -> LocalRun:
+        local_run = self._runs.get(workflow_name)
+        if local_run is None:
+            raise ExecutionError(f"Workflow {workflow_name} not found")
+        return local_run
+
+    def _slots_of_loop(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    # -- RUN METHODS -- #
+
+    async def submit(self, run: WorkflowRun) -> None:
+        if run.name in self._runs:
+            raise ExecutionError(f"Workflow {run.name} already exists")
+        directory = self.working_directory(run)
+        if not (directory / self.entrypoint).is_file():
+            raise ExecutionError(f"No {self.entrypoint} in {directory}")
+
+        local_run = LocalRun(run)
+        self._runs[run.name] = local_run
+        local_run.task = asyncio.create_task(self._execute(local_run, directory))
+
+    async def _execute(self, local_run: LocalRun, directory: Path) -> None:
+        try:
+            async with self._slots_of_loop():
+                # In its own process group, so that terminating it also stops
+                # the processes it started
+                local_run.process = await asyncio.create_subprocess_exec(
+                    *self.command(local_run.run), cwd=directory, start_new_session=True,
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+                await self._set_phase(local_run, "Running")
+                while chunk := await local_run.process.stdout.read(READ_CHUNK_BYTES):
+                    local_run.logs += chunk
+                    del local_run.logs[:-LOG_TAIL_BYTES]
+                returncode = await local_run.process.wait()
+            await self._set_phase(local_run, "Succeeded" if returncode == 0 else "Failed")
+        except asyncio.CancelledError:
+            # Terminated while pending
+            await self._set_phase(local_run, "Failed")
+            raise
+        except OSError as exc:
+            local_run.logs += f"Cannot start {self.python}: {exc}".encode()
+            await self._set_phase(local_run, "Error")
+        finally:
+            self._forget_finished()
+
+    async def _set_phase(self, local_run: LocalRun, phase: str) -> None:
+        async with local_run.changed:
+            local_run.phase = phase
+            local_run.changed.notify_all()
+
+    def _forget_finished(self) -> None:
+        finished = [name for name, local_run in self._runs.items() if local_run.finished]
+        for name in finished[:max(0, len(finished) - FINISHED_RUNS_KEPT)]:
+            del self._runs[name]
+
+    async def subscribe(self, workflow_name: str) -> AsyncIterator[WorkflowEvent]:
+        local_run = self._get(workflow_name)
+        seen = None
+        while True:
+            async with local_run.changed:
+                await local_run.changed.wait_for(lambda: local_run.phase != seen)
+                seen = local_run.phase
+            if seen not in ("Pending", "Deleted"):
+                yield WorkflowEvent("pod", workflow_name, seen)
+            yield WorkflowEvent("workflow", workflow_name, seen)
+
+    # -- REMOVAL METHODS -- #
+
+    async def terminate(self, workflow_name: str) -> None:
+        local_run = self._get(workflow_name)
+        if local_run.task is None or local_run.task.done():
+            return
+        process = local_run.process
+        if process is None:
+            local_run.task.cancel()
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(process.wait(), timeout=TERMINATE_GRACE_SECONDS)
+            except TimeoutError:
+                os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            # Already exited
+            pass
+
+    async def delete(self, workflow_name: str) -> None:
+        local_run = self._get(workflow_name)
+        await self.terminate(workflow_name)
+        if local_run.task is not None:
+            await asyncio.gather(local_run.task, return_exceptions=True)
+        self._runs.pop(workflow_name, None)
+        await self._set_phase(local_run, "Deleted")
+
+    # -- LOG METHODS -- #
+
+    async def read_logs(self, pod_name: str, container: str | None = None) -> str:
+        return self._get(pod_name).logs.decode("utf-8", errors="replace")
@@ -0,0 +1,33 @@
+import hashlib
+import os
+
+from git import Repo
+from git.exc import GitError
+
+
+def repository_revision(path: str) -> str | None:
+    """Commit checked out in the repository at `path`, None when there is none."""
+    try:
+        return Repo(path).head.commit.hexsha
+    except (GitError, ValueError):
+        return None
+
+
+def directory_checksum(path: str) -> str | None:
+    """Checksum of the manifest of a directory: the relative path, size and
+    modification time of every file, in a stable order.
+
+    File contents are not read, so the cost depends on the number of files
+    only. Returns None when the directory does not exist.
+    """
+    if not os.path.isdir(path):
+        return None
+    manifest = hashlib.sha256()
+    for root, directories, files in os.walk(path):
+        directories.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            relative = os.path.relpath(file_path, path)
+            manifest.update(f"{relative}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return manifest.hexdigest()
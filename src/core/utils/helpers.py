@@ -12,3 +12,30 @@ def parse_arguments():
         help="Enable automatic reload"
     )
     return parser.parse_args()
+
+
+def parse_rank_index_arguments():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the Redis rank index from the Score table."
+    )
+    parser.add_argument(
+        "-c",
+        "--check",
+        action="store_true",
+        help="Only compare the rank index with the SQL ranking"
+    )
+    return parser.parse_args()
+
+
+def parse_worker_arguments():
+    parser = argparse.ArgumentParser(
+        description="Run the evaluation worker."
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of evaluations running at once"
+    )
+    return parser.parse_args()
@@ -0,0 +1,10 @@
+from fastapi import Request, Response
+
+
+def set_next_link(request: Request, response: Response, next_cursor: str | None) -> None:
+    """Advertises the next page through the `Link` header (RFC 8288)."""
+    if next_cursor is None:
+        return
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+    response.headers["X-Next-Cursor"] = next_cursor
@@ -0,0 +1,63 @@
+import errno
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _link(source: str, destination: str, mode: str) -> str:
+    if mode == "hardlink":
+        try:
+            os.link(source, destination)
+            return mode
+        except OSError as exc:
+            # Hardlinks cannot cross filesystems, and some refuse them
+            if exc.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            mode = "symlink"
+    if mode == "symlink":
+        os.symlink(os.path.abspath(source), destination)
+        return mode
+    shutil.copy2(source, destination)
+    return mode
+
+
+def stage_tree(source: str | Path, destination: str | Path, private: Iterable[str] = (), mode: str | None = None) -> None:
+    """Exposes the files of `source` under `destination` without copying them.
+
+    Directories are created, so that whatever a workflow writes into the
+    staged tree stays private to it, and files are linked according to
+    DATASET_STAGING (or `mode`), which costs the same for any file size.
+    The files named in `private` are copied instead, because they are
+    rewritten by every run and must not change the original.
+
+    Linked files share their content with the original: they are meant to
+    be read, and replaced rather than modified in place.
+    """
+    if not os.path.isdir(source):
+        raise FileNotFoundError(errno.ENOENT, "Dataset not found", str(source))
+    mode = mode or settings.DATASET_STAGING
+    private = set(private)
+    for root, directories, files in os.walk(source):
+        relative = os.path.relpath(root, source)
+        target_root = os.path.normpath(os.path.join(destination, relative))
+        os.makedirs(target_root, exist_ok=True)
+        for name in directories:
+            os.makedirs(os.path.join(target_root, name), exist_ok=True)
+        for name in files:
+            source_path = os.path.join(root, name)
+            target_path = os.path.join(target_root, name)
+            if os.path.lexists(target_path):
+                os.remove(target_path)
+            if name in private:
+                shutil.copy2(source_path, target_path)
+                continue
+            staged_mode = _link(source_path, target_path, mode)
+            if staged_mode != mode:
+                logger.info("Cannot hardlink %s, staging it as a %s", source_path, staged_mode)
+                mode = staged_mode
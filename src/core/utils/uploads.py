@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from stat import S_ISREG
+from typing import BinaryIO, Dict
+
+from fastapi import HTTPException, Request, status
+
+from src.core.config import settings
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+MAX_FIELD_BYTES = 64 * 1024
+# Name of the file part on disk, the client filename is only metadata
+STORED_NAME = "upload"
+
+# Bytes written by the uploads in progress in this process, counted
+# against the quota before they show up in TMP_DIR
+_in_flight = 0
+
+
+@dataclass
+class StreamedUpload:
+    # As sent by the client
+    filename: str
+    path: Path
+    size: int
+    sha256: str
+    fields: Dict[str, str] = field(default_factory=dict)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def directory_size(path: str | Path) -> int:
+    """Bytes of the files owned by `path`. Symlinks and hardlinked files,
+    such as the datasets staged for evaluations, are not counted."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                stat = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            if S_ISREG(stat.st_mode) and stat.st_nlink == 1:
+                total += stat.st_size
+    return total
+
+
+def stored_name(filename: str) -> str:
+    """Name the file part is written under, with the extension of the client
+    filename kept for the tools that guess the format from it."""
+    suffix = Path(filename).suffix
+    if suffix[1:].isascii() and suffix[1:].isalnum():
+        return STORED_NAME + suffix
+    return STORED_NAME
+
+
+class _UploadWriter:
+    """Multipart callbacks writing the file part straight to disk while
+    hashing it, and keeping the other (small) fields in memory."""
+
+    def __init__(self, directory: Path, file_field: str, max_size: int):
+        self.directory = directory
+        self.file_field = file_field
+        self.max_size = max_size
+        self.fields: Dict[str, str] = {}
+        self.filename: str | None = None
+        self.stored_name: str | None = None
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._name: str | None = None
+        self._file: BinaryIO | None = None
+        self._value = bytearray()
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._name = None
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(
+            self._headers.get(b"content-disposition", b""))
+        self._name = options.get(b"name", b"").decode("utf-8")
+        filename = options.get(b"filename")
+        if filename is not None and self._name == self.file_field and self.filename is None:
+            self.filename = Path(filename.decode("utf-8", errors="replace")).name
+            self.stored_name = stored_name(self.filename)
+            self._file = open(self.directory / self.stored_name, "wb")
+        self._value = bytearray()
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._file is not None:
+            self.size += end - start
+            if self.size > self.max_size:
+                raise UploadTooLarge()
+            chunk = data[start:end]
+            self.hasher.update(chunk)
+            self._file.write(chunk)
+        elif self._name is not None:
+            self._value += data[start:end]
+            if len(self._value) > MAX_FIELD_BYTES:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                    detail=f"Form field {self._name} is too large")
+
+    def on_part_end(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self._name is not None:
+            self.fields[self._name] = self._value.decode("utf-8")
+        self._name = None
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Closes and removes the partially written file."""
+        self.close()
+        if self.stored_name is not None:
+            (self.directory / self.stored_name).unlink(missing_ok=True)
+
+
+async def stream_upload(request: Request, directory: Path, file_field: str = "file") -> StreamedUpload:
+    """Parses a multipart request body as it arrives and writes its file part
+    into `directory`, hashing it on the way. The file is named by
+    `stored_name`, never by the client.
+
+    Unlike `UploadFile`, the body is never spooled to a temporary file first,
+    so the file is written to disk once. Parsing and writing run off the
+    event loop in chunks of UPLOAD_CHUNK_BYTES. The upload is rejected with
+    413 once it exceeds UPLOAD_MAX_BYTES, or once TMP_DIR would grow past
+    UPLOAD_QUOTA_BYTES.
+    """
+    global _in_flight  # pylint: disable=global-statement
+
+    content_type, options = parse_options_header(
+        request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Expected a multipart/form-data body")
+
+    content_length = int(request.headers.get("content-length") or 0)
+    if content_length > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Upload exceeds the maximum size")
+
+    loop = asyncio.get_running_loop()
+    used = await loop.run_in_executor(None, directory_size, settings.TMP_DIR)
+    # Without a Content-Length the limit is enforced while streaming instead
+    max_size = min(settings.UPLOAD_MAX_BYTES,
+                   settings.UPLOAD_QUOTA_BYTES - used - _in_flight)
+    if max_size <= 0 or content_length > max_size:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Upload quota exceeded, try again later")
+
+    writer = _UploadWriter(directory, file_field, max_size)
+    parser = MultipartParser(options[b"boundary"], writer.callbacks())
+    reserved = content_length or max_size
+    _in_flight += reserved
+    completed = False
+    try:
+        buffer = bytearray()
+        async for chunk in request.stream():
+            buffer += chunk
+            if len(buffer) >= settings.UPLOAD_CHUNK_BYTES:
+                data, buffer = bytes(buffer), bytearray()
+                await loop.run_in_executor(None, parser.write, data)
+        await loop.run_in_executor(None, parser.write, bytes(buffer))
+        parser.finalize()
+        completed = True
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Upload exceeds the maximum size or quota") from exc
+    finally:
+        _in_flight -= reserved
+        if completed:
+            writer.close()
+        else:
+            # A partial file must not count against the quota of later uploads
+            writer.discard()
+
+    if writer.filename is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"Missing file field {file_field}")
+
+    return StreamedUpload(filename=writer.filename, path=directory / writer.stored_name,
+                          size=writer.size, sha256=writer.hasher.hexdigest(), fields=writer.fields)
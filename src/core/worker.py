@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import os
+import socket
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Tuple, Type
+
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.job_queue import Job, JobQueue, resolve_function
+
+logger = logging.getLogger(__name__)
+
+DEQUEUE_TIMEOUT_SECONDS = 1
+HEARTBEAT_SECONDS = 10
+RETRY_SECONDS = 5
+
+# Timeout of the job running in the current task, and its duration
+_job_timeout: ContextVar[Tuple[asyncio.Timeout, float] | None] = ContextVar("job_timeout", default=None)
+
+
+class PermanentJobError(Exception):
+    """Raised by a job that cannot succeed however often it is retried, e.g.
+    because what it works on does not exist."""
+
+
+def deferred_timeout(function: Callable[..., Any]) -> Callable[..., Any]:
+    """Marks a job whose timeout only starts once it calls `start_timeout`,
+    for jobs that first wait for their turn, e.g. for a workflow slot."""
+    function.deferred_timeout = True
+    return function
+
+
+def start_timeout() -> None:
+    """Starts the timeout of the running job from now. Does nothing outside
+    of a worker."""
+    current = _job_timeout.get()
+    if current is not None:
+        timeout, seconds = current
+        timeout.reschedule(asyncio.get_running_loop().time() + seconds)
+
+
+class Worker:
+    """Runs the jobs of a queue as coroutines on one event loop.
+
+    Up to `concurrency` jobs run at once, each bounded by `job_timeout`
+    seconds from when it starts or, with `deferred_timeout`, from when it
+    calls `start_timeout`. A job that raises or times out is retried after
+    an exponential backoff, up to `max_retries` times, after which its
+    `on_failure` handler runs. Exceptions in `non_retryable` run it right
+    away. `stop` stops taking jobs and gives the
+    running ones `drain_timeout` seconds to finish; the others are
+    cancelled and put back in the queue.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int = settings.WORKER_CONCURRENCY,
+        job_timeout: float = settings.WORKER_JOB_TIMEOUT_SECONDS,
+        max_retries: int = settings.WORKER_MAX_RETRIES,
+        retry_backoff: float = settings.WORKER_RETRY_BACKOFF_SECONDS,
+        drain_timeout: float = settings.WORKER_DRAIN_SECONDS,
+        non_retryable: Tuple[Type[Exception], ...] = (PermanentJobError,),
+    ):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.job_timeout = job_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.drain_timeout = drain_timeout
+        self.non_retryable = non_retryable
+        self.id = f"{socket.gethostname()}-{os.getpid()}"
+        self._stopping = asyncio.Event()
+        self._running: Dict[asyncio.Task, Tuple[Job, bytes]] = {}
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat())
+        stopping = asyncio.create_task(self._stopping.wait())
+        try:
+            while not self._stopping.is_set():
+                if len(self._running) >= self.concurrency:
+                    await asyncio.wait([stopping, *self._running], return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                try:
+                    entry = await self.queue.dequeue(self.id, DEQUEUE_TIMEOUT_SECONDS)
+                except RedisError as exc:
+                    logger.warning("Cannot take jobs, retrying: %s", exc)
+                    await asyncio.sleep(RETRY_SECONDS)
+                    continue
+                if entry is not None:
+                    task = asyncio.create_task(self._execute(*entry))
+                    self._running[task] = entry
+                    task.add_done_callback(self._running.pop)
+            await self._drain()
+        finally:
+            stopping.cancel()
+            heartbeat.cancel()
+            await self.queue.stop_heartbeat(self.id)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            try:
+                await self.queue.heartbeat(self.id, 3 * HEARTBEAT_SECONDS)
+                recovered = await self.queue.recover_orphans()
+                if recovered:
+                    logger.info("Put back %s jobs of stopped workers", recovered)
+            except RedisError as exc:
+                logger.warning("Heartbeat failed: %s", exc)
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+
+    async def _drain(self) -> None:
+        if not self._running:
+            return
+        logger.info("Draining %s running jobs", len(self._running))
+        running = dict(self._running)
+        _, pending = await asyncio.wait(running, timeout=self.drain_timeout)
+        interrupted = [(task, running[task]) for task in pending]
+        for task, _ in interrupted:
+            task.cancel()
+        await asyncio.gather(*(task for task, _ in interrupted), return_exceptions=True)
+        for _, (job, raw) in interrupted:
+            logger.warning("Job %s did not finish in time, putting it back", job.id)
+            await self.queue.requeue(self.id, raw)
+
+    async def _execute(self, job: Job, raw: bytes) -> None:
+        timeout: asyncio.Timeout | None = None
+        try:
+            function = resolve_function(job.function)
+            deferred = getattr(function, "deferred_timeout", False)
+            async with asyncio.timeout(None if deferred else self.job_timeout) as timeout:
+                token = _job_timeout.set((timeout, self.job_timeout))
+                try:
+                    await function(*job.args)
+                finally:
+                    _job_timeout.reset(token)
+        except asyncio.CancelledError:
+            # Interrupted by a drain, which puts the job back
+            raise
+        except Exception as exc:  # pylint: disable=broad-except
+            # A TimeoutError raised by the job itself is an error like the others
+            timed_out = isinstance(exc, TimeoutError) and timeout is not None and timeout.expired()
+            job.error = f"Timed out after {self.job_timeout}s" if timed_out else repr(exc)
+            await self._handle_failure(job, raw, retryable=not isinstance(exc, self.non_retryable))
+        else:
+            await self.queue.complete(self.id, raw)
+
+    async def _handle_failure(self, job: Job, raw: bytes, retryable: bool = True) -> None:
+        if retryable and job.attempt < self.max_retries:
+            delay = self.retry_backoff * 2 ** job.attempt
+            logger.warning("Job %s failed (%s), retrying in %ss", job.id, job.error, delay)
+            job.attempt += 1
+            await self.queue.retry(self.id, raw, job, delay)
+            return
+
+        logger.error("Job %s failed (%s) after %s attempts", job.id, job.error, job.attempt + 1)
+        if job.on_failure:
+            try:
+                await resolve_function(job.on_failure)(*job.args)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Failure handler of job %s failed", job.id)
+        await self.queue.fail(self.id, raw, job)
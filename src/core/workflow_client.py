@@ -0,0 +1,104 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+
+from kubernetes import client, config
+from kubernetes.client.exceptions import ApiException
+
+from src.core.config import settings
+
+__all__ = ["ApiException", "WorkflowClient", "workflow_client"]
+
+WORKFLOW_GROUP = "argoproj.io"
+WORKFLOW_VERSION = "v1alpha1"
+WORKFLOW_PLURAL = "workflows"
+
+
+class WorkflowClient:
+    """Async facade over the synchronous Kubernetes client for Argo workflows
+    and their pods.
+
+    Blocking calls run on a bounded thread pool and share one API client,
+    whose connection pool is sized to match, so a slow call only ever
+    occupies a worker thread and never the event loop. The Kubernetes
+    configuration is loaded on first use.
+    """
+
+    def __init__(self, namespace: str = settings.ARGO_NAMESPACE, max_workers: int = settings.KUBE_CLIENT_WORKERS):
+        self.namespace = namespace
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="kube-client")
+        self._core_api: client.CoreV1Api | None = None
+        self._custom_api: client.CustomObjectsApi | None = None
+
+    def _connect(self) -> None:
+        try:
+            config.load_incluster_config()
+        except config.ConfigException:
+            config.load_kube_config()
+        configuration = client.Configuration.get_default_copy()
+        configuration.connection_pool_maxsize = self._max_workers
+        api_client = client.ApiClient(configuration)
+        self._core_api = client.CoreV1Api(api_client)
+        self._custom_api = client.CustomObjectsApi(api_client)
+
+    @property
+    def core_api(self) -> client.CoreV1Api:
+        if self._core_api is None:
+            self._connect()
+        return self._core_api
+
+    @property
+    def custom_api(self) -> client.CustomObjectsApi:
+        if self._custom_api is None:
+            self._connect()
+        return self._custom_api
+
+    async def _run(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+    def workflow_kwargs(self) -> Dict[str, str]:
+        return {
+            "group": WORKFLOW_GROUP,
+            "version": WORKFLOW_VERSION,
+            "namespace": self.namespace,
+            "plural": WORKFLOW_PLURAL,
+        }
+
+    # -- WORKFLOW METHODS -- #
+
+    async def create_workflow(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._run(lambda: self.custom_api.create_namespaced_custom_object(
+            body=manifest, **self.workflow_kwargs()))
+
+    async def get_workflow(self, workflow_name: str) -> Dict[str, Any]:
+        return await self._run(lambda: self.custom_api.get_namespaced_custom_object(
+            name=workflow_name, **self.workflow_kwargs()))
+
+    async def get_workflow_phase(self, workflow_name: str) -> str:
+        workflow = await self.get_workflow(workflow_name)
+        workflow_status = workflow.get('status')
+        if workflow_status:
+            return workflow_status.get('phase', 'Unknown')
+        return 'Unknown'
+
+    async def terminate_workflow(self, workflow_name: str) -> None:
+        await self._run(lambda: self.custom_api.patch_namespaced_custom_object(
+            name=workflow_name, body={"spec": {"shutdown": "Terminate"}}, **self.workflow_kwargs()))
+
+    async def delete_workflow(self, workflow_name: str) -> None:
+        await self._run(lambda: self.custom_api.delete_namespaced_custom_object(
+            name=workflow_name, **self.workflow_kwargs()))
+
+    # -- POD METHODS -- #
+
+    async def read_pod_logs(self, pod_name: str, container: str | None = None) -> str:
+        kwargs = {"container": container} if container else {}
+        return await self._run(lambda: self.core_api.read_namespaced_pod_log(
+            name=pod_name, namespace=self.namespace, **kwargs))
+
+
+workflow_client = WorkflowClient()
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Set
+
+from kubernetes import watch
+
+from src.core.execution_backend import WorkflowEvent
+from src.core.workflow_client import (ApiException, WorkflowClient,
+                                      workflow_client)
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW_LABEL = "workflows.argoproj.io/workflow"
+RETRY_SECONDS = 5
+# Time finished workflows stay cached for late subscribers
+FINISHED_GRACE_SECONDS = 600
+FINISHED_PHASES = ("Succeeded", "Failed", "Error")
+
+
+class WorkflowInformer:
+    """One watch on the workflows and one on the workflow pods of the
+    namespace, shared by every subscriber of the process.
+
+    The watches run on daemon threads and feed an in-memory cache of
+    workflow and pod phases, from which phase changes are fanned out to the
+    subscribers of each workflow. They start with the first subscription
+    and resume by themselves after errors. Finished workflows leave the
+    cache after FINISHED_GRACE_SECONDS.
+    """
+
+    def __init__(self, client: WorkflowClient = workflow_client):
+        self._client = client
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._workflows: Dict[str, str] = {}
+        self._pods: Dict[str, Dict[str, str]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # Threads of a previous event loop stop on their next event
+        self._loop = loop
+        self._workflows.clear()
+        self._pods.clear()
+        self._subscribers.clear()
+        for kind in ("workflow", "pod"):
+            threading.Thread(target=self._watch_forever, args=(loop, kind),
+                             name=f"{kind}-informer", daemon=True).start()
+
+    def _watch_forever(self, loop: asyncio.AbstractEventLoop, kind: str) -> None:
+        while self._loop is loop:
+            watcher = watch.Watch()
+            try:
+                if kind == "workflow":
+                    # Listed first, the DELETED events missed while the
+                    # watch was down show as workflows missing from the list
+                    listed = self._client.custom_api.list_namespaced_custom_object(**self._client.workflow_kwargs())
+                    for obj in listed["items"]:
+                        loop.call_soon_threadsafe(self._apply, kind, "MODIFIED", obj)
+                    asyncio.run_coroutine_threadsafe(
+                        self._forget_missing({obj["metadata"]["name"] for obj in listed["items"]}), loop)
+                    events = watcher.stream(self._client.custom_api.list_namespaced_custom_object,
+                                            resource_version=listed["metadata"]["resourceVersion"],
+                                            **self._client.workflow_kwargs())
+                else:
+                    # Without a resource version the watch first replays
+                    # every existing pod, which also resyncs the cache
+                    events = watcher.stream(self._client.core_api.list_namespaced_pod,
+                                            namespace=self._client.namespace, label_selector=WORKFLOW_LABEL)
+                for event in events:
+                    if self._loop is not loop:
+                        break
+                    loop.call_soon_threadsafe(self._apply, kind, event["type"], event["object"])
+            except RuntimeError:
+                # The event loop was closed
+                return
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("%s watch failed, retrying: %s", kind, exc)
+                time.sleep(RETRY_SECONDS)
+            finally:
+                watcher.stop()
+
+    def _apply(self, kind: str, event_type: str, obj: Any) -> None:
+        if kind == "workflow":
+            workflow_name = obj["metadata"]["name"]
+            if event_type == "DELETED":
+                self._forget(workflow_name)
+                return
+            phase = (obj.get("status") or {}).get("phase", "Unknown")
+            if self._workflows.get(workflow_name) != phase:
+                self._workflows[workflow_name] = phase
+                if phase in FINISHED_PHASES:
+                    self._loop.call_later(FINISHED_GRACE_SECONDS, self._evict, workflow_name, phase)
+                self._dispatch(workflow_name, WorkflowEvent(
+                    "workflow", workflow_name, phase))
+        else:
+            workflow_name = (obj.metadata.labels or {}).get(WORKFLOW_LABEL)
+            if workflow_name is None:
+                return
+            if event_type == "DELETED":
+                pods = self._pods.get(workflow_name, {})
+                pods.pop(obj.metadata.name, None)
+                if not pods:
+                    self._pods.pop(workflow_name, None)
+                return
+            pods = self._pods.setdefault(workflow_name, {})
+            if pods.get(obj.metadata.name) != obj.status.phase:
+                pods[obj.metadata.name] = obj.status.phase
+                self._dispatch(workflow_name, WorkflowEvent(
+                    "pod", obj.metadata.name, obj.status.phase))
+
+    def _forget(self, workflow_name: str) -> None:
+        self._workflows.pop(workflow_name, None)
+        self._pods.pop(workflow_name, None)
+        self._dispatch(workflow_name, WorkflowEvent(
+            "workflow", workflow_name, "Deleted"))
+
+    def _evict(self, workflow_name: str, phase: str) -> None:
+        # Unless it ran again under the same name since
+        if self._workflows.get(workflow_name) == phase:
+            del self._workflows[workflow_name]
+            self._pods.pop(workflow_name, None)
+
+    async def _forget_missing(self, listed: Set[str]) -> None:
+        """Ends the cached and subscribed workflows missing from a new list,
+        once the API confirms they are gone."""
+        for workflow_name in (self._workflows.keys() | self._subscribers.keys()) - listed:
+            try:
+                await self._client.get_workflow(workflow_name)
+            except ApiException as exc:
+                if exc.status == 404:
+                    self._forget(workflow_name)
+                else:
+                    logger.warning("Cannot check workflow %s: %s", workflow_name, exc)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Cannot check workflow %s: %s", workflow_name, exc)
+
+    def _dispatch(self, workflow_name: str, event: WorkflowEvent) -> None:
+        for queue in self._subscribers.get(workflow_name, ()):
+            queue.put_nowait(event)
+
+    async def subscribe(self, workflow_name: str) -> AsyncIterator[WorkflowEvent]:
+        """Yields the current phase of the workflow and of its pods, then
+        every phase change until the iterator is closed.
+
+        Raises ApiException when the workflow does not exist.
+        """
+        self._ensure_started()
+        queue: asyncio.Queue = asyncio.Queue()
+        subscribers = self._subscribers.setdefault(workflow_name, set())
+        subscribers.add(queue)
+        try:
+            phase = self._workflows.get(workflow_name)
+            if phase is None:
+                # Not seen by the watch yet, e.g. right after being created
+                phase = await self._client.get_workflow_phase(workflow_name)
+                phase = self._workflows.get(workflow_name, phase)
+
+            seen: Dict[tuple, str] = {}
+            snapshot = [WorkflowEvent("workflow", workflow_name, phase)] + [
+                WorkflowEvent("pod", pod_name, pod_phase)
+                for pod_name, pod_phase in self._pods.get(workflow_name, {}).items()
+            ]
+            for event in snapshot:
+                seen[event.kind, event.name] = event.phase
+                yield event
+            while True:
+                event = await queue.get()
+                # Skip changes already covered by the snapshot
+                if seen.get((event.kind, event.name)) != event.phase:
+                    seen[event.kind, event.name] = event.phase
+                    yield event
+        finally:
+            subscribers.discard(queue)
+            if not subscribers and self._subscribers.get(workflow_name) is subscribers:
+                del self._subscribers[workflow_name]
+
+
+workflow_informer = WorkflowInformer()
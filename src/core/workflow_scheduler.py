@@ -0,0 +1,382 @@
+import asyncio
+import heapq
+import json
+import logging
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from enum import IntEnum
+from typing import (AsyncIterator, Callable, Deque, Dict, Iterable, List,
+                    NamedTuple, Protocol, Set, Tuple)
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError, WatchError
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "scheduler"
+# Weight of the last run in the running average of workflow durations
+DURATION_SMOOTHING = 0.2
+
+
+class Priority(IntEnum):
+    """Lower values are admitted first."""
+    INTERACTIVE = 0
+    EVALUATION = 1
+    BACKFILL = 2
+
+
+@dataclass
+class SlotRequest:
+    id: str
+    owner: str
+    priority: Priority
+    enqueued_at: float
+    heartbeat_at: float
+    granted_at: float | None = None
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def loads(cls, value: str | bytes) -> "SlotRequest":
+        data = json.loads(value)
+        data["priority"] = Priority(data["priority"])
+        return cls(**data)
+
+
+class SlotStatus(NamedTuple):
+    id: str
+    owner: str
+    priority: Priority
+    running: bool
+    # Both None while running
+    position: int | None
+    estimated_wait_seconds: float | None
+
+
+class SchedulerState:
+    """Admission policy over the waiting and running workflow requests.
+
+    Waiting requests are admitted by priority class first. Within a class,
+    the owner with the fewest requests running (or admitted before in the
+    same pass) goes first, ties going to the owner served least recently,
+    so that one owner's backlog cannot take every slot. Each owner's
+    requests run in arrival order. At most `max_in_flight` requests run at
+    once.
+    """
+
+    def __init__(self, requests: Iterable[SlotRequest], max_in_flight: int, served: Dict[str, float] | None = None):
+        self.requests = {request.id: request for request in requests}
+        self.max_in_flight = max_in_flight
+        # Last time each owner was granted a slot
+        self.served = dict(served or {})
+
+    @property
+    def running(self) -> List[SlotRequest]:
+        return [request for request in self.requests.values() if request.granted_at is not None]
+
+    @property
+    def free_slots(self) -> int:
+        return max(0, self.max_in_flight - len(self.running))
+
+    def order(self) -> List[SlotRequest]:
+        """Waiting requests in the order they would be admitted."""
+        shares = Counter(request.owner for request in self.running)
+        classes: Dict[Priority, Dict[str, Deque[SlotRequest]]] = {}
+        for request in sorted(self.requests.values(), key=lambda request: (request.enqueued_at, request.id)):
+            if request.granted_at is None:
+                classes.setdefault(request.priority, {}).setdefault(request.owner, deque()).append(request)
+
+        order = []
+        for priority in sorted(classes):
+            owners = classes[priority]
+            heap = [self._rank(shares[owner], owner, queue) for owner, queue in owners.items()]
+            heapq.heapify(heap)
+            while heap:
+                share, _, _, owner = heapq.heappop(heap)
+                queue = owners[owner]
+                order.append(queue.popleft())
+                shares[owner] = share + 1
+                if queue:
+                    heapq.heappush(heap, self._rank(share + 1, owner, queue))
+        return order
+
+    def _rank(self, share: int, owner: str, queue: Deque[SlotRequest]) -> Tuple[int, float, float, str]:
+        return share, self.served.get(owner, float("-inf")), queue[0].enqueued_at, owner
+
+    def admit(self, now: float) -> List[SlotRequest]:
+        admitted = self.order()[:self.free_slots]
+        for request in admitted:
+            request.granted_at = now
+            self.served[request.owner] = now
+        return admitted
+
+    def statuses(self, average_duration: float) -> List[SlotStatus]:
+        """Running requests, then the waiting ones with their position and
+        estimated wait, assuming slots free up at the average duration."""
+        statuses = [SlotStatus(request.id, request.owner, request.priority, True, None, None)
+                    for request in self.running]
+        free_slots = self.free_slots
+        for position, request in enumerate(self.order()):
+            rounds = 0 if position < free_slots else (position - free_slots) // max(1, self.max_in_flight) + 1
+            statuses.append(SlotStatus(request.id, request.owner, request.priority,
+                                       False, position, rounds * average_duration))
+        return statuses
+
+
+class SchedulerStore(Protocol):
+    async def add(self, request: SlotRequest) -> None: ...
+
+    async def remove(self, request_id: str) -> SlotRequest | None: ...
+
+    async def schedule(self, max_in_flight: int, now: float, lease_seconds: float, alive: Set[str]) -> SchedulerState: ...
+
+    async def snapshot(self, max_in_flight: int) -> SchedulerState: ...
+
+    async def record_duration(self, seconds: float) -> None: ...
+
+    async def average_duration(self) -> float | None: ...
+
+
+class MemorySchedulerStore:
+    """Requests of a single process, for running without Redis."""
+
+    def __init__(self):
+        self.requests: Dict[str, SlotRequest] = {}
+        self.served: Dict[str, float] = {}
+        self.duration: float | None = None
+
+    async def add(self, request: SlotRequest) -> None:
+        self.requests[request.id] = request
+
+    async def remove(self, request_id: str) -> SlotRequest | None:
+        return self.requests.pop(request_id, None)
+
+    async def snapshot(self, max_in_flight: int) -> SchedulerState:
+        return SchedulerState(self.requests.values(), max_in_flight, self.served)
+
+    async def schedule(self, max_in_flight: int, now: float, lease_seconds: float, alive: Set[str]) -> SchedulerState:
+        # Every request belongs to this process, so none expires
+        state = SchedulerState(self.requests.values(), max_in_flight, self.served)
+        state.admit(now)
+        self.served = state.served
+        return state
+
+    async def record_duration(self, seconds: float) -> None:
+        if self.duration is not None:
+            seconds = (1 - DURATION_SMOOTHING) * self.duration + DURATION_SMOOTHING * seconds
+        self.duration = seconds
+
+    async def average_duration(self) -> float | None:
+        return self.duration
+
+
+class RedisSchedulerStore:
+    """Requests of every process in one Redis hash, updated in WATCH/MULTI
+    transactions, so that the cap and the order hold across the API and
+    the evaluation workers."""
+
+    def __init__(self, client: redis.Redis | None = None):
+        self._client = client
+        self.requests_key = f"{KEY_PREFIX}:requests"
+        # One entry per owner ever served, owners are users
+        self.served_key = f"{KEY_PREFIX}:served"
+        self.duration_key = f"{KEY_PREFIX}:average_duration"
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT,
+                                       password=settings.REDIS_PASSWORD)
+        return self._client
+
+    async def add(self, request: SlotRequest) -> None:
+        await self.client.hset(self.requests_key, request.id, request.dumps())
+
+    async def remove(self, request_id: str) -> SlotRequest | None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hget(self.requests_key, request_id)
+            pipe.hdel(self.requests_key, request_id)
+            raw, _ = await pipe.execute()
+        return SlotRequest.loads(raw) if raw is not None else None
+
+    async def snapshot(self, max_in_flight: int) -> SchedulerState:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hvals(self.requests_key)
+            pipe.hgetall(self.served_key)
+            entries, served = await pipe.execute()
+        return SchedulerState(map(SlotRequest.loads, entries), max_in_flight, _decode_served(served))
+
+    async def schedule(self, max_in_flight: int, now: float, lease_seconds: float, alive: Set[str]) -> SchedulerState:
+        while True:
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(self.requests_key, self.served_key)
+                    entries = await pipe.hvals(self.requests_key)
+                    served = _decode_served(await pipe.hgetall(self.served_key))
+                    requests = list(map(SlotRequest.loads, entries))
+                    updated = {}
+                    for request in requests:
+                        if request.id in alive and now - request.heartbeat_at > lease_seconds / 4:
+                            request.heartbeat_at = now
+                            updated[request.id] = request
+                    # Requests of processes that stopped refreshing them
+                    expired = [request.id for request in requests if now - request.heartbeat_at > lease_seconds]
+                    state = SchedulerState((request for request in requests if request.id not in expired),
+                                           max_in_flight, served)
+                    admitted = state.admit(now)
+                    for request in admitted:
+                        updated[request.id] = request
+
+                    mapping = {request_id: request.dumps() for request_id, request in updated.items()
+                               if request_id not in expired}
+
+                    pipe.multi()
+                    if expired:
+                        pipe.hdel(self.requests_key, *expired)
+                    if mapping:
+                        pipe.hset(self.requests_key, mapping=mapping)
+                    if admitted:
+                        pipe.hset(self.served_key, mapping={request.owner: now for request in admitted})
+                    await pipe.execute()
+                    return state
+                except WatchError:
+                    continue
+
+    async def record_duration(self, seconds: float) -> None:
+        average = await self.average_duration()
+        if average is not None:
+            seconds = (1 - DURATION_SMOOTHING) * average + DURATION_SMOOTHING * seconds
+        await self.client.set(self.duration_key, seconds)
+
+    async def average_duration(self) -> float | None:
+        value = await self.client.get(self.duration_key)
+        return float(value) if value is not None else None
+
+
+def _decode_served(served: Dict[bytes, bytes]) -> Dict[str, float]:
+    return {owner.decode("utf-8"): float(value) for owner, value in served.items()}
+
+
+class WorkflowScheduler:
+    """Admission control in front of the creation of Argo workflows.
+
+    `enqueue` registers a request for a workflow slot and `wait` returns
+    once it is granted, see `SchedulerState` for the order. The slot must
+    be released when the workflow is over, which `slot` does. Every process
+    runs one scheduling loop for its own waiters, which also keeps its
+    requests alive; requests of a process that died expire after
+    WORKFLOW_SLOT_LEASE_SECONDS.
+
+    Scheduling is best-effort like the other uses of Redis: a request that
+    cannot be registered is granted its slot straight away.
+    """
+
+    def __init__(
+        self,
+        store: SchedulerStore | None = None,
+        max_in_flight: int = settings.WORKFLOW_MAX_IN_FLIGHT,
+        lease_seconds: float = settings.WORKFLOW_SLOT_LEASE_SECONDS,
+        poll_seconds: float | None = settings.WORKFLOW_SCHEDULER_POLL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.store = store or RedisSchedulerStore()
+        self.max_in_flight = max_in_flight
+        self.lease_seconds = lease_seconds
+        # None to only schedule on explicit `schedule` calls
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+        self._local: Set[str] = set()
+        self._granted: Dict[str, asyncio.Event] = {}
+        self._loop_task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    async def enqueue(self, request_id: str, owner: str, priority: Priority) -> None:
+        now = self.clock()
+        self._local.add(request_id)
+        self._granted[request_id] = asyncio.Event()
+        try:
+            await self.store.add(SlotRequest(request_id, owner, Priority(priority), now, now))
+        except RedisError as exc:
+            logger.warning("Cannot schedule %s, running it now: %s", request_id, exc)
+            self._granted[request_id].set()
+        self._ensure_running()
+
+    async def wait(self, request_id: str) -> None:
+        """Returns once the slot is granted. Cancelling it withdraws the request."""
+        granted = self._granted[request_id]
+        try:
+            self._ensure_running()
+            await granted.wait()
+        except asyncio.CancelledError:
+            await self.release(request_id)
+            raise
+
+    async def release(self, request_id: str) -> None:
+        self._local.discard(request_id)
+        self._granted.pop(request_id, None)
+        try:
+            request = await self.store.remove(request_id)
+            if request is not None and request.granted_at is not None:
+                await self.store.record_duration(self.clock() - request.granted_at)
+        except RedisError as exc:
+            logger.warning("Cannot release %s: %s", request_id, exc)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @asynccontextmanager
+    async def slot(self, request_id: str, owner: str, priority: Priority) -> AsyncIterator[None]:
+        await self.enqueue(request_id, owner, priority)
+        await self.wait(request_id)
+        try:
+            yield
+        finally:
+            await self.release(request_id)
+
+    async def schedule(self) -> None:
+        """Admits what fits and wakes up the local requests granted a slot."""
+        state = await self.store.schedule(self.max_in_flight, self.clock(), self.lease_seconds, set(self._local))
+        for request in state.running:
+            granted = self._granted.get(request.id)
+            if granted is not None:
+                granted.set()
+
+    async def statuses(self) -> List[SlotStatus]:
+        state = await self.store.snapshot(self.max_in_flight)
+        average = await self.store.average_duration()
+        return state.statuses(average if average is not None else settings.WORKFLOW_DEFAULT_DURATION_SECONDS)
+
+    async def status(self, request_id: str) -> SlotStatus | None:
+        try:
+            statuses = await self.statuses()
+        except RedisError:
+            return None
+        return next((status for status in statuses if status.id == request_id), None)
+
+    def _ensure_running(self) -> None:
+        if self.poll_seconds is None:
+            return
+        if self._loop_task is None or self._loop_task.done() or self._loop_task.get_loop() is not asyncio.get_running_loop():
+            self._wakeup = asyncio.Event()
+            self._loop_task = asyncio.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while self._local:
+            try:
+                await self.schedule()
+            except RedisError as exc:
+                logger.warning("Scheduling failed, retrying: %s", exc)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except TimeoutError:
+                pass
+
+
+workflow_scheduler = WorkflowScheduler()
@@ -2,3 +2,4 @@ from .user.model import User
 from .submission.model import Submission
 from .dataset.model import Dataset
 from .scores.model import Score
+from .inference.model import InferenceJob
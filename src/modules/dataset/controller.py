@@ -35,34 +35,14 @@ async def get_dataset_details(session: SessionDep, dataset_accessor: str) -> sch
     return dataset_record
 
 
-# TODO: Retrieve best model from submissions
 async def get_all_datasets(session: SessionDep) -> List[schema.DatasetInfoListOut]:
-    result = []
-    datasets = await service.get_all_datasets(session)
-    for dataset in datasets:
-        item = dataset.model_dump()
-        best_submission = await get_best_submission(session, dataset.id)
-        if not best_submission:
-            best_submission_title = None
-            best_submission_accessor = None
-        else:
-            best_submission_title = best_submission.submission_title
-            best_submission_accessor = best_submission.submission_accessor
-        number_of_submissions = await service.count_dataset_submissions(session, dataset.id)
-        result.append(schema.DatasetInfoListOut(**item, best_submission_title=best_submission_title,
-                      best_submission_accessor=best_submission_accessor, number_of_submissions=number_of_submissions))
-    return result
+    datasets = await service.get_datasets_overview(session)
+    return [schema.DatasetInfoListOut(**dataset) for dataset in datasets]
 
 
 async def get_number_of_submissions(session: SessionDep) -> List[schema.NumberSubmissionsOut]:
-    result = []
-    datasets = await service.get_all_datasets(session)
-    for dataset in datasets:
-        number_of_submissions = await service.count_dataset_submissions(session, dataset_id=dataset.id)
-        if number_of_submissions > 0:
-            result.append(schema.NumberSubmissionsOut(
-                dataset_title=dataset.title, number_of_submissions=number_of_submissions))
-    return result
+    counts = await service.count_submissions_by_dataset(session)
+    return [schema.NumberSubmissionsOut(dataset_title=item["title"], number_of_submissions=item["number_of_submissions"]) for item in counts]
 
 
 async def get_best_dataset_submission(session: SessionDep, dataset_id: int) -> schema.BestSubmissionOut:
@@ -73,17 +53,17 @@ async def get_best_dataset_submission(session: SessionDep, dataset_id: int) -> s
 async def get_dataset_submissions_metrics(session: SessionDep, dataset_id: int) -> List[schema.SubmissionMetricsOut]:
     result = []
     dataset_scores = await get_all_scores(session, dataset_id=dataset_id, submission_id=None, status=ScoreStatus.SUCCESS)
-    for score in dataset_scores:
+    submissions = await Submission.load_many(session, [score.submission_id for score in dataset_scores], status=SubmissionStatus.PUBLISHED)
+    for score, submission in zip(dataset_scores, submissions):
         score = score.model_dump()
-        submission_title = await Submission.get_column_value(session, column="title", id=score['submission_id'], status=SubmissionStatus.PUBLISHED)
-        if submission_title:
-            result.append(schema.SubmissionMetricsOut(title=submission_title,
+        if submission:
+            result.append(schema.SubmissionMetricsOut(title=submission.title,
                                                       precision=score['precision'], recall=score['recall'], f1=score['f1'], aoc_roc=score['aoc_roc'], accuracy=score['accuracy'], aoc_pr=score['aoc_pr']))
     return result
 
 
-async def get_dataset_submissions_leaderboard(session: SessionDep, dataset_id: int) -> List[schema.SubmissionLeaderboardOut]:
-    leaderboard = await get_best_submissions(session, limit=None, dataset_id=dataset_id)
+async def get_dataset_submissions_leaderboard(session: SessionDep, dataset_id: int, profile: str | None = None, custom_weights: str | None = None) -> List[schema.SubmissionLeaderboardOut]:
+    leaderboard = await get_best_submissions(session, limit=None, dataset_id=dataset_id, profile=profile, custom_weights=custom_weights)
     return leaderboard
 
 
@@ -107,13 +107,14 @@ async def get_dataset_submissions_metrics(session: SessionDep, dataset_id: int)
     status_code=status.HTTP_200_OK,
     response_model=List[schema.SubmissionLeaderboardOut]
 )
-async def get_dataset_submissions_leaderboard(session: SessionDep, dataset_id: int) -> List[schema.SubmissionLeaderboardOut]:
+async def get_dataset_submissions_leaderboard(session: SessionDep, dataset_id: int, profile: str | None = None, weights: str | None = None) -> List[schema.SubmissionLeaderboardOut]:
     """
     **Retrieve the leaderboard for all submissions for a dataset**
 
-    Queries the database and returns the leaderboard for all submissions for a dataset.
+    Queries the database and returns the leaderboard for all submissions for a dataset. The ranking can use
+    a named weighting `profile` or ad-hoc `weights` given as `metric:weight` pairs separated by commas.
     """
-    return await controller.get_dataset_submissions_leaderboard(session, dataset_id)
+    return await controller.get_dataset_submissions_leaderboard(session, dataset_id, profile, weights)
 
 # -- PATCH ENDPOINTS -- #
 
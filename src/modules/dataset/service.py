@@ -1,7 +1,13 @@
+from typing import Any, Dict, List
+
+from sqlmodel import and_, func, select
+
 from src.core.deps import SessionDep
 from src.modules.dataset import model, schema
-from src.modules.scores.model import Score, ScoreStatus
-from src.modules.submission.model import Submission, SubmissionStatus
+from src.modules.scores.model import Score, weights
+from src.modules.scores.service import (published_scores_query,
+                                        weighted_mean_expression)
+from src.modules.submission.model import Submission
 
 # -- UTILS SERVICES -- #
 
@@ -15,15 +21,27 @@ async def get_dataset_column(session: SessionDep, column: str, **kwargs):
 
 
 async def count_dataset_submissions(session: SessionDep, dataset_id: int) -> int:
-    count = 0
-    score_records = await Score.get_multi(
-        session, dataset_id=dataset_id, status=ScoreStatus.SUCCESS)
-    for score in score_records:
-        submission = await Submission.exists(
-            session, id=score.submission_id, status=SubmissionStatus.PUBLISHED)
-        if submission:
-            count += 1
-    return count
+    query = published_scores_query(select(func.count()), dataset_id=dataset_id)
+    result = await session.exec(query)
+    return result.one()
+
+
+async def count_submissions_by_dataset(session: SessionDep) -> List[Dict[str, Any]]:
+    query = (
+        published_scores_query(
+            select(
+                model.Dataset.id,
+                model.Dataset.title,
+                func.count(Score.submission_id).label("number_of_submissions")
+            ),
+            dataset_id=None
+        )
+        .join(model.Dataset, model.Dataset.id == Score.dataset_id)
+        .group_by(model.Dataset.id)
+        .order_by(model.Dataset.id)
+    )
+    result = await session.exec(query)
+    return [dict(row) for row in result.mappings().all()]
 
 # -- CREATE SERVICES -- #
 
@@ -44,6 +62,44 @@ async def get_all_datasets(session: SessionDep) -> list[schema.DatasetOut]:
     return result
 
 
+async def get_datasets_overview(session: SessionDep) -> List[Dict[str, Any]]:
+    weighted_mean = weighted_mean_expression({
+        field: func.coalesce(getattr(Score, field), 0) for field in weights
+    })
+    ranked_scores = published_scores_query(
+        select(
+            Score.dataset_id,
+            Score.submission_id,
+            func.row_number().over(
+                partition_by=Score.dataset_id,
+                order_by=(weighted_mean.desc(), Score.submission_id)
+            ).label("position"),
+            func.count().over(partition_by=Score.dataset_id).label(
+                "number_of_submissions")
+        ),
+        dataset_id=None
+    ).cte("ranked_scores")
+
+    query = (
+        select(
+            model.Dataset.id,
+            model.Dataset.title,
+            model.Dataset.accessor,
+            model.Dataset.description,
+            Submission.title.label("best_submission_title"),
+            Submission.accessor.label("best_submission_accessor"),
+            func.coalesce(ranked_scores.c.number_of_submissions, 0).label(
+                "number_of_submissions")
+        )
+        .outerjoin(ranked_scores, and_(ranked_scores.c.dataset_id == model.Dataset.id,
+                                       ranked_scores.c.position == 1))
+        .outerjoin(Submission, Submission.id == ranked_scores.c.submission_id)
+        .order_by(model.Dataset.id)
+    )
+    result = await session.exec(query)
+    return [dict(row) for row in result.mappings().all()]
+
+
 # -- UPDATE SERVICES -- #
 
 
@@ -0,0 +1,10 @@
+from typing import List
+
+from src.core.database import query_stats
+from src.modules.debug import schema
+
+# -- GET METHODS -- #
+
+
+def get_query_stats(limit: int | None) -> List[schema.QueryStatsOut]:
+    return [schema.QueryStatsOut(**entry) for entry in query_stats.get_history(limit)]
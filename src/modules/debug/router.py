@@ -0,0 +1,29 @@
+# pylint: disable=W0613
+
+from typing import List
+
+from fastapi import APIRouter, Query, status
+
+from src.core.deps import AdminDep
+from src.modules.debug import controller, schema
+
+router = APIRouter(tags=["Debug"])
+
+
+# -- GET ENDPOINTS -- #
+
+
+@router.get(
+    '/queries',
+    status_code=status.HTTP_200_OK,
+    response_model=List[schema.QueryStatsOut]
+)
+def get_query_stats(user: AdminDep, limit: int | None = Query(None, ge=1)) -> List[schema.QueryStatsOut]:
+    """
+    **Get recent SQL query statistics**
+
+    _Requires ADMIN role_
+
+    Returns the statement count, total database time and repeated statement shapes of the most recent requests, oldest first.
+    """
+    return controller.get_query_stats(limit)
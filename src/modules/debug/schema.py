@@ -0,0 +1,12 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+# -- GET SCHEMAS -- #
+
+
+class QueryStatsOut(BaseModel):
+    label: str | None
+    count: int
+    duration_ms: float
+    repeated: Dict[str, int]
@@ -1,44 +1,45 @@
-from fastapi import HTTPException
+import asyncio
+from typing import List
+
+from fastapi import HTTPException, status
 from pydantic import ValidationError
-from redis import Redis
-from rq import Queue
+from redis.exceptions import RedisError
 
-from src.core.config import settings
 from src.core.deps import SessionDep
+from src.core.job_queue import evaluation_queue
+from src.core.workflow_scheduler import Priority, workflow_scheduler
 from src.modules.dataset.model import Dataset
 from src.modules.evaluation import schema, service
-from src.modules.scores.controller import (
-    check_score, create_score, delete_score,
-    get_score_details_by_dataset_and_submission)
+from src.modules.scores.controller import (check_score, create_score,
+                                          delete_score, replace_scores)
 from src.modules.scores.model import Score
 from src.modules.scores.schema import ScoreCreate
-from src.modules.submission.model import Submission
-
-redis_conn = Redis(host=settings.REDIS_HOST,
-                   port=settings.REDIS_PORT, password=settings.REDIS_PASSWORD)
+from src.modules.submission.model import Submission, SubmissionStatus
 
 # -- POST METHODS -- #
 
 
-async def submit_evaluation(session: SessionDep, evaluation_in: schema.EvaluationCreate) -> None:
+async def submit_evaluation(session: SessionDep, evaluation_in: schema.EvaluationCreate) -> schema.EvaluationOut:
     try:
         submission_id = await Submission.get_column_value(session, 'id', accessor=evaluation_in.submission_accessor)
         dataset_id = await Dataset.get_column_value(session, 'id', accessor=evaluation_in.dataset_accessor)
+        model_revision, dataset_checksum = await asyncio.to_thread(
+            service.get_fingerprints, evaluation_in.dataset_accessor, evaluation_in.submission_accessor)
 
-        score_check = await check_score(session, submission_id=submission_id, dataset_id=dataset_id)
-        if not score_check:
-            await create_score(session, ScoreCreate(submission_id=submission_id, dataset_id=dataset_id))
-        else:
-            score = await get_score_details_by_dataset_and_submission(session, dataset_id, submission_id)
+        score = await Score.get(session, submission_id=submission_id, dataset_id=dataset_id)
+        if score and not evaluation_in.force and service.is_reusable(score, model_revision, dataset_checksum):
+            return schema.EvaluationOut(score_id=score.id, reused=True)
+        if score:
             await delete_score(session, score_id=score.id)
-            await create_score(session, ScoreCreate(submission_id=submission_id, dataset_id=dataset_id))
+        await create_score(session, ScoreCreate(submission_id=submission_id, dataset_id=dataset_id,
+                                                model_revision=model_revision, dataset_checksum=dataset_checksum))
         score_id = await Score.get_column_value(
             session, 'id', submission_id=submission_id, dataset_id=dataset_id)
 
-        queue = Queue(connection=redis_conn)
-        job = queue.enqueue(service.submit_evaluation, evaluation_in.dataset_accessor,
-                            evaluation_in.submission_accessor, score_id)
-        return None
+        await evaluation_queue.enqueue(service.submit_evaluation, evaluation_in.dataset_accessor,
+                                       evaluation_in.submission_accessor, score_id,
+                                       on_failure=service.discard_evaluation)
+        return schema.EvaluationOut(score_id=score_id, reused=False)
     except ValidationError as e:
         error_code = 400
         error_detail = e.errors()
@@ -50,3 +51,65 @@ async def submit_evaluation(session: SessionDep, evaluation_in: schema.Evaluatio
         error_code = 500
         error_detail = e
         raise HTTPException(status_code=error_code, detail=error_detail) from e
+
+
+async def submit_evaluation_matrix(session: SessionDep, matrix_in: schema.EvaluationMatrixCreate) -> schema.EvaluationMatrixOut:
+    if matrix_in.dataset_accessor is not None:
+        dataset = await Dataset.get(session, accessor=matrix_in.dataset_accessor)
+        if not dataset:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Dataset not found')
+        datasets = [dataset]
+        submissions = await Submission.get_multi(session, status=SubmissionStatus.PUBLISHED)
+    else:
+        submission = await Submission.get(session, accessor=matrix_in.submission_accessor)
+        if not submission:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Submission not found')
+        submissions = [submission]
+        datasets = await Dataset.get_multi(session)
+
+    revisions, checksums = await asyncio.to_thread(
+        service.get_matrix_fingerprints, [dataset.accessor for dataset in datasets],
+        [submission.accessor for submission in submissions])
+    existing = {
+        (score.dataset_id, score.submission_id): score
+        for score in await Score.get_multi(session, Score.dataset_id.in_([dataset.id for dataset in datasets]),
+                                           Score.submission_id.in_([submission.id for submission in submissions]))
+    }
+
+    reused, planned = [], []
+    for dataset in datasets:
+        for submission in submissions:
+            score = existing.get((dataset.id, submission.id))
+            model_revision, dataset_checksum = revisions[submission.accessor], checksums[dataset.accessor]
+            if score and not matrix_in.force and service.is_reusable(score, model_revision, dataset_checksum):
+                reused.append(score.id)
+                continue
+            planned.append(ScoreCreate(dataset_id=dataset.id, submission_id=submission.id,
+                                       model_revision=model_revision, dataset_checksum=dataset_checksum))
+
+    scores = await replace_scores(session, planned)
+    dataset_accessors = {dataset.id: dataset.accessor for dataset in datasets}
+    submission_accessors = {submission.id: submission.accessor for submission in submissions}
+    try:
+        await evaluation_queue.enqueue_many(service.submit_evaluation, [
+            [dataset_accessors[score.dataset_id], submission_accessors[score.submission_id], score.id, Priority.BACKFILL]
+            for score in scores
+        ], on_failure=service.discard_evaluation)
+    except Exception as e:
+        await Score.delete_multi(session, Score.id.in_([score.id for score in scores]))
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=f"Error scheduling evaluations: {e}") from e
+
+    return schema.EvaluationMatrixOut(scheduled=[score.id for score in scores], reused=reused)
+
+
+# -- GET METHODS -- #
+
+
+async def get_workflow_queue() -> List[schema.SlotStatusOut]:
+    try:
+        statuses = await workflow_scheduler.statuses()
+    except RedisError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail='Workflow queue unavailable') from exc
+    return [schema.SlotStatusOut(**slot._asdict()) for slot in statuses]
@@ -0,0 +1,90 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+
+def align_predictions(pred: np.ndarray, gt: np.ndarray) -> np.ndarray:
+    """Truncates the predictions to the length of the ground truth, or pads
+    them with negatives, without copying when the lengths already match."""
+    pred = np.asarray(pred).reshape(-1)
+    if pred.size >= gt.size:
+        return pred[:gt.size]
+    return np.concatenate([pred, np.zeros(gt.size - pred.size, dtype=pred.dtype)])
+
+
+def confusion_counts(gt: np.ndarray, pred: np.ndarray) -> Tuple[int, int, int, int]:
+    """(tn, fp, fn, tp) of binary ground truth and predictions."""
+    truth = gt == 1
+    predicted = pred == 1
+    positives = np.count_nonzero(truth)
+    predicted_positives = np.count_nonzero(predicted)
+    if positives + np.count_nonzero(gt == 0) != gt.size:
+        raise ValueError("Ground truth must only contain 0 and 1")
+    if predicted_positives + np.count_nonzero(pred == 0) != pred.size:
+        raise ValueError("Predictions must only contain 0 and 1")
+
+    tp = np.count_nonzero(np.logical_and(truth, predicted, out=truth))
+    fp = predicted_positives - tp
+    fn = positives - tp
+    return gt.size - tp - fp - fn, fp, fn, tp
+
+
+def _curve(tn: int, fp: int, fn: int, tp: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Cumulative false and true positives at every distinct score, highest
+    # first, like sklearn's `_binary_clf_curve`. With binary scores these are
+    # read off the confusion matrix instead of sorting the predictions.
+    fps, tps = [], []
+    if fp + tp:
+        fps.append(fp)
+        tps.append(tp)
+    if tn + fn:
+        fps.append(fp + tn)
+        tps.append(tp + fn)
+    return np.array(fps, dtype=np.float64), np.array(tps, dtype=np.float64)
+
+
+def _divide(numerator: int, denominator: int) -> float:
+    # sklearn's zero_division="warn" default scores an undefined ratio as 0
+    return numerator / denominator if denominator else 0.0
+
+
+def roc_auc(fps: np.ndarray, tps: np.ndarray) -> float:
+    if not fps.size or fps[-1] == 0 or tps[-1] == 0:
+        raise ValueError("Only one class present in the ground truth, ROC AUC is not defined")
+    fpr = np.r_[0, fps] / fps[-1]
+    tpr = np.r_[0, tps] / tps[-1]
+    return float(_trapezoid(tpr, fpr))
+
+
+def average_precision(fps: np.ndarray, tps: np.ndarray) -> float:
+    precision = np.zeros_like(tps)
+    np.divide(tps, tps + fps, out=precision, where=tps + fps != 0)
+    recall = tps / tps[-1] if tps[-1] else np.ones_like(tps)
+    precision = np.hstack((precision[::-1], 1))
+    recall = np.hstack((recall[::-1], 0))
+    return float(-np.sum(np.diff(recall) * precision[:-1]))
+
+
+def binary_metrics(gt: np.ndarray, pred: np.ndarray) -> Dict[str, float]:
+    """Scores binary predictions against the ground truth.
+
+    Computes the same values as sklearn's precision, accuracy, F1, recall,
+    ROC AUC and average precision scores, from a single confusion matrix.
+    Memory-mapped arrays are read in place. Raises ValueError on non binary
+    input, or when the ground truth has a single class.
+    """
+    gt = np.asarray(gt).reshape(-1)
+    pred = align_predictions(pred, gt)
+    tn, fp, fn, tp = confusion_counts(gt, pred)
+    fps, tps = _curve(tn, fp, fn, tp)
+
+    return {
+        "precision": _divide(tp, tp + fp),
+        "accuracy": _divide(tp + tn, gt.size),
+        "f1": _divide(2 * tp, 2 * tp + fp + fn),
+        "recall": _divide(tp, tp + fn),
+        "aoc_roc": roc_auc(fps, tps),
+        "aoc_pr": average_precision(fps, tps),
+    }
@@ -1,3 +1,5 @@
+from typing import List
+
 from fastapi import APIRouter, status
 
 from src.core.deps import AdminDep, SessionDep
@@ -12,14 +14,54 @@ router = APIRouter(tags=['Evaluation'])
 @router.post(
     '',
     status_code=status.HTTP_200_OK,
-    response_model=None
+    response_model=schema.EvaluationOut
 )
-async def submit_evaluation(session: SessionDep, user: AdminDep, evaluation_in: schema.EvaluationCreate):
+async def submit_evaluation(session: SessionDep, user: AdminDep, evaluation_in: schema.EvaluationCreate) -> schema.EvaluationOut:
     """
     **Submit an Evaluation**
 
     _Requires USER role_
 
     Accepts an evaluation to be submitted.
+    The previous successful score is kept instead when neither the submission repository revision nor the dataset changed since, unless `force` is set.
+    """
+    return await controller.submit_evaluation(session, evaluation_in)
+
+
+@router.post(
+    '/matrix',
+    status_code=status.HTTP_200_OK,
+    response_model=schema.EvaluationMatrixOut
+)
+async def submit_evaluation_matrix(session: SessionDep, user: AdminDep, matrix_in: schema.EvaluationMatrixCreate) -> schema.EvaluationMatrixOut:
+    """
+    **Submit an Evaluation Matrix**
+
+    _Requires ADMIN role_
+
+    Evaluates one dataset against every published Submission, or one Submission against every dataset, in a single request.
+    Pairs whose repository revision and dataset did not change keep their score, unless `force` is set.
+    The scheduled evaluations run as the worker capacity (WORKER_GLOBAL_CONCURRENCY) allows.
+    """
+    return await controller.submit_evaluation_matrix(session, matrix_in)
+
+
+# -- GET ENDPOINTS -- #
+
+
+@router.get(
+    '/queue',
+    status_code=status.HTTP_200_OK,
+    response_model=List[schema.SlotStatusOut]
+)
+async def get_workflow_queue(user: AdminDep) -> List[schema.SlotStatusOut]:
+    """
+    **Get the Workflow Queue**
+
+    _Requires ADMIN role_
+
+    Lists the running workflows, then the waiting ones in the order they will start, with their estimated wait.
+    Interactive inference goes before evaluations, and evaluations before matrix backfills; within a priority, owners take turns.
+    At most WORKFLOW_MAX_IN_FLIGHT workflows run at once.
     """
-    await controller.submit_evaluation(session, evaluation_in)
+    return await controller.get_workflow_queue()
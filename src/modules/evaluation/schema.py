@@ -1,6 +1,47 @@
-from pydantic import BaseModel
+from typing import List
+
+from pydantic import BaseModel, model_validator
+
+from src.core.workflow_scheduler import Priority
 
 
 class EvaluationCreate(BaseModel):
     dataset_accessor: str
     submission_accessor: str
+    # Reruns the evaluation even when nothing changed since the last one
+    force: bool = False
+
+
+class EvaluationOut(BaseModel):
+    score_id: int
+    # True when the score of an earlier run of the same revision and dataset was kept
+    reused: bool
+
+
+class EvaluationMatrixCreate(BaseModel):
+    """Either one dataset against every published submission, or one
+    submission against every dataset."""
+    dataset_accessor: str | None = None
+    submission_accessor: str | None = None
+    force: bool = False
+
+    @model_validator(mode="after")
+    def check_one_axis(self) -> "EvaluationMatrixCreate":
+        if (self.dataset_accessor is None) == (self.submission_accessor is None):
+            raise ValueError("Exactly one of dataset_accessor and submission_accessor is required")
+        return self
+
+
+class EvaluationMatrixOut(BaseModel):
+    scheduled: List[int]
+    reused: List[int]
+
+
+class SlotStatusOut(BaseModel):
+    id: str
+    owner: str
+    priority: Priority
+    running: bool
+    # Both None while running
+    position: int | None
+    estimated_wait_seconds: float | None
@@ -1,73 +1,97 @@
 import asyncio
 import os
 import shutil
+from contextlib import aclosing
 from pathlib import Path
+from typing import Dict, List, Tuple
 from uuid import uuid4
 
 import numpy as np
 from fastapi import HTTPException, status
-from kubernetes import client, config, watch
-from sklearn.metrics import (accuracy_score, average_precision_score, f1_score,
-                             precision_score, recall_score, roc_auc_score)
 
 from src.core.config import settings
 from src.core.database.session import SessionLocal
-from src.core.deps import SessionDep
+from src.core.execution_backend import (ExecutionError, WorkflowRun,
+                                        execution_backend)
+from src.core.utils.fingerprint import directory_checksum, repository_revision
+from src.core.utils.staging import stage_tree
+from src.core.worker import PermanentJobError, deferred_timeout, start_timeout
+from src.core.workflow_scheduler import Priority, workflow_scheduler
+from src.modules.evaluation.metrics import binary_metrics
 from src.modules.scores import controller as score_controller
 from src.modules.scores.model import Score
 from src.modules.scores.schema import ScoreStatus, ScoreUpdate
 from src.modules.submission.model import Submission
 
-try:
-    config.load_incluster_config()
-except Exception:
-    config.load_kube_config()
-
-v1 = client.CoreV1Api()
-batch_v1 = client.BatchV1Api()
+# Files every run writes, staged as private copies of the dataset ones
+RUN_FILES = ("rgb.list", "audio.list", "results.npy")
 
 
 # -- UTILITY METHODS -- #
 
 
-def fetch_pod_logs(pod_name, namespace='argo'):
+async def fetch_pod_logs(pod_name):
     try:
-        logs = v1.read_namespaced_pod_log(
-            name=pod_name, namespace=namespace, container='main')
+        logs = await execution_backend.read_logs(pod_name, container='main')
         return logs
-    except client.exceptions.ApiException as e:
+    except ExecutionError as e:
         return f"Error fetching logs for pod {pod_name}: {e}\n\n"
 
 
+async def save_score(score_id: int, score_in: ScoreUpdate) -> None:
+    # A session per write: evaluations run for hours and must not keep a
+    # pooled connection checked out while waiting on the workflow
+    async with SessionLocal() as session:
+        await score_controller.update_score(session, score_id=score_id, score_in=score_in)
+
+
+async def discard_score(score_id: int) -> None:
+    async with SessionLocal() as session:
+        score_check = await score_controller.check_score(session, id=score_id)
+        if score_check:
+            await Score.delete(session, id=score_id)
+
+
+def model_revision(submission_accessor: str) -> str | None:
+    return repository_revision(os.path.join(settings.INFER_DIR, submission_accessor))
+
+
+def dataset_checksum(dataset_accessor: str) -> str | None:
+    return directory_checksum(os.path.join(settings.DATASETS_DIR, dataset_accessor))
+
+
+def get_fingerprints(dataset_accessor: str, submission_accessor: str) -> Tuple[str | None, str | None]:
+    """Revision of the cloned submission repository and checksum of the
+    dataset directory, None for what cannot be fingerprinted."""
+    return model_revision(submission_accessor), dataset_checksum(dataset_accessor)
+
+
+def get_matrix_fingerprints(dataset_accessors: List[str], submission_accessors: List[str]) -> Tuple[Dict[str, str | None], Dict[str, str | None]]:
+    """Fingerprints of every submission and dataset, each computed once."""
+    return ({accessor: model_revision(accessor) for accessor in submission_accessors},
+            {accessor: dataset_checksum(accessor) for accessor in dataset_accessors})
+
+
+def is_reusable(score: Score, model_revision: str | None, dataset_checksum: str | None) -> bool:
+    return (score.status == ScoreStatus.SUCCESS
+            and model_revision is not None and dataset_checksum is not None
+            and score.model_revision == model_revision and score.dataset_checksum == dataset_checksum)
+
+
 # -- REMOVAL METHODS -- #
 
 
-def terminate_workflow(workflow_name: str):
-    custom_api = client.CustomObjectsApi()
+async def terminate_workflow(workflow_name: str):
     try:
-        custom_api.patch_namespaced_custom_object(
-            group="argoproj.io",
-            version="v1alpha1",
-            namespace="argo",
-            plural="workflows",
-            name=workflow_name,
-            body={"spec": {"shutdown": "Terminate"}}
-        )
-    except client.exceptions.ApiException as e:
+        await execution_backend.terminate(workflow_name)
+    except ExecutionError as e:
         pass
 
 
-def delete_workflow(workflow_name: str):
-    custom_api = client.CustomObjectsApi()
+async def delete_workflow(workflow_name: str):
     try:
-        custom_api.delete_namespaced_custom_object(
-            group="argoproj.io",
-            version="v1alpha1",
-            namespace="argo",
-            plural="workflows",
-            name=workflow_name
-        )
-    except client.exceptions.ApiException as e:
+        await execution_backend.delete(workflow_name)
+    except ExecutionError as e:
         pass
 
 
@@ -85,84 +109,60 @@ def remove_tmp_data(workflow_name: str):
 
 
 async def create_and_submit_evaluation(workflow_name: str, feature_type: str, data_path: str, model: str, model_path: str):
-    workflow_manifest = {
-        "apiVersion": "argoproj.io/v1alpha1",
-        "kind": "Workflow",
-        "metadata": {
-            "name": workflow_name,
-            "namespace": "argo"
-        },
-        "spec": {
-            "workflowTemplateRef": {
-                "name": "evaluation-workflow"
-            },
-            "arguments": {
-                "parameters": [
-                    {"name": "featureType", "value": feature_type},
-                    {"name": "dataPath", "value": data_path},
-                    {"name": "model", "value": model},
-                    {"name": "modelPath", "value": model_path}
-                ]
-            }
-        }
-    }
-
-    custom_api = client.CustomObjectsApi()
+    run = WorkflowRun(name=workflow_name, template="evaluation-workflow", parameters={
+        "featureType": feature_type,
+        "dataPath": data_path,
+        "model": model,
+        "modelPath": model_path
+    })
+
     try:
-        custom_api.create_namespaced_custom_object(
-            group="argoproj.io",
-            version="v1alpha1",
-            namespace="argo",
-            plural="workflows",
-            body=workflow_manifest
-        )
-    except client.exceptions.ApiException as e:
+        await execution_backend.submit(run)
+    except ExecutionError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=f"Error submitting workflow: {e}") from e
 
 
-async def submit_evaluation(dataset_accessor: str, submission_accessor: str, score_id: int) -> None:
+@deferred_timeout
+async def submit_evaluation(dataset_accessor: str, submission_accessor: str, score_id: int, priority: Priority = Priority.EVALUATION) -> None:
     async with SessionLocal() as session:
-        workflow_name = str(uuid4())
-        data_path = Path(settings.TMP_DIR) / workflow_name
-        data_path.mkdir(parents=True, exist_ok=True)
-
-        dataset_path = Path(settings.DATASETS_DIR) / dataset_accessor
-
-        feature_type = await Submission.get_column_value(session, "modality", accessor=submission_accessor)
-
-        for item in os.listdir(dataset_path):
-            src_path = os.path.join(dataset_path, item)
-            dst_path = os.path.join(data_path, item)
-
-            if os.path.isdir(src_path):
-                if not os.path.exists(dst_path):
-                    shutil.copytree(src_path, dst_path)
-                else:
-                    for sub_item in os.listdir(src_path):
-                        shutil.copy(os.path.join(src_path, sub_item),
-                                    os.path.join(dst_path, sub_item))
-            else:
-                shutil.copy(src_path, dst_path)
-
-        match feature_type:
-            case "rgb_only":
-                _rgb_list = (data_path / "rgb.list").touch()
-            case "rgb_and_audio":
-                _rgb_list = (data_path / "rgb.list").touch()
-                _audio_list = (data_path / "audio.list").touch()
-            case _:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                    detail='Invalid model hello')
+        submission = await Submission.get(session, accessor=submission_accessor)
+    # Retrying does not bring these back, the worker fails the job right away
+    if submission is None:
+        raise PermanentJobError(f"Submission {submission_accessor} not found")
+    feature_type = submission.modality
+    if feature_type not in ("rgb_only", "rgb_and_audio"):
+        raise PermanentJobError(f"Invalid modality {feature_type}")
+    dataset_path = Path(settings.DATASETS_DIR) / dataset_accessor
+    if not dataset_path.is_dir():
+        raise PermanentJobError(f"Dataset {dataset_accessor} not found")
+
+    workflow_name = str(uuid4())
+    data_path = Path(settings.TMP_DIR) / workflow_name
+    data_path.mkdir(parents=True, exist_ok=True)
 
-        try:
-            # await create_and_submit_evaluation(
-            #     workflow_name=workflow_name,
-            #     feature_type=feature_type,
-            #     data_path=str(f"/tmp_inference/{workflow_name}"),
-            #     model=submission_accessor,
-            #     model_path=str("/infer_models")  # TODO production paths
-            # )
+    # Linked, not copied: staging costs the same whatever the dataset size
+    await asyncio.to_thread(stage_tree, dataset_path, data_path, private=RUN_FILES)
+
+    match feature_type:
+        case "rgb_only":
+            _rgb_list = (data_path / "rgb.list").touch()
+        case "rgb_and_audio":
+            _rgb_list = (data_path / "rgb.list").touch()
+            _audio_list = (data_path / "audio.list").touch()
+
+    try:
+        # await create_and_submit_evaluation(
+        #     workflow_name=workflow_name,
+        #     feature_type=feature_type,
+        #     data_path=str(f"/tmp_inference/{workflow_name}"),
+        #     model=submission_accessor,
+        #     model_path=str("/infer_models")  # TODO production paths
+        # )
+        # Evaluations share the fair share of the submission owner
+        async with workflow_scheduler.slot(workflow_name, f"user:{submission.user_id}", priority):
+            # The wait for the slot does not count against the job timeout
+            start_timeout()
             await create_and_submit_evaluation(
                 workflow_name=workflow_name,
                 feature_type=feature_type,
@@ -170,103 +170,67 @@ async def submit_evaluation(dataset_accessor: str, submission_accessor: str, sco
                 model=submission_accessor,
                 model_path=f"{settings.INFER_DIR}"
             )
-            await watch_workflow_status(session, score_id, workflow_name)
-        except Exception as exc:
-            score_check = await score_controller.check_score(session, id=score_id)
-            if score_check:
-                await Score.delete(session, id=score_id)
-            terminate_workflow(workflow_name)
-            remove_tmp_data(workflow_name)
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                detail=f"Error submitting evaluation: {exc}") from exc
+            await watch_workflow_status(score_id, workflow_name)
+    except asyncio.CancelledError:
+        # Timed out or drained by the worker, the workflow must not outlive the job
+        await terminate_workflow(workflow_name)
+        remove_tmp_data(workflow_name)
+        raise
+    except Exception as exc:
+        await terminate_workflow(workflow_name)
+        remove_tmp_data(workflow_name)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Error submitting evaluation: {exc}") from exc
 
 
-# -- WATCHER METHODS -- #
+async def discard_evaluation(dataset_accessor: str, submission_accessor: str, score_id: int, priority: Priority = Priority.EVALUATION) -> None:
+    """Failure handler of evaluation jobs, once the worker gave up retrying."""
+    await discard_score(score_id)
 
 
-async def watch_workflow_status(session: SessionDep, score_id: int, workflow_name: str):
-    custom_api = client.CustomObjectsApi()
-    watcher = watch.Watch()
+# -- WATCHER METHODS -- #
 
-    workflow_completed = False
 
+async def watch_workflow_status(score_id: int, workflow_name: str):
     try:
-        while not workflow_completed:
-            try:
-                workflow = custom_api.get_namespaced_custom_object(
-                    group="argoproj.io",
-                    version="v1alpha1",
-                    namespace="argo",
-                    plural="workflows",
-                    name=workflow_name
-                )
-                workflow_status = workflow.get('status')
-
-                if workflow_status:
-                    workflow_phase = workflow_status.get('phase', 'Unknown')
-                else:
-                    workflow_phase = 'Unknown'
-
-                for event in watcher.stream(v1.list_namespaced_pod, namespace="argo", label_selector=f"workflows.argoproj.io/workflow={workflow_name}", timeout_seconds=30):
-                    obj = event['object']
-                    pod_name = obj.metadata.name
-                    pod_status = obj.status.phase
-
-                    if pod_status in ['Failed', 'Error']:
-                        logs = fetch_pod_logs(pod_name)
-                        await score_controller.update_score(session, score_id=score_id, score_in=ScoreUpdate(status=ScoreStatus.ERROR, status_message=f"Pod {pod_name} failed: {logs}"))
-                        workflow_completed = True
-                        break
-
-                if workflow_phase == 'Succeeded':
-                    await get_workflow_result(session, workflow_name, score_id)
-                    workflow_completed = True
+        async with aclosing(execution_backend.subscribe(workflow_name)) as events:
+            async for event in events:
+                if event.kind == "pod" and event.phase in ['Failed', 'Error']:
+                    logs = await fetch_pod_logs(event.name)
+                    await save_score(score_id, ScoreUpdate(status=ScoreStatus.ERROR, status_message=f"Pod {event.name} failed: {logs}"))
                     break
 
-                await asyncio.sleep(5)
+                if event.kind == "workflow" and event.phase == 'Succeeded':
+                    await get_workflow_result(workflow_name, score_id)
+                    break
 
-            except client.exceptions.ApiException as e:
-                await score_controller.update_score(session, score_id=score_id, score_in=ScoreUpdate(status=ScoreStatus.ERROR, status_message=f"Error while fetching workflow: {e}"))
-                break
-            except Exception as e:
-                await score_controller.update_score(session, score_id=score_id, score_in=ScoreUpdate(status=ScoreStatus.ERROR, status_message=f"Unexpected error: {e}"))
-                break
-    finally:
-        watcher.stop()
+                if event.kind == "workflow" and event.phase in ['Failed', 'Error', 'Deleted']:
+                    await save_score(score_id, ScoreUpdate(status=ScoreStatus.ERROR, status_message=f"Workflow {workflow_name} status: {event.phase}"))
+                    break
 
+    except ExecutionError as e:
+        await save_score(score_id, ScoreUpdate(status=ScoreStatus.ERROR, status_message=f"Error while fetching workflow: {e}"))
+    except Exception as e:
+        await save_score(score_id, ScoreUpdate(status=ScoreStatus.ERROR, status_message=f"Unexpected error: {e}"))
 
-async def get_workflow_result(session: SessionDep, workflow_name: str, score_id: int):
+
+async def get_workflow_result(workflow_name: str, score_id: int):
     data_path = Path(settings.TMP_DIR) / workflow_name
     if not data_path.exists():
-        await score_controller.update_score(session, score_id=score_id, score_in=ScoreUpdate(status=ScoreStatus.ERROR, status_message=f"Workflow {workflow_name} data_path not found"))
+        await save_score(score_id, ScoreUpdate(status=ScoreStatus.ERROR, status_message=f"Workflow {workflow_name} data_path not found"))
     else:
 
         try:
-            result_path = data_path / "results.npy"
-            pred = list(np.load(result_path))
-
-            gt_path = data_path / "gt.npy"
-            gt = list(np.load(gt_path))
-
-            if len(pred) > len(gt):
-                pred = pred[:len(gt)]
-            elif len(pred) < len(gt):
-                padding_size = len(gt) - len(pred)
-                pred = np.pad(pred, (0, padding_size),
-                              'constant', constant_values=0)
-
-            precision = precision_score(gt, pred)
-            accuracy = accuracy_score(gt, pred)
-            f1 = f1_score(gt, pred)
-            recall = recall_score(gt, pred)
-            auc_roc = roc_auc_score(gt, pred)
-            auc_pr = average_precision_score(gt, pred)
+            # Memory-mapped, so scoring reads the arrays in place
+            pred = np.load(execution_backend.result_path(workflow_name), mmap_mode="r")
+            gt = np.load(data_path / "gt.npy", mmap_mode="r")
+            metrics = binary_metrics(gt, pred)
 
-            await score_controller.update_score(session, score_id=score_id, score_in=ScoreUpdate(status=ScoreStatus.SUCCESS, status_message=None, precision=precision, accuracy=accuracy, f1=f1, recall=recall, aoc_roc=auc_roc, aoc_pr=auc_pr))
+            await save_score(score_id, ScoreUpdate(status=ScoreStatus.SUCCESS, status_message=None, **metrics))
 
         except Exception as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                                 detail=f"Error getting workflow result: {exc}") from exc
         finally:
             remove_tmp_data(workflow_name)
-            delete_workflow(workflow_name)
+            await delete_workflow(workflow_name)
@@ -1,39 +1,44 @@
-from fastapi import HTTPException, UploadFile
+from typing import List, Tuple
+
+from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse, StreamingResponse
 
-from src.core.deps import SessionDep
-from src.modules.inference import service
+from src.core.deps import SessionDep, UserDep
+from src.modules.inference import schema, service
 
 # -- POST METHODS -- #
 
 
-async def submit_inference(session: SessionDep, file: UploadFile, model: str) -> JSONResponse:
-    try:
-        result = await service.submit_inference(session, file, model)
-        return JSONResponse(content={"workflow_name": result})
-    except HTTPException as e:
-        error_code = e.status_code
-        error_detail = e.detail
-        return HTTPException(status_code=error_code, detail=error_detail)
+async def submit_inference(session: SessionDep, user: UserDep, request: Request) -> JSONResponse:
+    result = await service.submit_inference(session, user, request)
+    return JSONResponse(content=result)
 
 
-def terminate_and_delete_workflow(workflow_name: str) -> None:
-    service.terminate_workflow(workflow_name)
-    service.delete_workflow(workflow_name)
-    service.remove_tmp_data(workflow_name)
+async def terminate_and_delete_workflow(session: SessionDep, user: UserDep, workflow_name: str) -> None:
+    await service.terminate_job(session, user, workflow_name)
 
 # -- GET METHODS -- #
 
 
+async def get_cached_result(session: SessionDep, video_sha256: str, model: str):
+    result = await service.get_cached_result(session, video_sha256, model)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail='No cached result for this video and model')
+    return result
+
+
 def get_workflow_events(workflow_name: str):
     return StreamingResponse(service.stream_workflow_events(workflow_name), media_type="text/event-stream")
 
 
-def get_workflow_result(workflow_name: str):
-    try:
-        result = service.get_workflow_result(workflow_name)
-        return result
-    except HTTPException as e:
-        error_code = e.status_code
-        error_detail = e.detail
-        return HTTPException(status_code=error_code, detail=error_detail)
+async def get_workflow_result(session: SessionDep, user: UserDep, workflow_name: str):
+    return await service.get_workflow_result(session, user, workflow_name)
+
+
+async def get_user_jobs(session: SessionDep, user: UserDep, job_status: schema.InferenceJobStatus | None, cursor: str | None, limit: int) -> Tuple[List[schema.InferenceJobOut], str | None]:
+    return await service.get_user_jobs(session, user, job_status, cursor, limit)
+
+
+async def get_job(session: SessionDep, user: UserDep, job_id: int) -> schema.InferenceJobOut:
+    return await service.get_job(session, user, job_id)
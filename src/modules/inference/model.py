@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from enum import StrEnum, auto
+from typing import Any, Dict, Optional
+
+from sqlalchemy import JSON, Column, DateTime, Index
+from sqlmodel import Field
+
+from src.core.database.base_crud import Base
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class InferenceJobStatus(StrEnum):
+    # Waiting for a workflow slot, see `src.core.workflow_scheduler`
+    QUEUED = auto()
+    RUNNING = auto()
+    SUCCEEDED = auto()
+    FAILED = auto()
+
+
+class InferenceJob(Base, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # None when the result was served from the inference cache
+    workflow_name: str | None = Field(default=None, unique=True)
+    user_id: int = Field(default=None, foreign_key="user.id", ondelete="CASCADE")
+    model: str
+    video_filename: str
+    video_sha256: str
+    # Workflows the video was split into, see `segments.plan_segments`
+    segments: int = Field(default=1)
+
+    # API process running the job and its last refresh, see `service.recover_jobs`
+    runner_id: str | None = Field(default=None)
+    heartbeat_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+
+    status: InferenceJobStatus = Field(default=InferenceJobStatus.QUEUED)
+    status_message: str | None = Field(default=None)
+    result: Dict[str, Any] | None = Field(default=None, sa_column=Column(JSON))
+
+    created_at: datetime = Field(default_factory=utc_now, sa_column=Column(DateTime(timezone=True), nullable=False))
+    completed_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+
+    __table_args__ = (
+        # Listing the jobs of a user, optionally by status, page by page
+        Index("ix_inferencejob_user_status", "user_id", "status", "id"),
+        Index("ix_inferencejob_status", "status"),
+    )
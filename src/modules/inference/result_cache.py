@@ -0,0 +1,123 @@
+import json
+import os
+import time
+from typing import Any, Dict
+
+import redis
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.utils.fingerprint import repository_revision
+
+redis_client = redis.Redis(host=settings.REDIS_HOST,
+                           port=settings.REDIS_PORT, password=settings.REDIS_PASSWORD, db=2)
+
+KEY_PREFIX = "inference"
+# Every cached key, scored by its last use, for LRU eviction
+RECENT_KEY = f"{KEY_PREFIX}:recent"
+
+
+# -- UTILS METHODS -- #
+
+
+def result_key(video_sha256: str, model: str, revision: str) -> str:
+    return f"{KEY_PREFIX}:result:{model}:{revision}:{video_sha256}"
+
+
+def model_key(model: str) -> str:
+    return f"{KEY_PREFIX}:model:{model}"
+
+
+def workflow_key(workflow_name: str) -> str:
+    return f"{KEY_PREFIX}:workflow:{workflow_name}"
+
+
+def model_revision(model: str) -> str | None:
+    """Commit of the cloned model repository, None when it is not cloned."""
+    return repository_revision(os.path.join(settings.INFER_DIR, model))
+
+
+def cache_key(video_sha256: str, model: str) -> str | None:
+    revision = model_revision(model)
+    if revision is None:
+        return None
+    return result_key(video_sha256, model, revision)
+
+
+# -- READ METHODS -- #
+
+
+def get_result(key: str | None) -> Dict[str, Any] | None:
+    if key is None:
+        return None
+    try:
+        value = redis_client.get(key)
+        if value is None:
+            return None
+        redis_client.zadd(RECENT_KEY, {key: time.time()})
+        return json.loads(value)
+    except RedisError:
+        return None
+
+
+def get_workflow_entry(workflow_name: str) -> Dict[str, str] | None:
+    try:
+        value = redis_client.get(workflow_key(workflow_name))
+        return json.loads(value) if value is not None else None
+    except RedisError:
+        return None
+
+
+# -- WRITE METHODS -- #
+
+
+def track_workflow(workflow_name: str, key: str | None, model: str) -> None:
+    """Remembers which cache entry the result of a workflow belongs to."""
+    if key is None:
+        return
+    try:
+        redis_client.set(workflow_key(workflow_name), json.dumps({"key": key, "model": model}),
+                         ex=settings.INFERENCE_CACHE_TTL_SECONDS)
+    except RedisError:
+        pass
+
+
+def store_result(workflow_name: str, result: Dict[str, Any]) -> None:
+    entry = get_workflow_entry(workflow_name)
+    if entry is None:
+        return
+    key, model = entry["key"], entry["model"]
+    try:
+        pipe = redis_client.pipeline()
+        pipe.set(key, json.dumps(result), ex=settings.INFERENCE_CACHE_TTL_SECONDS)
+        pipe.sadd(model_key(model), key)
+        pipe.zadd(RECENT_KEY, {key: time.time()})
+        pipe.delete(workflow_key(workflow_name))
+        pipe.execute()
+        _evict()
+    except RedisError:
+        # The cache is only an optimization, the workflow result was returned
+        pass
+
+
+def _evict() -> None:
+    # Entries that expired by TTL are dropped from the index lazily here
+    expired_before = time.time() - settings.INFERENCE_CACHE_TTL_SECONDS
+    redis_client.zremrangebyscore(RECENT_KEY, "-inf", expired_before)
+    excess = redis_client.zcard(RECENT_KEY) - settings.INFERENCE_CACHE_MAX_ENTRIES
+    if excess > 0:
+        evicted = [key for key, _ in redis_client.zpopmin(RECENT_KEY, excess)]
+        redis_client.delete(*evicted)
+
+
+def invalidate_model(model: str) -> None:
+    try:
+        keys = list(redis_client.smembers(model_key(model)))
+        pipe = redis_client.pipeline()
+        if keys:
+            pipe.delete(*keys)
+            pipe.zrem(RECENT_KEY, *keys)
+        pipe.delete(model_key(model))
+        pipe.execute()
+    except RedisError:
+        pass
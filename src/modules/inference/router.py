@@ -1,8 +1,11 @@
-from fastapi import APIRouter, File, Form, UploadFile, status
+from typing import List
+
+from fastapi import APIRouter, Query, Request, Response, status
 from fastapi.responses import JSONResponse, StreamingResponse
 
 from src.core.deps import SessionDep, UserDep
-from src.modules.inference import controller
+from src.core.utils.pagination import set_next_link
+from src.modules.inference import controller, schema
 
 router = APIRouter(tags=['Inference'])
 
@@ -12,17 +15,37 @@ router = APIRouter(tags=['Inference'])
 @router.post(
     '',
     status_code=status.HTTP_200_OK,
-    response_model=None
+    response_model=None,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file", "model"],
+                        "properties": {
+                            "file": {"type": "string", "format": "binary"},
+                            "model": {"type": "string"}
+                        }
+                    }
+                }
+            }
+        }
+    }
 )
-async def submit_inference(session: SessionDep, user: UserDep, file: UploadFile = File(...), model: str = Form(...)) -> JSONResponse:
+async def submit_inference(request: Request, session: SessionDep, user: UserDep) -> JSONResponse:
     """
     **Submit an Inference**
 
     _Requires USER role_
 
-    Accepts a video file and a model name to perform inference.
+    Accepts a multipart body with a video file and a model name to perform inference.
+    The video is streamed straight to disk, so the body is not parsed by FastAPI.
+    Returns the ID of the Inference Job that keeps the result once the workflow finishes.
+    When INFERENCE_MAX_SEGMENT_SECONDS is set, longer videos run as segments in parallel, whose predictions are merged into one result.
     """
-    return await controller.submit_inference(session, file, model)
+    return await controller.submit_inference(session, user, request)
 
 
 @router.post(
@@ -30,18 +53,36 @@ async def submit_inference(session: SessionDep, user: UserDep, file: UploadFile
     status_code=status.HTTP_200_OK,
     response_model=None
 )
-def terminate_and_delete_workflow(user: UserDep, workflow_name: str) -> None:
+async def terminate_and_delete_workflow(session: SessionDep, user: UserDep, workflow_name: str) -> None:
     """
     **Terminate and Delete Workflow**
 
-    Terminates and deletes a workflow.
+    _Requires USER role with the same ID as the owner of the workflow or Admin role_
+
+    Terminates and deletes a workflow, failing its Inference Job.
     """
-    return controller.terminate_and_delete_workflow(workflow_name)
+    return await controller.terminate_and_delete_workflow(session, user, workflow_name)
 
 
 # -- GET ENDPOINTS -- #
 
 
+@router.get(
+    '/cached',
+    status_code=status.HTTP_200_OK,
+    response_model=None
+)
+async def get_cached_result(session: SessionDep, user: UserDep, sha256: str = Query(..., pattern="^[0-9a-f]{64}$"), model: str = Query(...)) -> JSONResponse:
+    """
+    **Get a Cached Inference Result**
+
+    _Requires USER role_
+
+    Returns the result of an earlier inference of the same video (by SHA-256) with the same model revision, so the video does not need to be uploaded again.
+    """
+    return await controller.get_cached_result(session, sha256, model)
+
+
 @router.get(
     '/events/{workflow_name}',
     status_code=status.HTTP_200_OK,
@@ -61,12 +102,48 @@ async def get_workflow_events(workflow_name: str) -> StreamingResponse:
     status_code=status.HTTP_200_OK,
     response_model=None
 )
-def get_workflow_result(user: UserDep, workflow_name: str) -> JSONResponse:
+async def get_workflow_result(session: SessionDep, user: UserDep, workflow_name: str) -> JSONResponse:
     """
     **Get Workflow Result**
 
+    _Requires USER role with the same ID as the owner of the workflow or Admin role_
+
+    Returns the result of a workflow, stored with its Inference Job once the workflow succeeded.
+    Responds with 409 while the workflow is still running.
+    """
+    return await controller.get_workflow_result(session, user, workflow_name)
+
+
+@router.get(
+    '/jobs',
+    status_code=status.HTTP_200_OK,
+    response_model=List[schema.InferenceJobOut]
+)
+async def get_user_jobs(session: SessionDep, user: UserDep, request: Request, response: Response, job_status: schema.InferenceJobStatus | None = Query(None), cursor: str | None = None, limit: int = Query(100, ge=1, le=500)) -> List[schema.InferenceJobOut]:
+    """
+    **Retrieve a list of the Inference Jobs of the current User**
+
     _Requires USER role_
 
-    Returns the result of a workflow.
+    Queries the database and returns a page of the Inference Jobs of the current logged user, optionally filtered by status.
+    The next page is linked in the `Link` header.
+    """
+    jobs, next_cursor = await controller.get_user_jobs(session, user, job_status, cursor, limit)
+    set_next_link(request, response, next_cursor)
+    return jobs
+
+
+@router.get(
+    '/jobs/{job_id}',
+    status_code=status.HTTP_200_OK,
+    response_model=schema.InferenceJobOut
+)
+async def get_job(session: SessionDep, user: UserDep, job_id: int) -> schema.InferenceJobOut:
+    """
+    **Retrieve an Inference Job**
+
+    _Requires USER role with the same ID as the owner of the job or Admin role_
+
+    Returns the status, timings and result of an Inference Job.
     """
-    return controller.get_workflow_result(workflow_name)
+    return await controller.get_job(session, user, job_id)
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Any, Dict
+
+from pydantic import BaseModel
+
+from src.modules.inference.model import InferenceJobStatus
+
+# -- GET SCHEMAS -- #
+
+class InferenceJobOut(BaseModel):
+    id: int
+    workflow_name: str | None
+    model: str
+    video_filename: str
+    video_sha256: str
+    segments: int
+    status: InferenceJobStatus
+    status_message: str | None
+    result: Dict[str, Any] | None
+    created_at: datetime
+    completed_at: datetime | None
+    # Only set while the job is queued
+    queue_position: int | None = None
+    estimated_wait_seconds: float | None = None
@@ -0,0 +1,95 @@
+import asyncio
+import math
+import os
+from pathlib import Path
+from typing import List, NamedTuple
+
+import numpy as np
+
+from src.core.config import settings
+
+# Predictions a segment may have more or fewer than planned, as models
+# round the last frame of the video
+LENGTH_TOLERANCE = 1
+
+
+class VideoSegment(NamedTuple):
+    index: int
+    # Offset and length in predictions, one per INFERENCE_SEGMENT_SECONDS
+    start: int
+    length: int
+
+    @property
+    def start_seconds(self) -> float:
+        return round(self.start * settings.INFERENCE_SEGMENT_SECONDS, 6)
+
+    @property
+    def duration_seconds(self) -> float:
+        return round(self.length * settings.INFERENCE_SEGMENT_SECONDS, 6)
+
+
+def segment_name(workflow_name: str, index: int) -> str:
+    return f"{workflow_name}-{index}"
+
+
+def plan_segments(duration_seconds: float | None) -> List[VideoSegment]:
+    """Splits a video into segments of at most INFERENCE_MAX_SEGMENT_SECONDS,
+    starting on the prediction grid so that their predictions line up.
+
+    A single segment when the video is short enough, or its duration is
+    unknown.
+    """
+    segment_seconds = settings.INFERENCE_SEGMENT_SECONDS
+    max_length = math.floor(settings.INFERENCE_MAX_SEGMENT_SECONDS / segment_seconds)
+    if not duration_seconds or max_length < 1:
+        return [VideoSegment(0, 0, 0)]
+
+    total = math.ceil(duration_seconds / segment_seconds)
+    return [VideoSegment(index, start, min(max_length, total - start))
+            for index, start in enumerate(range(0, total, max_length))]
+
+
+async def probe_duration(video_path: str | Path) -> float | None:
+    """Duration of the video in seconds, None when ffprobe cannot tell."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            settings.FFPROBE_PATH, "-v", "error", "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1", str(video_path),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        output, _ = await process.communicate()
+    except OSError:
+        return None
+    if process.returncode != 0:
+        return None
+    try:
+        duration = float(output.strip())
+    except ValueError:
+        return None
+    return duration if math.isfinite(duration) and duration > 0 else None
+
+
+def merge_results(segments: List[VideoSegment], result_paths: List[Path], destination: Path) -> None:
+    """Concatenates the predictions of every segment into `destination`.
+
+    Every segment but the last is truncated, or padded with negatives, to
+    its planned length, so that later segments keep their offset. Raises
+    ValueError when a segment is off by more than LENGTH_TOLERANCE
+    predictions, as when the workflow ignored its part of the video. The
+    file is replaced atomically, it must never be read half written.
+    """
+    parts = []
+    for position, (segment, path) in enumerate(zip(segments, result_paths)):
+        pred = np.load(path, mmap_mode="r").reshape(-1)
+        if abs(pred.size - segment.length) > LENGTH_TOLERANCE:
+            raise ValueError(f"Segment {segment.index} has {pred.size} predictions, "
+                             f"{segment.length} were planned")
+        if position < len(segments) - 1:
+            pred = pred[:segment.length]
+            if pred.size < segment.length:
+                pred = np.concatenate([pred, np.zeros(segment.length - pred.size, dtype=pred.dtype)])
+        parts.append(pred)
+
+    partial = destination.with_name(destination.name + ".partial")
+    with open(partial, "wb") as file:
+        np.save(file, np.concatenate(parts))
+    os.replace(partial, destination)
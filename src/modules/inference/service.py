@@ -1,25 +1,42 @@
 import asyncio
+import logging
 import mimetypes
 import os
 import shutil
+import socket
+from contextlib import aclosing
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Any, Coroutine, Dict, List, Tuple
 from uuid import uuid4
 
 import numpy as np
-from fastapi import HTTPException, UploadFile, status
-from kubernetes import client, config, watch
+from fastapi import HTTPException, Request, UploadFile, status
+from sqlmodel import or_, update
 
 from src.core.config import settings
+from src.core.database.session import SessionLocal
 from src.core.deps import SessionDep
+from src.core.execution_backend import (ExecutionError, WorkflowRun,
+                                        execution_backend)
+from src.core.utils.uploads import stream_upload
+from src.core.workflow_scheduler import Priority, workflow_scheduler
+from src.modules.inference import result_cache
+from src.modules.inference.model import InferenceJob, InferenceJobStatus, utc_now
+from src.modules.inference.segments import (VideoSegment, merge_results,
+                                            plan_segments, probe_duration,
+                                            segment_name)
 from src.modules.submission.model import Submission, SubmissionStatus
+from src.modules.user.model import Role, User
 
-try:
-    config.load_incluster_config()
-except Exception:
-    config.load_kube_config()
+logger = logging.getLogger(__name__)
 
-v1 = client.CoreV1Api()
-batch_v1 = client.BatchV1Api()
+# Tasks running the jobs of this process by workflow name. Also the strong
+# references the event loop does not keep
+_job_runners: Dict[str, asyncio.Task] = {}
+# Runner of the jobs of this process, see `recover_jobs`
+RUNNER_ID = f"{socket.gethostname()}-{os.getpid()}"
+ACTIVE_STATUSES = [InferenceJobStatus.QUEUED, InferenceJobStatus.RUNNING]
 
 
 # -- UTILITY METHODS -- #
@@ -33,11 +50,11 @@ async def is_valid_video_file(file: UploadFile) -> bool:
     return True
 
 
-def fetch_pod_logs(pod_name, namespace='argo'):
+async def fetch_pod_logs(pod_name):
     try:
-        logs = v1.read_namespaced_pod_log(name=pod_name, namespace=namespace)
+        logs = await execution_backend.read_logs(pod_name)
         return logs
-    except client.exceptions.ApiException as e:
+    except ExecutionError as e:
         return f"Error fetching logs for pod {pod_name}: {e}\n\n"
 
 
@@ -51,35 +68,51 @@ def parse_time(seconds):
     return str(seconds // 60) + ":" + sec
 
 
+def extract_intervals(pred_binary: np.ndarray, segment_seconds: float | None = None) -> Dict[str, Any]:
+    """Runs of positive predictions as frame and time intervals.
+
+    Every prediction covers one segment of `segment_seconds` (defaults to
+    INFERENCE_SEGMENT_SECONDS). Runs are found with a vectorized run-length
+    encoding, only the resulting intervals are converted to Python values.
+    """
+    if segment_seconds is None:
+        segment_seconds = settings.INFERENCE_SEGMENT_SECONDS
+
+    violent = np.asarray(pred_binary).reshape(-1) == 1
+    edges = np.flatnonzero(np.diff(violent, prepend=False, append=False))
+    # Run starts and (exclusive) ends alternate
+    starts, ends = edges[0::2], edges[1::2]
+
+    start_seconds = np.floor((starts + 1) * segment_seconds).astype(np.int64)
+    end_seconds = np.ceil(ends * segment_seconds).astype(np.int64)
+
+    result = {
+        "contains_violence": bool(starts.size),
+        "violence_intervals_seconds": [],
+        "violence_intervals_frames": [],
+    }
+    for start, end, start_second, end_second in zip(starts.tolist(), ends.tolist(), start_seconds.tolist(), end_seconds.tolist()):
+        result["violence_intervals_frames"].append(
+            [start, end - 1] if end - 1 != start else [start])
+        result["violence_intervals_seconds"].append(
+            [parse_time(start_second), parse_time(end_second)])
+    return result
+
+
 # -- REMOVAL METHODS -- #
 
 
-def terminate_workflow(workflow_name: str):
-    custom_api = client.CustomObjectsApi()
+async def terminate_workflow(workflow_name: str):
     try:
-        custom_api.patch_namespaced_custom_object(
-            group="argoproj.io",
-            version="v1alpha1",
-            namespace="argo",
-            plural="workflows",
-            name=workflow_name,
-            body={"spec": {"shutdown": "Terminate"}}
-        )
-    except client.exceptions.ApiException as e:
+        await execution_backend.terminate(workflow_name)
+    except ExecutionError as e:
         pass
 
 
-def delete_workflow(workflow_name: str):
-    custom_api = client.CustomObjectsApi()
+async def delete_workflow(workflow_name: str):
     try:
-        custom_api.delete_namespaced_custom_object(
-            group="argoproj.io",
-            version="v1alpha1",
-            namespace="argo",
-            plural="workflows",
-            name=workflow_name
-        )
-    except client.exceptions.ApiException as e:
+        await execution_backend.delete(workflow_name)
+    except ExecutionError as e:
         pass
 
 
@@ -95,62 +128,67 @@ def remove_tmp_data(workflow_name: str):
 # -- SUBMISSION METHODS -- #
 
 
-async def create_and_submit_workflow(workflow_name: str, feature_type: str, video_path: str, data_path: str, model: str, model_path: str):
-    workflow_manifest = {
-        "apiVersion": "argoproj.io/v1alpha1",
-        "kind": "Workflow",
-        "metadata": {
-            "name": workflow_name,
-            "namespace": "argo"
-        },
-        "spec": {
-            "workflowTemplateRef": {
-                "name": "inference-workflow"
-            },
-            "arguments": {
-                "parameters": [
-                    {"name": "featureType", "value": feature_type},
-                    {"name": "videoPath", "value": video_path},
-                    {"name": "dataPath", "value": data_path},
-                    {"name": "model", "value": model},
-                    {"name": "modelPath", "value": model_path}
-                ]
-            }
-        }
-    }
+async def create_and_submit_workflow(workflow_name: str, feature_type: str, video_path: str, data_path: str, model: str, model_path: str, segment: VideoSegment | None = None):
+    run = WorkflowRun(name=workflow_name, template="inference-workflow", parameters={
+        "featureType": feature_type,
+        "videoPath": video_path,
+        "dataPath": data_path,
+        "model": model,
+        "modelPath": model_path
+    })
+    if segment is not None:
+        # Only this part of the video is processed
+        run.parameters["startSeconds"] = str(segment.start_seconds)
+        run.parameters["durationSeconds"] = str(segment.duration_seconds)
 
-    custom_api = client.CustomObjectsApi()
     try:
-        custom_api.create_namespaced_custom_object(
-            group="argoproj.io",
-            version="v1alpha1",
-            namespace="argo",
-            plural="workflows",
-            body=workflow_manifest
-        )
-    except client.exceptions.ApiException as e:
+        await execution_backend.submit(run)
+    except ExecutionError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=f"Error submitting workflow: {e}") from e
 
 
-async def submit_inference(session: SessionDep, file: UploadFile, model: str) -> str:
+async def get_cached_result(session: SessionDep, video_sha256: str, model: str) -> Dict[str, Any] | None:
+    published = await Submission.exists(session, accessor=model, status=SubmissionStatus.PUBLISHED)
+    if not published:
+        return None
+    _, result = await asyncio.to_thread(lookup_result, video_sha256, model)
+    return result
+
+
+def lookup_result(video_sha256: str, model: str) -> Tuple[str | None, Dict[str, Any] | None]:
+    """Cache key of a video and model, and its cached result. Blocking: reads
+    the model repository and Redis."""
+    key = result_cache.cache_key(video_sha256, model)
+    return key, result_cache.get_result(key)
+
+
+async def submit_inference(session: SessionDep, user: User, request: Request) -> Dict[str, Any]:
     workflow_name = str(uuid4())
     data_path = Path(settings.TMP_DIR) / workflow_name
     data_path.mkdir(parents=True, exist_ok=True)
 
-    video_path = data_path / file.filename
-
     try:
-        with open(video_path, "wb") as buffer:
-            while data := await file.read(1024):
-                buffer.write(data)
+        upload = await stream_upload(request, data_path)
+    except HTTPException:
+        remove_tmp_data(workflow_name)
+        raise
     except Exception as exc:
         remove_tmp_data(workflow_name)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail='Error uploading video file') from exc
 
+    model = upload.fields.get("model")
     feature_type = await Submission.get_column_value(session, "modality", accessor=model, status=SubmissionStatus.PUBLISHED)
 
+    key, cached_result = await asyncio.to_thread(lookup_result, upload.sha256, model) if feature_type else (None, None)
+    if cached_result is not None:
+        remove_tmp_data(workflow_name)
+        job = await InferenceJob.create(session, user_id=user.id, model=model, video_filename=upload.filename,
+                                        video_sha256=upload.sha256, status=InferenceJobStatus.SUCCEEDED,
+                                        result=cached_result, completed_at=utc_now())
+        return {"job_id": job.id, "workflow_name": None, "sha256": upload.sha256, "result": cached_result}
+
     match feature_type:
         case "rgb_only":
             _rgb_list = (data_path / "rgb.list").touch()
@@ -158,146 +196,370 @@ async def submit_inference(session: SessionDep, file: UploadFile, model: str) ->
             _rgb_list = (data_path / "rgb.list").touch()
             _audio_list = (data_path / "audio.list").touch()
         case _:
+            remove_tmp_data(workflow_name)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                                 detail='Invalid model')
 
+    # Long videos run as segments in parallel, each with its own slot
+    segments = plan_segments(await probe_duration(upload.path))
+
+    await asyncio.to_thread(result_cache.track_workflow, workflow_name, key, model)
+    job = await InferenceJob.create(session, workflow_name=workflow_name, user_id=user.id, model=model,
+                                    video_filename=upload.filename, video_sha256=upload.sha256,
+                                    segments=len(segments), runner_id=RUNNER_ID, heartbeat_at=utc_now())
+    # Interactive requests go before evaluations, see `Priority`
+    for slot_id in slot_ids(workflow_name, len(segments)):
+        await workflow_scheduler.enqueue(slot_id, f"user:{user.id}", Priority.INTERACTIVE)
+    start_job(workflow_name, feature_type, upload.path.name, model, segments)
+    slot = await workflow_scheduler.status(slot_ids(workflow_name, len(segments))[0])
+    return {"job_id": job.id, "workflow_name": workflow_name, "sha256": upload.sha256, "result": None,
+            "queue_position": slot.position if slot else None,
+            "estimated_wait_seconds": slot.estimated_wait_seconds if slot else None}
+
+
+# -- JOB METHODS -- #
+
+
+def load_workflow_result(workflow_name: str) -> Dict[str, Any]:
+    # Memory-mapped, multi-hour predictions are never copied into Python objects
+    return extract_intervals(np.load(execution_backend.result_path(workflow_name), mmap_mode="r"))
+
+
+async def _set_job_status(workflow_name: str, current: List[InferenceJobStatus], **values: Any) -> bool:
+    async with SessionLocal() as session:
+        result = await session.exec(
+            update(InferenceJob)
+            .where(InferenceJob.workflow_name == workflow_name, InferenceJob.status.in_(current))
+            .values(**values))
+        await session.commit()
+        return result.rowcount == 1
+
+
+async def _close_job(workflow_name: str, **values: Any) -> bool:
+    """Moves a queued or running job to its final status, False if it
+    already left them."""
+    return await _set_job_status(workflow_name, ACTIVE_STATUSES, completed_at=utc_now(), **values)
+
+
+async def finalize_job(workflow_name: str) -> None:
+    """Persists the result of a finished workflow and removes its data.
+
+    Safe to call more than once, and concurrently: only the first call to
+    close the job stores the result, the others leave it untouched.
+    """
     try:
-        # await create_and_submit_workflow(workflow_name=workflow_name,
-        #                                  feature_type=feature_type,
-        #                                  video_path=str(
-        #                                      f"/tmp_inference/{workflow_name}/{file.filename}"),
-        #                                  data_path=str(
-        #                                      f"/tmp_inference/{workflow_name}"),
-        #                                  model=model,
-        #                                  model_path=str("/infer_models"))  # TODO production paths
-
-        await create_and_submit_workflow(workflow_name=workflow_name,
-                                         feature_type=feature_type,
-                                         video_path=str(
-                                             f"{settings.TMP_DIR}/{workflow_name}/{file.filename}"),
-                                         data_path=str(
-                                             f"{settings.TMP_DIR}/{workflow_name}"),
-                                         model=model,
-                                         model_path=str({settings.INFER_DIR}))
-        return workflow_name
-    except Exception as exc:
+        result = await asyncio.to_thread(load_workflow_result, workflow_name)
+    except Exception as exc:  # pylint: disable=broad-except
+        if await _close_job(workflow_name, status=InferenceJobStatus.FAILED,
+                            status_message=f"Error loading result: {exc}"):
+            remove_tmp_data(workflow_name)
+        return
+
+    if await _close_job(workflow_name, status=InferenceJobStatus.SUCCEEDED, result=result):
+        await asyncio.to_thread(result_cache.store_result, workflow_name, result)
         remove_tmp_data(workflow_name)
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail='Error submitting workflow') from exc
 
 
-def get_workflow_result(workflow_name: str):
-    data_path = Path(settings.TMP_DIR) / workflow_name
-    if not data_path.exists():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"Workflow {workflow_name} not found")
+async def fail_job(workflow_name: str, message: str) -> None:
+    if await _close_job(workflow_name, status=InferenceJobStatus.FAILED, status_message=message):
+        remove_tmp_data(workflow_name)
+
+
+def slot_ids(workflow_name: str, segments: int) -> List[str]:
+    """Scheduler requests of a job, one per workflow it runs."""
+    if segments == 1:
+        return [workflow_name]
+    return [segment_name(workflow_name, index) for index in range(segments)]
+
 
+async def wait_for_workflow(workflow_name: str) -> str:
+    """Final phase of a workflow."""
+    async with aclosing(execution_backend.subscribe(workflow_name)) as events:
+        async for event in events:
+            if event.kind == "workflow" and event.phase in ['Succeeded', 'Failed', 'Error', 'Deleted']:
+                return event.phase
+    raise ExecutionError(f"Lost track of workflow {workflow_name}")
+
+
+async def follow_job(workflow_name: str) -> None:
     try:
-        result_path = data_path / "results.npy"
-        pred_binary = list(np.load(result_path))
-
-        result = {
-            "contains_violence": any(pred == 1 for pred in pred_binary),
-            "violence_intervals_seconds": [],
-            "violence_intervals_frames": [],
-        }
-
-        video_duration = int(np.ceil(len(pred_binary) * 0.96))
-
-        if result["contains_violence"]:
-            start_idx = None
-            for i, pred in enumerate(pred_binary):
-                if pred == 1:
-                    if start_idx is None:
-                        start_idx = i
-                elif start_idx is not None:
-                    interval_frames = [start_idx, i - 1] if i - \
-                        1 != start_idx else [start_idx]
-                    interval_seconds = [parse_time(
-                        int(np.floor((start_idx + 1) * 0.96))), parse_time(int(np.ceil(i * 0.96)))]
-                    result["violence_intervals_frames"].append(interval_frames)
-                    result["violence_intervals_seconds"].append(
-                        interval_seconds)
-                    start_idx = None
-
-            if start_idx is not None:
-                interval_frames = [start_idx, len(
-                    pred_binary) - 1] if len(pred_binary) - 1 != start_idx else [start_idx]
-                interval_seconds = [parse_time(
-                    int(np.floor((start_idx + 1) * 0.96))), parse_time(video_duration)]
-                result["violence_intervals_frames"].append(interval_frames)
-                result["violence_intervals_seconds"].append(interval_seconds)
-
-        return result
+        phase = await wait_for_workflow(workflow_name)
+    except ExecutionError as e:
+        await fail_job(workflow_name, f"Error fetching workflow status: {e}")
+        return
 
-    except Exception as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"Error loading result for workflow {workflow_name}: {exc}") from exc
+    if phase == 'Succeeded':
+        await finalize_job(workflow_name)
+    else:
+        await fail_job(workflow_name, f"Workflow {phase.lower()}")
+
+
+async def run_job(workflow_name: str, feature_type: str, video_filename: str, model: str, segments: List[VideoSegment]) -> None:
+    """Submits the workflow of a queued job once it is granted a slot, and
+    follows it until it is over."""
+    if len(segments) > 1:
+        await run_segmented_job(workflow_name, feature_type, video_filename, model, segments)
+        return
+
+    try:
+        await workflow_scheduler.wait(workflow_name)
+        try:
+            await create_and_submit_workflow(workflow_name=workflow_name,
+                                             feature_type=feature_type,
+                                             video_path=str(
+                                                 f"{settings.TMP_DIR}/{workflow_name}/{video_filename}"),
+                                             data_path=str(
+                                                 f"{settings.TMP_DIR}/{workflow_name}"),
+                                             model=model,
+                                             model_path=str(settings.INFER_DIR))
+        except Exception as exc:  # pylint: disable=broad-except
+            await fail_job(workflow_name, f"Error submitting workflow: {exc}")
+            return
+        if await _set_job_status(workflow_name, [InferenceJobStatus.QUEUED], status=InferenceJobStatus.RUNNING):
+            await follow_job(workflow_name)
     finally:
-        remove_tmp_data(workflow_name)
+        await workflow_scheduler.release(workflow_name)
+
+
+async def run_segment(workflow_name: str, feature_type: str, video_filename: str, model: str, segment: VideoSegment) -> None:
+    """Runs the workflow of one segment of a job once it is granted a slot.
+    Raises ExecutionError unless it succeeds."""
+    name = segment_name(workflow_name, segment.index)
+    submitted = False
+    try:
+        await workflow_scheduler.wait(name)
+        job_path = Path(settings.TMP_DIR) / workflow_name
+        data_path = Path(settings.TMP_DIR) / name
+        data_path.mkdir(parents=True, exist_ok=True)
+        # The feature lists of the job, the video is shared
+        for list_name in ("rgb.list", "audio.list"):
+            if (job_path / list_name).exists():
+                (data_path / list_name).touch()
+
+        try:
+            await create_and_submit_workflow(workflow_name=name,
+                                             feature_type=feature_type,
+                                             video_path=str(job_path / video_filename),
+                                             data_path=str(data_path),
+                                             model=model,
+                                             model_path=str(settings.INFER_DIR),
+                                             segment=segment)
+        except HTTPException as exc:
+            raise ExecutionError(exc.detail) from exc
+        submitted = True
+        await _set_job_status(workflow_name, [InferenceJobStatus.QUEUED], status=InferenceJobStatus.RUNNING)
+
+        phase = await wait_for_workflow(name)
+        if phase != 'Succeeded':
+            raise ExecutionError(f"Segment {segment.index} workflow {phase.lower()}")
+    except asyncio.CancelledError:
+        if submitted:
+            await terminate_workflow(name)
+        raise
+    finally:
+        await workflow_scheduler.release(name)
+
+
+async def run_segmented_job(workflow_name: str, feature_type: str, video_filename: str, model: str, segments: List[VideoSegment]) -> None:
+    """Runs every segment of a job in parallel, then merges their
+    predictions into the result of the job. The first segment to fail
+    fails the job and stops the others."""
+    tasks = [asyncio.create_task(run_segment(workflow_name, feature_type, video_filename, model, segment))
+             for segment in segments]
+    try:
+        await asyncio.gather(*tasks)
+        await asyncio.to_thread(
+            merge_results, segments,
+            [execution_backend.result_path(segment_name(workflow_name, segment.index)) for segment in segments],
+            execution_backend.result_path(workflow_name))
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:  # pylint: disable=broad-except
+        await fail_job(workflow_name, f"Error running segments: {exc}")
+        return
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for segment in segments:
+            remove_tmp_data(segment_name(workflow_name, segment.index))
+
+    await finalize_job(workflow_name)
+
+
+def _start_runner(workflow_name: str, runner: Coroutine[Any, Any, None]) -> None:
+    task = asyncio.create_task(runner)
+    _job_runners[workflow_name] = task
+    task.add_done_callback(lambda _: _job_runners.pop(workflow_name, None))
+
+
+def start_job(workflow_name: str, feature_type: str, video_filename: str, model: str, segments: List[VideoSegment]) -> None:
+    _start_runner(workflow_name, run_job(workflow_name, feature_type, video_filename, model, segments))
+
+
+def cancel_job(workflow_name: str) -> None:
+    """Stops waiting for slots, or following the workflows, of a local job."""
+    task = _job_runners.get(workflow_name)
+    if task is not None:
+        task.cancel()
+
+
+async def heartbeat_jobs() -> None:
+    """Refreshes the lease of the jobs run by this process."""
+    if not _job_runners:
+        return
+    async with SessionLocal() as session:
+        await session.exec(
+            update(InferenceJob)
+            .where(InferenceJob.workflow_name.in_(list(_job_runners)), InferenceJob.runner_id == RUNNER_ID)
+            .values(heartbeat_at=utc_now()))
+        await session.commit()
+
+
+def _stale(stale_before: datetime):
+    return or_(InferenceJob.heartbeat_at.is_(None), InferenceJob.heartbeat_at < stale_before)
+
+
+async def _claim_job(job_id: int, stale_before: datetime) -> bool:
+    """Makes this process the runner of a stale job, False if another
+    process claimed it first."""
+    async with SessionLocal() as session:
+        result = await session.exec(
+            update(InferenceJob)
+            .where(InferenceJob.id == job_id, InferenceJob.status.in_(ACTIVE_STATUSES), _stale(stale_before))
+            .values(runner_id=RUNNER_ID, heartbeat_at=utc_now()))
+        await session.commit()
+        return result.rowcount == 1
+
+
+async def recover_jobs() -> None:
+    """Takes over the queued and running jobs whose lease expired, as the
+    API process running them stopped. The jobs of live processes, e.g. of
+    the previous pods during a rolling update, are left to them.
+
+    Their scheduler requests are withdrawn. Queued jobs fail, as the
+    request that uploaded the video is gone. A running job follows its
+    workflow again, unless it was split into segments: those are stopped
+    and the job fails.
+    """
+    stale_before = utc_now() - timedelta(seconds=settings.INFERENCE_JOB_LEASE_SECONDS)
+    async with SessionLocal() as session:
+        jobs = await InferenceJob.get_multi(
+            session, InferenceJob.status.in_(ACTIVE_STATUSES), InferenceJob.workflow_name.is_not(None),
+            _stale(stale_before))
+
+    for job in jobs:
+        if job.workflow_name in _job_runners or not await _claim_job(job.id, stale_before):
+            continue
+        for slot_id in slot_ids(job.workflow_name, job.segments):
+            await workflow_scheduler.release(slot_id)
+
+        if job.status == InferenceJobStatus.QUEUED:
+            await fail_job(job.workflow_name, "Interrupted before it started, the API process running it stopped")
+        elif job.segments > 1:
+            for index in range(job.segments):
+                await terminate_workflow(segment_name(job.workflow_name, index))
+                await delete_workflow(segment_name(job.workflow_name, index))
+                remove_tmp_data(segment_name(job.workflow_name, index))
+            await fail_job(job.workflow_name, "Interrupted, the API process running it stopped")
+        else:
+            _start_runner(job.workflow_name, follow_job(job.workflow_name))
+
+
+async def supervise_jobs() -> None:
+    """Keeps the leases of the jobs of this process, and takes over the
+    jobs of stopped ones, until cancelled."""
+    while True:
+        try:
+            await heartbeat_jobs()
+            await recover_jobs()
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Supervising inference jobs failed, retrying: %s", exc)
+        await asyncio.sleep(settings.INFERENCE_JOB_LEASE_SECONDS / 4)
+
+
+async def terminate_job(session: SessionDep, user: User, workflow_name: str) -> None:
+    job = await InferenceJob.get(session, workflow_name=workflow_name)
+    if job is None or (job.user_id != user.id and user.role != Role.ADMIN):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Workflow {workflow_name} not found")
+
+    cancel_job(workflow_name)
+    await terminate_workflow(workflow_name)
+    await fail_job(workflow_name, "Terminated")
+    await delete_workflow(workflow_name)
+    remove_tmp_data(workflow_name)
+
+
+async def get_job(session: SessionDep, user: User, job_id: int) -> Dict[str, Any]:
+    job = await InferenceJob.get(session, id=job_id)
+    if job is None or (job.user_id != user.id and user.role != Role.ADMIN):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail='Inference job not found')
+
+    job_out = job.model_dump()
+    if job.status == InferenceJobStatus.QUEUED:
+        slot = await workflow_scheduler.status(slot_ids(job.workflow_name, job.segments)[0])
+        if slot is not None:
+            job_out.update(queue_position=slot.position, estimated_wait_seconds=slot.estimated_wait_seconds)
+    return job_out
+
+
+async def get_user_jobs(session: SessionDep, user: User, job_status: InferenceJobStatus | None, cursor: str | None, limit: int) -> Tuple[List[InferenceJob], str | None]:
+    filters = {"user_id": user.id}
+    if job_status is not None:
+        filters["status"] = job_status
+    return await InferenceJob.get_page(session, cursor=cursor, limit=limit, **filters)
+
+
+async def get_workflow_result(session: SessionDep, user: User, workflow_name: str) -> Dict[str, Any]:
+    job = await InferenceJob.get(session, workflow_name=workflow_name)
+    if job is None or (job.user_id != user.id and user.role != Role.ADMIN):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Workflow {workflow_name} not found")
+
+    if job.status == InferenceJobStatus.QUEUED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f"Workflow {workflow_name} is waiting for a slot")
+
+    if job.status == InferenceJobStatus.RUNNING:
+        # The watcher may have been lost with a restart of the API
+        if not execution_backend.result_path(workflow_name).exists():
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail=f"Workflow {workflow_name} has not finished yet")
+        await finalize_job(workflow_name)
+        await session.refresh(job)
+
+    if job.status == InferenceJobStatus.FAILED:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Workflow {workflow_name} failed: {job.status_message}")
+    return job.result
 
 
 # -- STREAMING METHODS -- #
 
 
 async def stream_workflow_events(workflow_name: str):
-    custom_api = client.CustomObjectsApi()
-    watcher = watch.Watch()
+    try:
+        async with aclosing(execution_backend.subscribe(workflow_name)) as events:
+            async for event in events:
+                if event.kind == "pod":
+                    yield f"data: Pod {event.name} status: {event.phase}\n\n"
 
-    workflow_completed = False
-    pod_statuses = {}
+                    # Fetch and yield logs if the pod failed
+                    if event.phase in ['Failed', 'Error']:
+                        logs = await fetch_pod_logs(event.name)
+                        yield f"data: Pod {event.name} logs:\n{logs}\n\n"
+                    continue
 
-    try:
-        while not workflow_completed:
-            try:
-                # Fetch the workflow status
-                workflow = custom_api.get_namespaced_custom_object(
-                    group="argoproj.io",
-                    version="v1alpha1",
-                    namespace="argo",
-                    plural="workflows",
-                    name=workflow_name,
-                )
-                workflow_status = workflow.get('status')
-
-                if workflow_status:
-                    workflow_phase = workflow_status.get('phase', 'Unknown')
-                else:
-                    workflow_phase = 'Unknown'
-
-                # Stream pod events
-                for event in watcher.stream(v1.list_namespaced_pod, namespace='argo', label_selector=f'workflows.argoproj.io/workflow={workflow_name}', timeout_seconds=30):
-                    obj = event['object']
-                    pod_name = obj.metadata.name
-                    pod_status = obj.status.phase
-
-                    # Track pod statuses to ensure we capture all events
-                    if pod_name not in pod_statuses or pod_statuses[pod_name] != pod_status:
-                        pod_statuses[pod_name] = pod_status
-                        yield f"data: Pod {pod_name} status: {pod_status}\n\n"
-
-                        # Fetch and yield logs if the pod failed
-                        if pod_status in ['Failed', 'Error']:
-                            logs = fetch_pod_logs(pod_name)
-                            yield f"data: Pod {pod_name} logs:\n{logs}\n\n"
+                yield f"data: Workflow {workflow_name} status: {event.phase}\n\n"
 
                 # Check if the workflow itself has completed
-                if workflow_phase in ['Succeeded', 'Failed', 'Error']:
-                    yield f"data: Workflow {workflow_name} status: {workflow_phase}\n\n"
-                    workflow_completed = True
+                if event.phase in ['Succeeded', 'Failed', 'Error', 'Deleted']:
                     break
-                else:
-                    yield f"data: Workflow {workflow_name} status: {workflow_phase}\n\n"
-
-                await asyncio.sleep(5)  # Short delay to avoid tight loop
 
-            except client.exceptions.ApiException as e:
-                yield f"data: Error Fetching Workflow Status: {e}\n\n"
-                break
+    except ExecutionError as e:
+        yield f"data: Error Fetching Workflow Status: {e}\n\n"
 
-            except Exception as e:
-                yield f"data: Workflow Unexpected Error: {e}\n\n"
-                break
-
-    finally:
-        watcher.stop()
+    except Exception as e:
+        yield f"data: Workflow Unexpected Error: {e}\n\n"
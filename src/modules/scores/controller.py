@@ -1,19 +1,12 @@
+from typing import List, Tuple
+
 from fastapi import HTTPException, status
 from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
 
 from src.core.deps import SessionDep
-from src.modules.scores import model, schema, service
-from src.modules.submission.model import Submission, SubmissionStatus
-from src.modules.submission.service import get_submission_details
-
-weights = {
-    "precision": 0.2,
-    "accuracy": 0.2,
-    "recall": 0.2,
-    "f1": 0.2,
-    "aoc_roc": 0.1,
-    "aoc_pr": 0.1
-}
+from src.modules.scores import model, rank_index, schema, score_matrix, service
+from src.modules.scores.model import weights
 
 
 # -- UTILS METHODS -- #
@@ -30,6 +23,10 @@ async def create_score(session: SessionDep, score_in: schema.ScoreCreate) -> Non
     await service.create_score(session, score_in)
 
 
+async def replace_scores(session: SessionDep, scores_in: List[schema.ScoreCreate]) -> List[model.Score]:
+    return await service.replace_scores(session, scores_in)
+
+
 # -- GET METHODS -- #
 
 
@@ -48,98 +45,78 @@ async def get_score_details_by_dataset_and_submission(session: SessionDep, datas
     return score
 
 
+async def get_submission_scores_by_dataset(session: SessionDep, submission_id: int, dataset_ids: List[int]) -> List[schema.ScoreOut | None]:
+    return await service.get_submission_scores_by_dataset(session, submission_id=submission_id, dataset_ids=dataset_ids)
+
+
 async def get_all_scores(session: SessionDep, dataset_id: int | None, submission_id: int | None, status: int | None) -> list[schema.ScoreOut]:
     return await service.get_all_scores(session, dataset_id=dataset_id, submission_id=submission_id, status=status)
 
 
-async def get_best_submissions(session: SessionDep, limit: int | None, dataset_id: int) -> list[schema.BestSubmissionsListOut]:
-    grouped_scores = await service.get_all_grouped_scores_by_submission(session, limit=None, dataset_id=dataset_id)
-    count = 0
-    ranked_models = []
-    for score in grouped_scores:
-        if count == limit:
-            break
+def parse_weights(profile: str | None, custom_weights: str | None) -> dict[str, float] | None:
+    if custom_weights:
+        metric_weights = {}
+        try:
+            for item in custom_weights.split(","):
+                metric, weight = item.split(":")
+                metric_weights[metric.strip()] = float(weight)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Weights must be given as metric:weight pairs separated by commas"
+            ) from exc
+        unknown = set(metric_weights) - set(weights)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown metrics: {', '.join(sorted(unknown))}"
+            )
+        if any(weight < 0 for weight in metric_weights.values()) or sum(metric_weights.values()) <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Weights must be non-negative and not all zero"
+            )
+        return metric_weights
+    if profile:
+        if profile not in model.weight_profiles:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Weighting profile not found"
+            )
+        return model.weight_profiles[profile]
+    return None
 
-        submission = await Submission.get(session, id=score[0])
 
-        if submission.status != SubmissionStatus.PUBLISHED:
-            continue
+async def get_scores_page(session: SessionDep, dataset_id: int | None, submission_id: int | None, status: int | None, cursor: str | None, limit: int) -> Tuple[list[schema.ScoreOut], str | None]:
+    return await service.get_scores_page(session, dataset_id=dataset_id, submission_id=submission_id, status=status, cursor=cursor, limit=limit)
 
-        weighted_mean = sum(
-            score[i + 1] * weight
-            for i, (field, weight) in enumerate(weights.items())
-        )
 
-        ranked_models.append({
-            "id": score[0],
-            "title": submission.title,
-            "accessor": submission.accessor,
-            "resource_title": submission.resource_title,
-            "resource_url": submission.resource_url,
-            "repository_url": submission.repository_url,
-            "precision": score[1],
-            "accuracy": score[2],
-            "recall": score[3],
-            "f1": score[4],
-            "aoc_roc": score[5],
-            "aoc_pr": score[6],
-            "weighted_mean": weighted_mean
-        })
-        count += 1
+async def get_best_submissions(session: SessionDep, limit: int | None, dataset_id: int | None, profile: str | None = None, custom_weights: str | None = None) -> list[schema.BestSubmissionsListOut]:
+    metric_weights = parse_weights(profile, custom_weights)
+    if metric_weights is None:
+        return await service.get_leaderboard(session, limit=limit, dataset_id=dataset_id)
+    matrix = await score_matrix.cache.get(session)
+    return matrix.rank(score_matrix.weight_vector(metric_weights), dataset_id=dataset_id, limit=limit)
 
-    ranked_models.sort(key=lambda x: x["weighted_mean"], reverse=True)
 
-    return ranked_models
+def get_weight_profiles() -> dict[str, dict[str, float]]:
+    return model.weight_profiles
 
 
 async def get_best_submission(session: SessionDep, dataset_id: int) -> schema.BestSubmissionOut | None:
-    dataset_scores = await service.get_all_scores(session, dataset_id=dataset_id, submission_id=None, status=model.ScoreStatus.SUCCESS)
-    if not dataset_scores:
+    leaderboard = await service.get_leaderboard(session, limit=1, dataset_id=dataset_id)
+    if not leaderboard:
         return None
-    ranked_scores = []
-    for score in dataset_scores:
-        submission = await Submission.exists(session, id=score.submission_id, status=SubmissionStatus.PUBLISHED)
-        if not submission:
-            continue
-        score = score.model_dump()
-        weighted_mean = sum(
-            score[field] * weight for field, weight in weights.items())
-        score["weighted_mean"] = weighted_mean
-        ranked_scores.append(score)
+    best = leaderboard[0]
+    return schema.BestSubmissionOut(submission_id=best["id"], submission_title=best["title"], submission_accessor=best["accessor"])
 
-    ranked_scores.sort(key=lambda x: x["weighted_mean"], reverse=True)
 
-    submission = await get_submission_details(session, id=ranked_scores[0]["submission_id"])
-
-    result = schema.BestSubmissionOut(
-        submission_id=submission.id, submission_title=submission.title, submission_accessor=submission.accessor)
-
-    return result
-
-
-async def get_submission_rank(session: SessionDep, submission_id: int) -> int:
-    grouped_scores = await service.get_all_grouped_scores_by_submission(session, limit=None, dataset_id=None)
-
-    ranked_models = []
-    for score in grouped_scores:
-
-        weighted_mean = sum(
-            score[i + 1] * weight
-            for i, (field, weight) in enumerate(weights.items())
-        )
-
-        ranked_models.append({
-            "id": score[0],
-            "weighted_mean": weighted_mean
-        })
-
-    ranked_models.sort(key=lambda x: x["weighted_mean"], reverse=True)
-
-    for index, item in enumerate(ranked_models):
-        if item["id"] == submission_id:
-            return index + 1
-
-    return None
+async def get_submission_rank(session: SessionDep, submission_id: int) -> int | None:
+    rank = rank_index.get_rank(submission_id)
+    if rank is None:
+        ranks = await service.get_submission_ranks(session, submission_ids=[submission_id], dataset_id=None)
+        rank = ranks.get(submission_id)
+    return rank
 
 
 async def get_submission_scores(session: SessionDep, submission_id: int) -> schema.SubmissionScoresOut | None:
@@ -160,29 +137,47 @@ async def get_submission_scores(session: SessionDep, submission_id: int) -> sche
     return score
 
 
-async def get_submission_rank_for_dataset(session: SessionDep, submission_id: int, dataset_id: int) -> int:
-    grouped_scores = await service.get_all_grouped_scores_by_submission(session, limit=None, dataset_id=dataset_id)
-
-    ranked_models = []
-    for score in grouped_scores:
-
-        weighted_mean = sum(
-            score[i + 1] * weight
-            for i, (field, weight) in enumerate(weights.items())
-        )
-
-        ranked_models.append({
-            "id": score[0],
-            "weighted_mean": weighted_mean
-        })
-
-    ranked_models.sort(key=lambda x: x["weighted_mean"], reverse=True)
-
-    for index, item in enumerate(ranked_models):
-        if item["id"] == submission_id:
-            return index + 1
-
-    return None
+async def get_submission_rank_for_dataset(session: SessionDep, submission_id: int, dataset_id: int) -> int | None:
+    rank = rank_index.get_rank(submission_id, dataset_id=dataset_id)
+    if rank is None:
+        ranks = await service.get_submission_ranks(session, submission_ids=[submission_id], dataset_id=dataset_id)
+        rank = ranks.get(submission_id)
+    return rank
+
+
+def get_submissions_around(submission_id: int, dataset_id: int | None, radius: int) -> List[schema.RankedSubmissionOut]:
+    try:
+        # Missed writes, ranks around the submission would be wrong
+        if rank_index.is_dirty():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Rank index out of date until it is rebuilt"
+            )
+        entries = rank_index.get_around(
+            submission_id, radius=radius, dataset_id=dataset_id)
+    except RedisError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Rank index unavailable"
+        ) from exc
+    return [schema.RankedSubmissionOut(submission_id=member, rank=rank, weighted_mean=score) for member, rank, score in entries]
+
+
+async def rebuild_rank_index(session: SessionDep) -> int:
+    return await rank_index.rebuild(session)
+
+
+async def check_rank_index(session: SessionDep) -> List[schema.RankMismatchOut]:
+    dataset_ids = set(await service.get_ranked_dataset_ids(session)) | set(rank_index.get_indexed_datasets())
+    mismatches = []
+    for dataset_id in [None, *sorted(dataset_ids)]:
+        sql_ranks = await service.get_submission_ranks(session, submission_ids=None, dataset_id=dataset_id)
+        index_ranks = rank_index.get_ranks(dataset_id=dataset_id)
+        for submission_id in sorted(sql_ranks.keys() | index_ranks.keys()):
+            if sql_ranks.get(submission_id) != index_ranks.get(submission_id):
+                mismatches.append(schema.RankMismatchOut(dataset_id=dataset_id, submission_id=submission_id,
+                                                         sql_rank=sql_ranks.get(submission_id), index_rank=index_ranks.get(submission_id)))
+    return mismatches
 
 
 def get_submission_events(submission_id: int):
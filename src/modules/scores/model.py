@@ -5,6 +5,36 @@ from sqlmodel import Field, UniqueConstraint
 
 from src.core.database.base_crud import Base
 
+weights = {
+    "precision": 0.2,
+    "accuracy": 0.2,
+    "recall": 0.2,
+    "f1": 0.2,
+    "aoc_roc": 0.1,
+    "aoc_pr": 0.1
+}
+
+weight_profiles = {
+    "default": weights,
+    "uniform": {field: 1 / len(weights) for field in weights},
+    "threshold": {
+        "precision": 0.25,
+        "accuracy": 0.25,
+        "recall": 0.25,
+        "f1": 0.25,
+        "aoc_roc": 0.0,
+        "aoc_pr": 0.0
+    },
+    "ranking": {
+        "precision": 0.0,
+        "accuracy": 0.0,
+        "recall": 0.0,
+        "f1": 0.0,
+        "aoc_roc": 0.5,
+        "aoc_pr": 0.5
+    }
+}
+
 
 class ScoreStatus(StrEnum):
     IN_PROGRESS = auto()
@@ -28,5 +58,10 @@ class Score(Base, table=True):
     aoc_roc: float | None = Field(default=None)
     aoc_pr: float | None = Field(default=None)
 
+    # Fingerprints of what was evaluated, a successful score is reused while
+    # neither the submission repository nor the dataset change
+    model_revision: str | None = Field(default=None)
+    dataset_checksum: str | None = Field(default=None)
+
     __table_args__ = (UniqueConstraint(
         "dataset_id", "submission_id", name="uq_dataset_submission"),)
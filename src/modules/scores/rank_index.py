@@ -0,0 +1,252 @@
+import json
+import logging
+from functools import wraps
+from typing import Any, Callable, Dict, List, Tuple
+
+import redis
+from redis.exceptions import RedisError
+from sqlmodel import select
+
+from src.core.config import settings
+from src.core.deps import SessionDep
+from src.modules.scores.model import Score, ScoreStatus, weights
+from src.modules.submission.model import Submission, SubmissionStatus
+
+redis_client = redis.Redis(host=settings.REDIS_HOST,
+                           port=settings.REDIS_PORT, password=settings.REDIS_PASSWORD, db=1)
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "leaderboard"
+GLOBAL_KEY = f"{KEY_PREFIX}:global"
+# Set while the index misses writes, until it is rebuilt
+DIRTY_KEY = f"{KEY_PREFIX}:dirty"
+
+# A write failed and DIRTY_KEY could not be set yet, Redis being unreachable
+_dirty_unflagged = False
+
+
+# -- UTILS METHODS -- #
+
+
+def dataset_key(dataset_id: int) -> str:
+    return f"{KEY_PREFIX}:dataset:{dataset_id}"
+
+
+def submission_key(submission_id: int) -> str:
+    return f"{KEY_PREFIX}:submission:{submission_id}"
+
+
+def weighted_mean(entries: List[Dict[str, float | None]]) -> float:
+    """Weighted mean of the metric averages, matching the SQL ranking
+    (AVG ignores NULLs and an all-NULL metric counts as 0)."""
+    result = 0.0
+    for field, weight in weights.items():
+        values = [entry[field] for entry in entries if entry[field] is not None]
+        result += (sum(values) / len(values) if values else 0) * weight
+    return result
+
+
+def _metrics(score: Score) -> Dict[str, float | None]:
+    return {field: getattr(score, field) for field in weights}
+
+
+def _refresh_global(submission_id: int) -> None:
+    entries = [json.loads(value)
+               for value in redis_client.hvals(submission_key(submission_id))]
+    if entries:
+        redis_client.zadd(GLOBAL_KEY, {submission_id: weighted_mean(entries)})
+    else:
+        redis_client.zrem(GLOBAL_KEY, submission_id)
+
+
+def _rank_of(key: str, score: float) -> int:
+    # Competition ranking, like RANK(): ties share the best position
+    return redis_client.zcount(key, f"({score}", "+inf") + 1
+
+
+def _rank(key: str, submission_id: int) -> int | None:
+    score = redis_client.zscore(key, submission_id)
+    if score is None:
+        return None
+    return _rank_of(key, score)
+
+
+def _index_write(function: Callable[..., None]) -> Callable[..., None]:
+    """Writes to the index never fail the change of the Score table they
+    follow. A failed write is logged and marks the index dirty, so that
+    ranks are read from SQL until `rebuild` runs."""
+    @wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> None:
+        global _dirty_unflagged  # pylint: disable=global-statement
+        try:
+            if _dirty_unflagged:
+                redis_client.set(DIRTY_KEY, 1)
+                _dirty_unflagged = False
+            function(*args, **kwargs)
+        except RedisError as exc:
+            logger.warning("Rank index update failed in %s, ranks are read from SQL until it is rebuilt: %s",
+                           function.__name__, exc)
+            try:
+                redis_client.set(DIRTY_KEY, 1)
+            except RedisError:
+                _dirty_unflagged = True
+    return wrapper
+
+
+# -- WRITE METHODS -- #
+
+
+@_index_write
+def index_score(score: Score) -> None:
+    pipe = redis_client.pipeline()
+    pipe.hset(submission_key(score.submission_id),
+              score.dataset_id, json.dumps(_metrics(score)))
+    pipe.zadd(dataset_key(score.dataset_id),
+              {score.submission_id: weighted_mean([_metrics(score)])})
+    pipe.execute()
+    _refresh_global(score.submission_id)
+
+
+@_index_write
+def remove_score(dataset_id: int, submission_id: int) -> None:
+    pipe = redis_client.pipeline()
+    pipe.hdel(submission_key(submission_id), dataset_id)
+    pipe.zrem(dataset_key(dataset_id), submission_id)
+    pipe.execute()
+    _refresh_global(submission_id)
+
+
+@_index_write
+def remove_scores(pairs: List[Tuple[int, int]]) -> None:
+    """Removes many (dataset_id, submission_id) scores in one round trip."""
+    if not pairs:
+        return
+    pipe = redis_client.pipeline()
+    for dataset_id, submission_id in pairs:
+        pipe.hdel(submission_key(submission_id), dataset_id)
+        pipe.zrem(dataset_key(dataset_id), submission_id)
+    pipe.execute()
+    for submission_id in {submission_id for _, submission_id in pairs}:
+        _refresh_global(submission_id)
+
+
+@_index_write
+def remove_submission(submission_id: int) -> None:
+    dataset_ids = redis_client.hkeys(submission_key(submission_id))
+    pipe = redis_client.pipeline()
+    for dataset_id in dataset_ids:
+        pipe.zrem(dataset_key(int(dataset_id)), submission_id)
+    pipe.zrem(GLOBAL_KEY, submission_id)
+    pipe.delete(submission_key(submission_id))
+    pipe.execute()
+
+
+async def index_submission(session: SessionDep, submission_id: int) -> None:
+    result = await session.exec(select(Score).where(
+        Score.submission_id == submission_id, Score.status == ScoreStatus.SUCCESS))
+    remove_submission(submission_id)
+    for score in result.all():
+        index_score(score)
+
+
+async def rebuild(session: SessionDep) -> int:
+    """Drops every leaderboard key and reloads the index from the Score table,
+    which also clears DIRTY_KEY.
+
+    Returns the number of indexed scores.
+    """
+    global _dirty_unflagged  # pylint: disable=global-statement
+    result = await session.exec(
+        select(Score)
+        .join(Submission, Submission.id == Score.submission_id)
+        .where(Score.status == ScoreStatus.SUCCESS,
+               Submission.status == SubmissionStatus.PUBLISHED)
+    )
+    scores = result.all()
+
+    entries: Dict[int, Dict[int, Dict[str, float | None]]] = {}
+    for score in scores:
+        entries.setdefault(score.submission_id, {})[
+            score.dataset_id] = _metrics(score)
+
+    pipe = redis_client.pipeline()
+    for key in redis_client.scan_iter(match=f"{KEY_PREFIX}:*"):
+        pipe.delete(key)
+    for submission_id, datasets in entries.items():
+        for dataset_id, metrics in datasets.items():
+            pipe.hset(submission_key(submission_id),
+                      dataset_id, json.dumps(metrics))
+            pipe.zadd(dataset_key(dataset_id), {
+                      submission_id: weighted_mean([metrics])})
+        pipe.zadd(GLOBAL_KEY, {submission_id: weighted_mean(
+            list(datasets.values()))})
+    pipe.execute()
+    _dirty_unflagged = False
+    return len(scores)
+
+
+# -- READ METHODS -- #
+
+
+def is_dirty() -> bool:
+    """True while the index may miss writes, see `_index_write`."""
+    return _dirty_unflagged or bool(redis_client.exists(DIRTY_KEY))
+
+
+def get_rank(submission_id: int, dataset_id: int | None = None) -> int | None:
+    """None when the submission is not indexed, or when the index is dirty
+    or unavailable, for the caller to rank it with SQL."""
+    key = GLOBAL_KEY if dataset_id is None else dataset_key(dataset_id)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.exists(DIRTY_KEY)
+        pipe.zscore(key, submission_id)
+        dirty, score = pipe.execute()
+        if dirty or _dirty_unflagged or score is None:
+            return None
+        return _rank_of(key, score)
+    except RedisError:
+        return None
+
+
+def get_ranks(dataset_id: int | None = None) -> Dict[int, int]:
+    key = GLOBAL_KEY if dataset_id is None else dataset_key(dataset_id)
+    ranks = {}
+    previous_score = None
+    for position, (member, score) in enumerate(redis_client.zrevrange(key, 0, -1, withscores=True)):
+        if score != previous_score:
+            rank = position + 1
+            previous_score = score
+        ranks[int(member)] = rank
+    return ranks
+
+
+def get_top(limit: int, dataset_id: int | None = None) -> List[Tuple[int, float]]:
+    key = GLOBAL_KEY if dataset_id is None else dataset_key(dataset_id)
+    return [(int(member), score) for member, score in redis_client.zrevrange(key, 0, limit - 1, withscores=True)]
+
+
+def get_around(submission_id: int, radius: int, dataset_id: int | None = None) -> List[Tuple[int, int, float]]:
+    key = GLOBAL_KEY if dataset_id is None else dataset_key(dataset_id)
+    position = redis_client.zrevrank(key, submission_id)
+    if position is None:
+        return []
+    start = max(position - radius, 0)
+    entries = redis_client.zrevrange(
+        key, start, position + radius, withscores=True)
+
+    result = []
+    rank = _rank(key, int(entries[0][0]))
+    previous_score = entries[0][1]
+    for offset, (member, score) in enumerate(entries):
+        if score != previous_score:
+            rank = start + offset + 1
+            previous_score = score
+        result.append((int(member), rank, score))
+    return result
+
+
+def get_indexed_datasets() -> List[int]:
+    prefix = dataset_key("")
+    return [int(key.decode("utf-8")[len(prefix):]) for key in redis_client.scan_iter(match=f"{prefix}*")]
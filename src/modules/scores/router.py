@@ -1,11 +1,12 @@
 # pylint: disable=W0613
 
-from typing import List
+from typing import Dict, List
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, Request, Response, status
 from fastapi.responses import StreamingResponse
 
-from src.core.deps import SessionDep, UserDep
+from src.core.deps import AdminDep, SessionDep, UserDep
+from src.core.utils.pagination import set_next_link
 from src.modules.scores import controller, schema
 
 router = APIRouter(tags=["Score"])
@@ -30,6 +31,22 @@ router = APIRouter(tags=["Score"])
 #     await controller.create_score(session, score_in)
 
 
+@router.post(
+    '/rank-index/rebuild',
+    status_code=status.HTTP_200_OK,
+    response_model=int
+)
+async def rebuild_rank_index(session: SessionDep, user: AdminDep) -> int:
+    """
+    **Rebuild the rank index**
+
+    _Requires ADMIN role_
+
+    Rebuilds the Redis rank index from the Score table and returns the number of indexed Scores.
+    """
+    return await controller.rebuild_rank_index(session)
+
+
 # -- GET ENDPOINTS -- #
 
 
@@ -54,15 +71,17 @@ router = APIRouter(tags=["Score"])
     status_code=status.HTTP_200_OK,
     response_model=List[schema.ScoreOut]
 )
-async def get_all_scores(session: SessionDep, user: UserDep, dataset_id: int | None = None, model_id: int | None = None, status: int | None = None) -> List[schema.ScoreOut]:
+async def get_all_scores(session: SessionDep, user: UserDep, request: Request, response: Response, dataset_id: int | None = None, model_id: int | None = None, status: int | None = None, cursor: str | None = None, limit: int = Query(100, ge=1, le=500)) -> List[schema.ScoreOut]:
     """
     **Get all Scores**
 
     _Requires MODERATOR role_
 
-    Returns a list of all Score records in the database.
+    Returns a page of Score records in the database. The next page is linked in the `Link` header.
     """
-    return await controller.get_all_scores(session, dataset_id, model_id, status)
+    scores, next_cursor = await controller.get_scores_page(session, dataset_id, model_id, status, cursor, limit)
+    set_next_link(request, response, next_cursor)
+    return scores
 
 
 @router.get(
@@ -70,15 +89,61 @@ async def get_all_scores(session: SessionDep, user: UserDep, dataset_id: int | N
     status_code=status.HTTP_200_OK,
     response_model=List[schema.BestSubmissionsListOut]
 )
-async def get_best_submissions(session: SessionDep, limit: int = 5) -> List[schema.BestSubmissionsListOut]:
+async def get_best_submissions(session: SessionDep, limit: int = 5, profile: str | None = None, weights: str | None = None) -> List[schema.BestSubmissionsListOut]:
     """
     **Get the best submissions**
 
     _Requires MODERATOR role_
 
-    Returns a list of the best submissions based on their scores.
+    Returns a list of the best submissions based on their scores. The ranking can use a
+    named weighting `profile` or ad-hoc `weights` given as `metric:weight` pairs separated by commas.
+    """
+    return await controller.get_best_submissions(session, limit, dataset_id=None, profile=profile, custom_weights=weights)
+
+
+@router.get(
+    '/weight-profiles',
+    status_code=status.HTTP_200_OK,
+    response_model=Dict[str, Dict[str, float]]
+)
+async def get_weight_profiles() -> Dict[str, Dict[str, float]]:
+    """
+    **Get the weighting profiles**
+
+    Returns the named metric weights that can be used to rank submissions.
+    """
+    return controller.get_weight_profiles()
+
+
+@router.get(
+    '/around/{submission_id}',
+    status_code=status.HTTP_200_OK,
+    response_model=List[schema.RankedSubmissionOut]
+)
+async def get_submissions_around(submission_id: int, dataset_id: int | None = None, radius: int = 2) -> List[schema.RankedSubmissionOut]:
     """
-    return await controller.get_best_submissions(session, limit, dataset_id=None)
+    **Get the submissions ranked around a Submission**
+
+    Returns the Submission together with the `radius` Submissions ranked right
+    above and below it, globally or for a single dataset.
+    """
+    return controller.get_submissions_around(submission_id, dataset_id, radius)
+
+
+@router.get(
+    '/rank-index/check',
+    status_code=status.HTTP_200_OK,
+    response_model=List[schema.RankMismatchOut]
+)
+async def check_rank_index(session: SessionDep, user: AdminDep) -> List[schema.RankMismatchOut]:
+    """
+    **Check the rank index**
+
+    _Requires ADMIN role_
+
+    Compares the Redis rank index with the SQL ranking and returns every mismatch.
+    """
+    return await controller.check_rank_index(session)
 
 
 @router.get(
@@ -94,6 +159,7 @@ async def get_submission_events(submission_id: int) -> StreamingResponse:
     """
     return controller.get_submission_events(submission_id)
 
+
 # -- PATCH ENDPOINTS -- #
 
 
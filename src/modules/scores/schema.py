@@ -8,6 +8,8 @@ from src.modules.scores.model import ScoreStatus
 class ScoreCreate(BaseModel):
     dataset_id: int
     submission_id: int
+    model_revision: str | None = None
+    dataset_checksum: str | None = None
 
 
 # -- GET SCHEMAS -- #
@@ -60,6 +62,19 @@ class SubmissionScoresOut(BaseModel):
     aoc_pr: float
 
 
+class RankedSubmissionOut(BaseModel):
+    submission_id: int
+    rank: int
+    weighted_mean: float
+
+
+class RankMismatchOut(BaseModel):
+    dataset_id: int | None
+    submission_id: int
+    sql_rank: int | None
+    index_rank: int | None
+
+
 # -- PATCH SCHEMAS -- #
 
 
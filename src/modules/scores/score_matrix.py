@@ -0,0 +1,158 @@
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from redis.exceptions import RedisError
+from sqlmodel import select
+
+from src.core.config import settings
+from src.core.deps import SessionDep
+from src.modules.scores.model import Score, ScoreStatus, weights
+from src.modules.scores.service import redis_client
+from src.modules.submission.model import Submission, SubmissionStatus
+
+METRICS = list(weights.keys())
+SUBMISSION_FIELDS = ["id", "title", "accessor",
+                     "resource_title", "resource_url", "repository_url"]
+
+
+class ScoreMatrix:
+    """Columnar copy of the successful scores of published submissions.
+
+    `values` has shape (submissions, datasets, metrics) with NaN where a
+    metric is missing, and `scored` marks which (submission, dataset) pairs
+    have a score at all. Submissions are sorted by id so that a stable sort
+    breaks ties the same way as the SQL leaderboard.
+    """
+
+    def __init__(self, submissions: List[Dict[str, Any]], dataset_ids: np.ndarray, values: np.ndarray, scored: np.ndarray):
+        self.submissions = submissions
+        self.dataset_ids = dataset_ids
+        self.values = values
+        self.scored = scored
+
+        # AVG ignores NULLs and COALESCE turns an all-NULL average into 0
+        counts = (~np.isnan(values)).sum(axis=1)
+        sums = np.nansum(values, axis=1)
+        self.global_means = np.divide(
+            sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        self.global_scored = scored.any(axis=1)
+        self.dataset_means = np.nan_to_num(values, nan=0.0)
+
+    @classmethod
+    async def load(cls, session: SessionDep) -> "ScoreMatrix":
+        query = (
+            select(
+                Score.dataset_id,
+                *[getattr(Submission, field) for field in SUBMISSION_FIELDS],
+                *[getattr(Score, metric) for metric in METRICS]
+            )
+            .join(Submission, Submission.id == Score.submission_id)
+            .where(Score.status == ScoreStatus.SUCCESS,
+                   Submission.status == SubmissionStatus.PUBLISHED)
+        )
+        result = await session.exec(query)
+        rows = result.all()
+
+        submissions = {}
+        for row in rows:
+            submissions.setdefault(row[1], dict(
+                zip(SUBMISSION_FIELDS, row[1:1 + len(SUBMISSION_FIELDS)])))
+        submission_ids = np.array(sorted(submissions), dtype=np.int64)
+        dataset_ids = np.unique(np.array([row[0] for row in rows], dtype=np.int64))
+
+        values = np.full((len(submission_ids), len(dataset_ids), len(METRICS)), np.nan)
+        scored = np.zeros((len(submission_ids), len(dataset_ids)), dtype=bool)
+        if rows:
+            submission_index = np.searchsorted(
+                submission_ids, np.array([row[1] for row in rows], dtype=np.int64))
+            dataset_index = np.searchsorted(
+                dataset_ids, np.array([row[0] for row in rows], dtype=np.int64))
+            values[submission_index, dataset_index] = np.array(
+                [row[1 + len(SUBMISSION_FIELDS):] for row in rows], dtype=float)
+            scored[submission_index, dataset_index] = True
+
+        return cls([submissions[submission_id] for submission_id in submission_ids], dataset_ids, values, scored)
+
+    def rank(self, weight_vector: np.ndarray, dataset_id: int | None, limit: int | None = None) -> List[Dict[str, Any]]:
+        if dataset_id is None:
+            means, candidates = self.global_means, self.global_scored
+        else:
+            column = np.searchsorted(self.dataset_ids, dataset_id)
+            if column == len(self.dataset_ids) or self.dataset_ids[column] != dataset_id:
+                return []
+            means, candidates = self.dataset_means[:, column], self.scored[:, column]
+
+        candidates = np.flatnonzero(candidates)
+        weighted_means = means[candidates] @ weight_vector
+        order = np.argsort(-weighted_means, kind="stable")[:limit]
+
+        ranked = []
+        for position in order:
+            row = candidates[position]
+            ranked.append({
+                **self.submissions[row],
+                **dict(zip(METRICS, means[row].tolist())),
+                "weighted_mean": float(weighted_means[position])
+            })
+        return ranked
+
+
+class ScoreMatrixCache:
+    """Per-process ScoreMatrix, invalidated by messages on `entity_updates`.
+
+    While the Redis listener is down the matrix is reloaded on every read,
+    and it is always reloaded after SCORE_MATRIX_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self._matrix: ScoreMatrix | None = None
+        self._loaded_at = 0.0
+        self._stale = True
+        self._listener = None
+        self._lock: asyncio.Lock | None = None
+
+    def invalidate(self, *_) -> None:
+        self._stale = True
+
+    def _on_listener_error(self, _exc, pubsub, thread) -> None:
+        self._stale = True
+        self._listener = None
+        thread.stop()
+        pubsub.close()
+
+    def _listening(self) -> bool:
+        if self._listener is None or not self._listener.is_alive():
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{"entity_updates": self.invalidate})
+                self._listener = pubsub.run_in_thread(
+                    sleep_time=1, daemon=True, exception_handler=self._on_listener_error)
+                self._stale = True
+            except RedisError:
+                self._listener = None
+            return False
+        return True
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._loaded_at > settings.SCORE_MATRIX_TTL_SECONDS
+
+    async def get(self, session: SessionDep) -> ScoreMatrix:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._listening() or self._stale or self._matrix is None or self._expired():
+                self._stale = False
+                self._matrix = await ScoreMatrix.load(session)
+                self._loaded_at = time.monotonic()
+            return self._matrix
+
+
+cache = ScoreMatrixCache()
+
+
+def weight_vector(metric_weights: Dict[str, float]) -> np.ndarray:
+    vector = np.array([metric_weights.get(metric, 0.0)
+                      for metric in METRICS], dtype=float)
+    return vector / vector.sum()
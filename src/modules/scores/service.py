@@ -1,12 +1,16 @@
 import asyncio
-from typing import List
+from typing import Any, Dict, List, Tuple
 
 import redis
-from sqlmodel import func
+from redis.exceptions import RedisError
+from sqlalchemy import tuple_
+from sqlmodel import delete, desc, func, insert, select
 
 from src.core.config import settings
+from src.core.database.loader import clear_loaders
 from src.core.deps import SessionDep
-from src.modules.scores import model, schema
+from src.modules.scores import model, rank_index, schema
+from src.modules.submission.model import Submission, SubmissionStatus
 
 redis_client = redis.Redis(host=settings.REDIS_HOST,
                            port=settings.REDIS_PORT, password=settings.REDIS_PASSWORD, db=1)
@@ -15,6 +19,13 @@ redis_client = redis.Redis(host=settings.REDIS_HOST,
 # -- UTILS SERVICES -- #
 
 
+def publish_entity_update(submission_id: int) -> None:
+    try:
+        redis_client.publish("entity_updates", str(submission_id))
+    except RedisError:
+        pass
+
+
 async def check_score(session: SessionDep, **kwargs) -> bool:
     return await model.Score.exists(session, **kwargs)
 
@@ -26,6 +37,26 @@ async def create_score(session: SessionDep, score_in: schema.ScoreCreate) -> Non
     await model.Score.create(session, **score_in.model_dump())
 
 
+async def replace_scores(session: SessionDep, scores_in: List[schema.ScoreCreate]) -> List[model.Score]:
+    """Replaces the scores of many (dataset, submission) pairs by new, in
+    progress ones, with one DELETE and one INSERT statement."""
+    if not scores_in:
+        return []
+    pairs = [(score_in.dataset_id, score_in.submission_id) for score_in in scores_in]
+    await session.exec(delete(model.Score).where(
+        tuple_(model.Score.dataset_id, model.Score.submission_id).in_(pairs)))
+    result = await session.exec(
+        insert(model.Score).values([score_in.model_dump() for score_in in scores_in]).returning(model.Score))
+    scores = list(result.scalars())
+    await session.commit()
+    clear_loaders(session, model.Score)
+
+    rank_index.remove_scores(pairs)
+    for submission_id in {submission_id for _, submission_id in pairs}:
+        publish_entity_update(submission_id)
+    return scores
+
+
 # -- READ SERVICES -- #
 
 
@@ -42,10 +73,23 @@ async def get_all_scores(session: SessionDep, dataset_id: int | None, submission
     return await model.Score.get_multi(**params)
 
 
+async def get_scores_page(session: SessionDep, dataset_id: int | None, submission_id: int | None, status: model.ScoreStatus | None, cursor: str | None, limit: int) -> Tuple[List[schema.ScoreOut], str | None]:
+    filters = {
+        "dataset_id": dataset_id,
+        "submission_id": submission_id,
+        "status": status
+    }
+    return await model.Score.get_page(session, cursor=cursor, limit=limit, **{key: value for key, value in filters.items() if value is not None})
+
+
 async def get_score_details(session: SessionDep, **kwargs) -> model.Score | None:
     return await model.Score.get(session, **kwargs)
 
 
+async def get_submission_scores_by_dataset(session: SessionDep, submission_id: int, dataset_ids: List[int]) -> List[model.Score | None]:
+    return await model.Score.load_many(session, dataset_ids, key="dataset_id", submission_id=submission_id)
+
+
 async def get_all_grouped_scores_by_submission(session: SessionDep, limit: int | None, dataset_id: int | None) -> List[schema.GroupedSubmissionScoresOut]:
     filters = {
         "status": model.ScoreStatus.SUCCESS,
@@ -69,6 +113,82 @@ async def get_all_grouped_scores_by_submission(session: SessionDep, limit: int |
     return grouped_scores
 
 
+def _metric_averages() -> Dict[str, Any]:
+    return {
+        field: func.coalesce(func.avg(getattr(model.Score, field)), 0)
+        for field in model.weights
+    }
+
+
+def weighted_mean_expression(metrics: Dict[str, Any]) -> Any:
+    weighted_mean = None
+    for field, weight in model.weights.items():
+        term = metrics[field] * weight
+        weighted_mean = term if weighted_mean is None else weighted_mean + term
+    return weighted_mean
+
+
+def published_scores_query(query: Any, dataset_id: int | None) -> Any:
+    query = (
+        query
+        .select_from(model.Score)
+        .join(Submission, Submission.id == model.Score.submission_id)
+        .where(model.Score.status == model.ScoreStatus.SUCCESS,
+               Submission.status == SubmissionStatus.PUBLISHED)
+    )
+    if dataset_id is not None:
+        query = query.where(model.Score.dataset_id == dataset_id)
+    return query
+
+
+async def get_leaderboard(session: SessionDep, limit: int | None, dataset_id: int | None) -> List[Dict[str, Any]]:
+    metrics = _metric_averages()
+    weighted_mean = weighted_mean_expression(metrics)
+
+    query = published_scores_query(
+        select(
+            Submission.id,
+            Submission.title,
+            Submission.accessor,
+            Submission.resource_title,
+            Submission.resource_url,
+            Submission.repository_url,
+            *[metric.label(field) for field, metric in metrics.items()],
+            weighted_mean.label("weighted_mean")
+        ),
+        dataset_id
+    ).group_by(Submission.id).order_by(desc("weighted_mean"), Submission.id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    result = await session.exec(query)
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def get_submission_ranks(session: SessionDep, submission_ids: List[int] | None, dataset_id: int | None) -> Dict[int, int]:
+    weighted_mean = weighted_mean_expression(_metric_averages())
+    ranking = published_scores_query(
+        select(
+            model.Score.submission_id,
+            func.rank().over(order_by=weighted_mean.desc()).label("rank")
+        ),
+        dataset_id
+    ).group_by(model.Score.submission_id).subquery()
+
+    query = select(ranking.c.submission_id, ranking.c.rank)
+    if submission_ids is not None:
+        query = query.where(ranking.c.submission_id.in_(submission_ids))
+    result = await session.exec(query)
+    return {submission_id: rank for submission_id, rank in result.all()}
+
+
+async def get_ranked_dataset_ids(session: SessionDep) -> List[int]:
+    query = published_scores_query(
+        select(model.Score.dataset_id), dataset_id=None).distinct()
+    result = await session.exec(query)
+    return result.all()
+
+
 async def stream_submission_events(submission_id):
     pubsub = redis_client.pubsub()
     pubsub.subscribe("entity_updates")
@@ -91,15 +211,24 @@ async def stream_submission_events(submission_id):
 
 async def update_score(session: SessionDep, old_score: model.Score, score_in: schema.ScoreUpdate) -> None:
     await old_score.update(session, **score_in.model_dump())
-    redis_client.publish("entity_updates", str(old_score.submission_id))
+    published = await Submission.exists(session, id=old_score.submission_id, status=SubmissionStatus.PUBLISHED)
+    if old_score.status == model.ScoreStatus.SUCCESS and published:
+        rank_index.index_score(old_score)
+    else:
+        rank_index.remove_score(old_score.dataset_id, old_score.submission_id)
+    publish_entity_update(old_score.submission_id)
 
 
 # -- DELETE SERVICES -- #
 
 
 async def delete_score(session: SessionDep, score_id: int) -> None:
-    await model.Score.delete(session, id=score_id)
+    score = await model.Score.delete(session, id=score_id)
+    rank_index.remove_score(score.dataset_id, score.submission_id)
+    publish_entity_update(score.submission_id)
 
 
 async def delete_all_submission_scores(session: SessionDep, submission_id: int) -> None:
     await model.Score.delete_multi(session, submission_id=submission_id)
+    rank_index.remove_submission(submission_id)
+    publish_entity_update(submission_id)
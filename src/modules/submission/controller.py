@@ -1,10 +1,8 @@
-from typing import List
+from typing import List, Tuple
 
 from fastapi import HTTPException, status
 
 from src.core.deps import SessionDep, UserDep
-from src.modules.dataset.controller import get_dataset_column, get_dataset_details
-from src.modules.scores.model import ScoreStatus
 from src.modules.scores.service import delete_all_submission_scores
 from src.modules.submission import model, schema, service
 from src.modules.user.model import Role
@@ -43,22 +41,22 @@ async def get_submission_details(session: SessionDep, user: UserDep, submission_
     return submission_record
 
 
-async def get_all_published_submissions(session: SessionDep) -> List[schema.SubmissionInfoListOut]:
-    return await service.get_all_submissions(session, user_id=None, submission_status=model.SubmissionStatus.PUBLISHED)
+async def get_all_published_submissions(session: SessionDep, cursor: str | None, limit: int) -> Tuple[List[schema.SubmissionInfoListOut], str | None]:
+    return await service.get_all_submissions(session, user_id=None, submission_status=model.SubmissionStatus.PUBLISHED, cursor=cursor, limit=limit)
 
 
-async def get_all_pending_submissions(session: SessionDep) -> List[schema.SubmissionInfoListOut]:
-    return await service.get_all_pending_submissions(session)
+async def get_all_pending_submissions(session: SessionDep, cursor: str | None, limit: int) -> Tuple[List[schema.SubmissionInfoListOut], str | None]:
+    return await service.get_all_pending_submissions(session, cursor=cursor, limit=limit)
 
 
-async def get_all_user_submissions(session: SessionDep, user: UserDep, user_id: int, submission_status: schema.SubmissionStatus | None) -> List[schema.SubmissionInfoListOut]:
+async def get_all_user_submissions(session: SessionDep, user: UserDep, user_id: int, submission_status: schema.SubmissionStatus | None, cursor: str | None, limit: int) -> Tuple[List[schema.SubmissionInfoListOut], str | None]:
     if user.id != user_id or user.role != Role.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail='Unauthorized'
         )
 
-    return await service.get_all_submissions(session, user_id=user_id, submission_status=submission_status)
+    return await service.get_all_submissions(session, user_id=user_id, submission_status=submission_status, cursor=cursor, limit=limit)
 
 
 async def get_submission_rank(session: SessionDep, submission_id: int) -> schema.SubmissionRankOut:
@@ -103,17 +101,8 @@ async def get_submission_results(session: SessionDep, user: UserDep, submission_
             detail='Unauthorized'
         )
 
-    scores_record = await scores_controller.get_all_scores(session, dataset_id=None, submission_id=submission_id, status=ScoreStatus.SUCCESS)
-    results = []
-    for item in scores_record:
-        item = item.model_dump()
-        dataset_accessor = await get_dataset_column(session, column="accessor", id=item["dataset_id"])
-        dataset = await get_dataset_details(session, dataset_accessor=dataset_accessor)
-        rank = await scores_controller.get_submission_rank_for_dataset(session, submission_id=submission_id, dataset_id=item["dataset_id"])
-        results.append(schema.SubmissionResultsOut(rank=rank,
-                                                   dataset_title=dataset.title, dataset_accessor=dataset_accessor, **item))
-
-    return results
+    results = await service.get_submission_results(session, submission_id=submission_id)
+    return [schema.SubmissionResultsOut(**item) for item in results]
 
 
 async def get_submission_test_records(session: SessionDep, submission_id: int) -> List[schema.SubmissionTestRecordOut]:
@@ -124,14 +113,14 @@ async def get_submission_test_records(session: SessionDep, submission_id: int) -
             detail='Submission not found'
         )
     dataset_records = await dataset_controller.get_all_datasets(session)
+    score_entries = await scores_controller.get_submission_scores_by_dataset(session, submission_id=submission_id, dataset_ids=[item.id for item in dataset_records])
     result = []
-    for item in dataset_records:
+    for item, score_entry in zip(dataset_records, score_entries):
 
         score_status = {
             "status": None,
             "status_message": None
         }
-        score_entry = await scores_controller.get_score_details_by_dataset_and_submission(session, dataset_id=item.id, submission_id=submission_id)
         if score_entry:
             score_status["status"] = score_entry.status
             score_status["status_message"] = score_entry.status_message
@@ -181,7 +170,7 @@ async def change_submission_status(session: SessionDep, submission_id: int, subm
         )
     if old_submission.status in [model.SubmissionStatus.ACCEPTED, model.SubmissionStatus.PUBLISHED] and submission_status.status not in [model.SubmissionStatus.ACCEPTED, model.SubmissionStatus.PUBLISHED]:
         service.remove_repo(old_submission.accessor)
-        delete_all_submission_scores(session, submission_id)
+        await delete_all_submission_scores(session, submission_id)
     await service.update_submission(session, old_submission=old_submission, submission_in=submission_status)
 
 
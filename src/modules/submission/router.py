@@ -2,9 +2,10 @@
 
 from typing import List
 
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Query, Request, Response, status
 
 from src.core.deps import AdminDep, SessionDep, UserDep
+from src.core.utils.pagination import set_next_link
 from src.modules.submission import controller, schema
 
 router = APIRouter(tags=['Submission'])
@@ -53,43 +54,52 @@ async def get_submission_details(session: SessionDep, user: UserDep, submission_
     status_code=status.HTTP_200_OK,
     response_model=List[schema.SubmissionInfoListOut]
 )
-async def get_all_published_submissions(session: SessionDep, user: UserDep) -> List[schema.SubmissionInfoListOut]:
+async def get_all_published_submissions(session: SessionDep, user: UserDep, request: Request, response: Response, cursor: str | None = None, limit: int = Query(100, ge=1, le=500)) -> List[schema.SubmissionInfoListOut]:
     """
     **Retrieve a list of all published Submissions**
 
     _Requires USER role_
 
-    Queries the database and returns a list of all Submissions that have PUBLISHED status.
+    Queries the database and returns a page of Submissions that have PUBLISHED status.
+    The next page is linked in the `Link` header.
     """
-    return await controller.get_all_published_submissions(session)
+    submissions, next_cursor = await controller.get_all_published_submissions(session, cursor, limit)
+    set_next_link(request, response, next_cursor)
+    return submissions
 
 
 @router.get(
     '/pending',
     status_code=status.HTTP_200_OK,
 )
-async def get_all_pending_submissions(session: SessionDep, user: AdminDep) -> List[schema.SubmissionInfoListOut]:
+async def get_all_pending_submissions(session: SessionDep, user: AdminDep, request: Request, response: Response, cursor: str | None = None, limit: int = Query(100, ge=1, le=500)) -> List[schema.SubmissionInfoListOut]:
     """
     **Retrieve a list of the Submissions with in review, request for changes or accepted status**
 
-    Queries the database and returns a list of all Submissions to be managed by Admin.
+    Queries the database and returns a page of Submissions to be managed by Admin.
+    The next page is linked in the `Link` header.
     """
-    return await controller.get_all_pending_submissions(session)
+    submissions, next_cursor = await controller.get_all_pending_submissions(session, cursor, limit)
+    set_next_link(request, response, next_cursor)
+    return submissions
 
 
 @router.get(
     '/user/{user_id}',
     status_code=status.HTTP_200_OK,
 )
-async def get_all_user_submissions(session: SessionDep, user: UserDep, user_id: int, submission_status: schema.SubmissionStatus | None = Query(None)) -> List[schema.SubmissionInfoListOut]:
+async def get_all_user_submissions(session: SessionDep, user: UserDep, request: Request, response: Response, user_id: int, submission_status: schema.SubmissionStatus | None = Query(None), cursor: str | None = None, limit: int = Query(100, ge=1, le=500)) -> List[schema.SubmissionInfoListOut]:
     """
     **Retrieve a list of the Submissions from the User specified**
 
     _Requires User role with the same ID as the User specified or Admin role_
 
-    Queries the database and returns a list of all Submissions of the current logged user.
+    Queries the database and returns a page of Submissions of the current logged user.
+    The next page is linked in the `Link` header.
     """
-    return await controller.get_all_user_submissions(session, user, user_id, submission_status)
+    submissions, next_cursor = await controller.get_all_user_submissions(session, user, user_id, submission_status, cursor, limit)
+    set_next_link(request, response, next_cursor)
+    return submissions
 
 
 @router.get(
@@ -1,11 +1,18 @@
 import os
 import shutil
-from typing import List
+from typing import Any, Dict, List, Tuple
 
 from git import Repo
+from sqlmodel import func, or_, select
 
 from src.core.config import settings
 from src.core.deps import SessionDep
+from src.modules.dataset.model import Dataset
+from src.modules.inference import result_cache
+from src.modules.scores import rank_index
+from src.modules.scores.model import Score, ScoreStatus, weights
+from src.modules.scores.service import (publish_entity_update,
+                                        weighted_mean_expression)
 from src.modules.submission import model, schema
 
 # -- UTILS SERVICES -- #
@@ -34,6 +41,7 @@ def clone_repo(accessor: str, repository_url: str) -> None:
     remove_repo(accessor)
     Repo.clone_from(
         url=f"https://github.com/{repository_url}.git", to_path=repo_dir)
+    result_cache.invalidate_model(accessor)
 
 
 # -- CREATE SERVICES -- #
@@ -54,10 +62,12 @@ async def get_submission_details(session: SessionDep, **kwargs) -> model.Submiss
     return result
 
 
-async def get_all_submissions(session: SessionDep, user_id: int | None, submission_status: model.SubmissionStatus | None) -> List[schema.SubmissionOut]:
+async def get_all_submissions(session: SessionDep, user_id: int | None, submission_status: model.SubmissionStatus | None, cursor: str | None, limit: int) -> Tuple[List[schema.SubmissionOut], str | None]:
     params = {
         "session": session,
-        "load_strategy": {"user": "selectin", "datasets": "selectin"}
+        "load_strategy": {"user": "selectin", "datasets": "selectin"},
+        "cursor": cursor,
+        "limit": limit
     }
 
     if user_id is not None:
@@ -65,14 +75,53 @@ async def get_all_submissions(session: SessionDep, user_id: int | None, submissi
     if submission_status is not None:
         params["status"] = submission_status
 
-    return await model.Submission.get_multi(**params)
+    return await model.Submission.get_page(**params)
+
+
+async def get_submission_results(session: SessionDep, submission_id: int) -> List[Dict[str, Any]]:
+    weighted_mean = weighted_mean_expression({
+        field: func.coalesce(getattr(Score, field), 0) for field in weights
+    })
+    scored_datasets = select(Score.dataset_id).where(
+        Score.submission_id == submission_id, Score.status == ScoreStatus.SUCCESS)
+    # The submission is ranked against the published ones even when it is not published itself
+    ranked_scores = (
+        select(
+            Score.dataset_id,
+            Score.submission_id,
+            *[getattr(Score, field) for field in weights],
+            func.rank().over(partition_by=Score.dataset_id,
+                             order_by=weighted_mean.desc()).label("rank")
+        )
+        .join(model.Submission, model.Submission.id == Score.submission_id)
+        .where(Score.status == ScoreStatus.SUCCESS,
+               Score.dataset_id.in_(scored_datasets),
+               or_(model.Submission.status == model.SubmissionStatus.PUBLISHED,
+                   Score.submission_id == submission_id))
+        .subquery()
+    )
+
+    query = (
+        select(
+            ranked_scores.c.rank,
+            Dataset.title.label("dataset_title"),
+            Dataset.accessor.label("dataset_accessor"),
+            *[getattr(ranked_scores.c, field) for field in weights]
+        )
+        .select_from(ranked_scores)
+        .join(Dataset, Dataset.id == ranked_scores.c.dataset_id)
+        .where(ranked_scores.c.submission_id == submission_id)
+        .order_by(Dataset.id)
+    )
+    result = await session.exec(query)
+    return [dict(row) for row in result.mappings().all()]
 
 
 # TODO: Not sure if this works
-async def get_all_pending_submissions(session: SessionDep) -> List[schema.SubmissionOut]:
+async def get_all_pending_submissions(session: SessionDep, cursor: str | None, limit: int) -> Tuple[List[schema.SubmissionOut], str | None]:
     pending_statuses = [model.SubmissionStatus.IN_REVIEW,
                         model.SubmissionStatus.REQUEST_FOR_CHANGES, model.SubmissionStatus.ACCEPTED]
-    return await model.Submission.get_multi(session, model.Submission.__table__.c.status.in_(pending_statuses), load_strategy={"user": "selectin", "datasets": "selectin"})
+    return await model.Submission.get_page(session, model.Submission.__table__.c.status.in_(pending_statuses), load_strategy={"user": "selectin", "datasets": "selectin"}, cursor=cursor, limit=limit)
 
 
 # -- UPDATE SERVICES -- #
@@ -84,7 +133,15 @@ async def update_submission(session: SessionDep, old_submission: model.Submissio
         submission_dict["accessor"] = submission_in.title.lower().replace(
             " ", "-")
 
-    return await old_submission.update(session, **submission_dict)
+    previous_status = old_submission.status
+    submission = await old_submission.update(session, **submission_dict)
+    if submission.status != previous_status:
+        if submission.status == model.SubmissionStatus.PUBLISHED:
+            await rank_index.index_submission(session, submission.id)
+        elif previous_status == model.SubmissionStatus.PUBLISHED:
+            rank_index.remove_submission(submission.id)
+        publish_entity_update(submission.id)
+    return submission
 
 
 # -- DELETE SERVICES -- #
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 from fastapi import HTTPException, status
 
@@ -60,8 +60,8 @@ async def update_user(session: SessionDep, user: model.User, user_id: int, user_
     return schema.UserOut(**user.model_dump())
 
 
-async def get_users(session: SessionDep) -> List[schema.UserOut]:
-    return await service.get_users(session)
+async def get_users(session: SessionDep, cursor: str | None, limit: int) -> Tuple[List[schema.UserOut], str | None]:
+    return await service.get_users(session, cursor=cursor, limit=limit)
 
 
 async def get_user_details(session: SessionDep, username: str) -> schema.UserOut:
@@ -2,9 +2,10 @@
 
 from typing import List
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, Request, Response, status
 
 from src.core.deps import AdminDep, SessionDep, UserDep
+from src.core.utils.pagination import set_next_link
 from src.modules.user import controller, schema
 
 router = APIRouter(tags=["User"])
@@ -46,15 +47,17 @@ async def update_user(session: SessionDep, user: UserDep, user_id: int, user_in:
     status_code=status.HTTP_200_OK,
     response_model=List[schema.UserOut]
 )
-async def get_users(session: SessionDep, user: AdminDep) -> List[schema.UserOut]:
+async def get_users(session: SessionDep, user: AdminDep, request: Request, response: Response, cursor: str | None = None, limit: int = Query(100, ge=1, le=500)) -> List[schema.UserOut]:
     """
     **Retrieve a list of all Users**
 
     _Requires ADMINISTRATOR role_
 
-    Queries the database and returns a list of Users.
+    Queries the database and returns a page of Users. The next page is linked in the `Link` header.
     """
-    return await controller.get_users(session)
+    users, next_cursor = await controller.get_users(session, cursor, limit)
+    set_next_link(request, response, next_cursor)
+    return users
 
 
 @router.get(
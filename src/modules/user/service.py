@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 from pydantic import BaseModel
 
@@ -24,5 +24,5 @@ async def update_user(session: SessionDep, old_user: model.User, user_in: BaseMo
     return await old_user.update(session, **user_in.model_dump(exclude_unset=True))
 
 
-async def get_users(session: SessionDep) -> List[schema.UserOut]:
-    return await model.User.get_multi(session)
+async def get_users(session: SessionDep, cursor: str | None, limit: int) -> Tuple[List[schema.UserOut], str | None]:
+    return await model.User.get_page(session, cursor=cursor, limit=limit)
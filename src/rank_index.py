@@ -0,0 +1,32 @@
+import asyncio
+
+from src.core.database.session import SessionLocal
+from src.core.utils.helpers import parse_rank_index_arguments
+from src.modules.scores import controller
+
+
+async def rebuild() -> None:
+    async with SessionLocal() as session:
+        indexed = await controller.rebuild_rank_index(session)
+        print(f"Indexed {indexed} scores")
+
+
+async def check() -> None:
+    async with SessionLocal() as session:
+        mismatches = await controller.check_rank_index(session)
+        for mismatch in mismatches:
+            print(f"dataset={mismatch.dataset_id} submission={mismatch.submission_id} "
+                  f"sql_rank={mismatch.sql_rank} index_rank={mismatch.index_rank}")
+        print(f"{len(mismatches)} mismatches")
+
+
+async def main() -> None:
+    args = parse_rank_index_arguments()
+    if args.check:
+        await check()
+    else:
+        await rebuild()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
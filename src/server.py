@@ -1,12 +1,26 @@
-from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, RedirectResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from src.core.config import settings
+from src.core.database.base_crud import InvalidCursor
+from src.core.database.query_stats import report, track_queries
 from src.core.utils.dynamic_router import Routers
+from src.modules.inference import service as inference_service
 from src.modules.modules import router_urls
 
-app = FastAPI(**settings.fastapi_kwargs)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    supervisor = asyncio.create_task(inference_service.supervise_jobs())
+    yield
+    supervisor.cancel()
+
+
+app = FastAPI(**settings.fastapi_kwargs, lifespan=lifespan)
 
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -17,11 +31,28 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Link", "X-Next-Cursor",
+                        "X-DB-Query-Count", "X-DB-Time-Ms"],
     )
 
 Routers(app, router_urls, prefix=settings.API_STR)()
 
 
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    with track_queries(f"{request.method} {request.url.path}") as stats:
+        response = await call_next(request)
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Time-Ms"] = f"{stats.duration * 1000:.3f}"
+    report(stats)
+    return response
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+
 @app.get("/", include_in_schema=False)
 def root():
     return RedirectResponse(url="/docs")
@@ -0,0 +1,24 @@
+import asyncio
+import logging
+import signal
+
+from src.core.config import settings
+from src.core.job_queue import evaluation_queue
+from src.core.utils.helpers import parse_worker_arguments
+from src.core.worker import Worker
+
+
+async def main() -> None:
+    args = parse_worker_arguments()
+    worker = Worker(evaluation_queue, concurrency=args.concurrency or settings.WORKER_CONCURRENCY)
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, worker.stop)
+
+    await worker.run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
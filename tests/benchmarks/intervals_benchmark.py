@@ -0,0 +1,59 @@
+"""Microbenchmark of the violence interval extraction.
+
+Compares the vectorized extraction with the former frame by frame loop on
+synthetic multi-hour prediction arrays, loaded memory-mapped like
+`get_workflow_result` does:
+
+    python -m tests.benchmarks.intervals_benchmark [hours ...]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.modules.inference.service import extract_intervals
+from tests.inference_test import reference_intervals
+
+SEGMENT_SECONDS = 0.96
+
+
+def synthetic_predictions(hours: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    size = int(hours * 3600 / SEGMENT_SECONDS)
+    # Runs of 1 to 10 segments, mostly non violent
+    lengths = rng.integers(1, 11, size // 5 + 1)
+    values = (rng.random(lengths.size) < 0.3).astype(np.int64)
+    return np.repeat(values, lengths)[:size]
+
+
+def timed(function, *args, repeat=5):
+    """Result and best wall time out of `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main(hours_list):
+    with tempfile.TemporaryDirectory() as directory:
+        for hours in hours_list:
+            path = Path(directory) / f"results_{hours}.npy"
+            np.save(path, synthetic_predictions(hours))
+
+            vectorized, vectorized_time = timed(
+                extract_intervals, np.load(path, mmap_mode="r"), SEGMENT_SECONDS)
+            loop, loop_time = timed(reference_intervals, np.load(path), SEGMENT_SECONDS)
+            assert vectorized == loop
+
+            print(f"{hours:>5}h  {np.load(path, mmap_mode='r').size:>9} segments  "
+                  f"{len(vectorized['violence_intervals_frames']):>7} intervals  "
+                  f"loop {loop_time:8.3f}s  vectorized {vectorized_time:8.3f}s  "
+                  f"x{loop_time / vectorized_time:.1f}")
+
+
+if __name__ == "__main__":
+    main([float(hours) for hours in sys.argv[1:]] or [1, 12, 48])
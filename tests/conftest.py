@@ -2,6 +2,7 @@ import asyncio
 import os
 
 import httpx
+import pytest
 import pytest_asyncio
 from dotenv import find_dotenv, load_dotenv
 from sqlalchemy.ext.asyncio import create_async_engine
@@ -11,6 +12,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core.database.base_crud import Base
+from src.core.database.query_stats import instrument
 from src.core.deps import get_db
 from src.modules.user.model import User
 from src.server import app
@@ -23,6 +25,7 @@ TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
 @pytest_asyncio.fixture(scope="function")
 async def engine() -> AsyncEngine:
     engine = create_async_engine(TEST_DATABASE_URL, echo=True)
+    instrument(engine)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
@@ -118,3 +121,19 @@ async def admin_user(async_client, session):
 
     token = login.json()['access_token']
     return token
+
+
+@pytest.fixture
+def assert_query_budget():
+    """Fails when a response ran more SQL statements than `max_queries`.
+
+    Budgets should not depend on the number of rows involved, so that a
+    query issued per row (N+1) is caught as soon as the data grows.
+    """
+    def _assert_query_budget(response: httpx.Response, max_queries: int):
+        count = int(response.headers["X-DB-Query-Count"])
+        assert count <= max_queries, (
+            f"{response.request.method} {response.request.url.path} ran "
+            f"{count} queries, budget is {max_queries}"
+        )
+    return _assert_query_budget
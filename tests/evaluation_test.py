@@ -0,0 +1,246 @@
+import asyncio
+import os
+import shutil
+
+import numpy as np
+import pytest
+from git import Repo
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.core.config import settings
+from src.core.execution_backend import ExecutionBackend, WorkflowEvent
+from src.core.utils.fingerprint import directory_checksum
+from src.core.utils.staging import stage_tree
+from src.core.worker import PermanentJobError
+from src.core.workflow_scheduler import MemorySchedulerStore, Priority, WorkflowScheduler
+from src.modules.dataset.model import Dataset
+from src.modules.evaluation import controller, schema, service
+from src.modules.scores import service as scores_service
+from src.modules.scores.model import Score, ScoreStatus
+from src.modules.submission.model import Submission
+from src.modules.user.model import User
+
+NUMBER_OF_EVALUATIONS = 8
+
+
+class FakeBackend(ExecutionBackend):
+    """Keeps every workflow running until all of them are being watched, and
+    records how many pooled connections are checked out at that point."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.watching = 0
+        self.all_watching = asyncio.Event()
+        self.checked_out = []
+
+    async def subscribe(self, workflow_name):
+        yield WorkflowEvent("workflow", workflow_name, "Running")
+        self.watching += 1
+        if self.watching == NUMBER_OF_EVALUATIONS:
+            self.checked_out.append(self.pool.checkedout())
+            self.all_watching.set()
+        await self.all_watching.wait()
+        yield WorkflowEvent("workflow", workflow_name, "Succeeded")
+
+    async def submit(self, run):
+        pass
+
+    async def terminate(self, workflow_name):
+        pass
+
+    async def delete(self, workflow_name):
+        pass
+
+    async def read_logs(self, pod_name, container=None):
+        return ""
+
+
+@pytest.mark.asyncio
+async def test_evaluations_do_not_hold_connections(engine, monkeypatch, tmp_path):
+    TestSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with TestSessionLocal() as session:
+        session.add(User(id=1, username="testuser", email="test@user.com", password="password"))
+        session.add(Submission(id=1, title="Test Submission", accessor="test-submission", authors="Test Author",
+                               description="", repository_url="test-repo.com", resource_title="Test Resource",
+                               resource_url="test-resource.com", modality="rgb_only", user_id=1))
+        for dataset_id in range(1, NUMBER_OF_EVALUATIONS + 1):
+            session.add(Dataset(id=dataset_id, title=f"Dataset {dataset_id}",
+                        accessor=f"dataset-{dataset_id}", description=""))
+        await session.commit()
+        for dataset_id in range(1, NUMBER_OF_EVALUATIONS + 1):
+            session.add(Score(id=dataset_id, dataset_id=dataset_id, submission_id=1))
+        await session.commit()
+
+    for dataset_id in range(1, NUMBER_OF_EVALUATIONS + 1):
+        dataset_path = tmp_path / "datasets" / f"dataset-{dataset_id}"
+        dataset_path.mkdir(parents=True)
+        np.save(dataset_path / "gt.npy", np.array([0, 1, 1, 0, 1]))
+        np.save(dataset_path / "results.npy", np.array([0, 1, 0, 0, 1]))
+
+    backend = FakeBackend(engine.pool)
+    monkeypatch.setattr(service, "SessionLocal", TestSessionLocal)
+    monkeypatch.setattr(service, "execution_backend", backend)
+    monkeypatch.setattr(service, "workflow_scheduler", WorkflowScheduler(MemorySchedulerStore(), max_in_flight=NUMBER_OF_EVALUATIONS))
+    # The rank index is best-effort and there is no Redis to update here
+    monkeypatch.setattr(scores_service.rank_index, "index_score", lambda score: None)
+    monkeypatch.setattr(scores_service.rank_index, "remove_score", lambda dataset_id, submission_id: None)
+    monkeypatch.setattr(scores_service, "publish_entity_update", lambda submission_id: None)
+    monkeypatch.setattr(settings, "DATASETS_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setattr(settings, "TMP_DIR", str(tmp_path / "tmp"))
+
+    await asyncio.gather(*[
+        service.submit_evaluation(f"dataset-{score_id}", "test-submission", score_id)
+        for score_id in range(1, NUMBER_OF_EVALUATIONS + 1)
+    ])
+
+    assert backend.checked_out == [0]
+    assert engine.pool.checkedout() == 0
+
+    async with TestSessionLocal() as session:
+        scores = await Score.get_multi(session)
+    assert [score.status for score in scores] == [ScoreStatus.SUCCESS] * NUMBER_OF_EVALUATIONS
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("submission_accessor, error", [
+    ("missing-submission", "Submission missing-submission not found"),
+    ("test-submission", "Dataset dataset-1 not found"),
+])
+async def test_submit_evaluation_fails_permanently(engine, monkeypatch, tmp_path, submission_accessor, error):
+    TestSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with TestSessionLocal() as session:
+        session.add(User(id=1, username="testuser", email="test@user.com", password="password"))
+        session.add(Submission(id=1, title="Test Submission", accessor="test-submission", authors="Test Author",
+                               description="", repository_url="test-repo.com", resource_title="Test Resource",
+                               resource_url="test-resource.com", modality="rgb_only", user_id=1))
+        await session.commit()
+    monkeypatch.setattr(service, "SessionLocal", TestSessionLocal)
+    monkeypatch.setattr(settings, "DATASETS_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setattr(settings, "TMP_DIR", str(tmp_path / "tmp"))
+
+    with pytest.raises(PermanentJobError, match=error):
+        await service.submit_evaluation("dataset-1", submission_accessor, 1)
+
+    assert not (tmp_path / "tmp").exists()
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink", "copy"])
+def test_stage_dataset(tmp_path, mode):
+    dataset_path = tmp_path / "dataset"
+    (dataset_path / "rgb").mkdir(parents=True)
+    np.save(dataset_path / "gt.npy", np.array([0, 1, 1, 0, 1]))
+    np.save(dataset_path / "rgb" / "video.npy", np.zeros((4, 1024)))
+    (dataset_path / "rgb.list").write_text("rgb/video.npy\n")
+
+    data_path = tmp_path / "run"
+    stage_tree(dataset_path, data_path, private=service.RUN_FILES, mode=mode)
+
+    assert np.array_equal(np.load(data_path / "rgb" / "video.npy"), np.zeros((4, 1024)))
+    linked = os.path.samefile(data_path / "gt.npy", dataset_path / "gt.npy")
+    assert linked == (mode != "copy")
+    assert not os.path.samefile(data_path / "rgb.list", dataset_path / "rgb.list")
+
+    # Runs write into private directories and copies only
+    (data_path / "rgb.list").write_text("")
+    np.save(data_path / "rgb" / "features.npy", np.ones(3))
+    assert (dataset_path / "rgb.list").read_text() == "rgb/video.npy\n"
+    assert not (dataset_path / "rgb" / "features.npy").exists()
+
+    shutil.rmtree(data_path)
+    assert np.array_equal(np.load(dataset_path / "gt.npy"), [0, 1, 1, 0, 1])
+
+
+@pytest.mark.asyncio
+async def test_unchanged_evaluation_is_reused(session, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "DATASETS_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setattr(settings, "INFER_DIR", str(tmp_path / "models"))
+    dataset_path = tmp_path / "datasets" / "dataset-1"
+    dataset_path.mkdir(parents=True)
+    np.save(dataset_path / "gt.npy", np.array([0, 1, 1, 0, 1]))
+    repo = Repo.init(tmp_path / "models" / "test-submission")
+    (tmp_path / "models" / "test-submission" / "model.py").write_text("")
+    repo.index.add(["model.py"])
+    repo.index.commit("Initial commit")
+
+    model_revision, dataset_checksum = service.get_fingerprints("dataset-1", "test-submission")
+    assert model_revision == repo.head.commit.hexsha
+    assert dataset_checksum == directory_checksum(str(dataset_path))
+
+    session.add(User(id=1, username="testuser", email="test@user.com", password="password"))
+    session.add(Submission(id=1, title="Test Submission", accessor="test-submission", authors="Test Author",
+                           description="", repository_url="test-repo.com", resource_title="Test Resource",
+                           resource_url="test-resource.com", modality="rgb_only", user_id=1))
+    session.add(Dataset(id=1, title="Dataset 1", accessor="dataset-1", description=""))
+    session.add(Score(id=1, dataset_id=1, submission_id=1, status=ScoreStatus.SUCCESS, f1=0.8,
+                      model_revision=model_revision, dataset_checksum=dataset_checksum))
+    await session.commit()
+
+    evaluation_in = schema.EvaluationCreate(dataset_accessor="dataset-1", submission_accessor="test-submission")
+    evaluation = await controller.submit_evaluation(session, evaluation_in)
+    assert evaluation == schema.EvaluationOut(score_id=1, reused=True)
+    assert (await Score.get(session, id=1)).f1 == 0.8
+
+    # Any change to the dataset or to the repository invalidates the score
+    np.save(dataset_path / "gt.npy", np.array([0, 1, 1, 1, 1]))
+    score = await Score.get(session, id=1)
+    assert not service.is_reusable(score, *service.get_fingerprints("dataset-1", "test-submission"))
+    repo.index.commit("Change the model")
+    assert not service.is_reusable(score, repo.head.commit.hexsha, dataset_checksum)
+
+
+class FakeJobQueue:
+    def __init__(self):
+        self.enqueued = []
+
+    async def enqueue_many(self, function, args_list, on_failure=None):
+        self.enqueued.extend(args_list)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("number_of_submissions", [2, 8])
+async def test_submit_evaluation_matrix(async_client, admin_user, session, monkeypatch, tmp_path, assert_query_budget, number_of_submissions):
+    monkeypatch.setattr(settings, "DATASETS_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setattr(settings, "INFER_DIR", str(tmp_path / "models"))
+    monkeypatch.setattr(service, "model_revision", lambda accessor: f"revision-{accessor}")
+    monkeypatch.setattr(scores_service.rank_index, "remove_scores", lambda pairs: None)
+    monkeypatch.setattr(scores_service, "publish_entity_update", lambda submission_id: None)
+    queue = FakeJobQueue()
+    monkeypatch.setattr(controller, "evaluation_queue", queue)
+    (tmp_path / "datasets" / "dataset-1").mkdir(parents=True)
+    np.save(tmp_path / "datasets" / "dataset-1" / "gt.npy", np.array([0, 1, 1, 0, 1]))
+
+    user = await User.get(session, username="admin")
+    session.add(Dataset(id=1, title="Dataset 1", accessor="dataset-1", description=""))
+    for submission_id in range(1, number_of_submissions + 2):
+        # The last one is not published and is left out
+        session.add(Submission(id=submission_id, title=f"Submission {submission_id}", accessor=f"submission-{submission_id}",
+                               authors="Test Author", description="", repository_url="test-repo.com",
+                               resource_title="Test Resource", resource_url="test-resource.com", modality="rgb_only",
+                               user_id=user.id, status="published" if submission_id <= number_of_submissions else "draft"))
+    # Unchanged since its last evaluation, and an outdated one
+    session.add(Score(id=100, dataset_id=1, submission_id=1, status=ScoreStatus.SUCCESS,
+                      model_revision="revision-submission-1", dataset_checksum=directory_checksum(str(tmp_path / "datasets" / "dataset-1"))))
+    session.add(Score(id=101, dataset_id=1, submission_id=2, status=ScoreStatus.SUCCESS,
+                      model_revision="old-revision", dataset_checksum="old-checksum"))
+    await session.commit()
+
+    response = await async_client.post("/api/evaluation/matrix", json={"dataset_accessor": "dataset-1"},
+                                       headers={"Authorization": f"Bearer {admin_user}"})
+    assert response.status_code == 200
+    assert_query_budget(response, 8)
+    evaluation = response.json()
+    assert evaluation["reused"] == [100]
+    assert len(evaluation["scheduled"]) == number_of_submissions - 1
+
+    scores = await Score.get_multi(session, Score.id.in_(evaluation["scheduled"]))
+    assert sorted(score.submission_id for score in scores) == list(range(2, number_of_submissions + 1))
+    assert all(score.status == ScoreStatus.IN_PROGRESS for score in scores)
+    assert sorted(queue.enqueued) == sorted(["dataset-1", f"submission-{score.submission_id}", score.id, Priority.BACKFILL] for score in scores)
+
+
+@pytest.mark.asyncio
+async def test_submit_evaluation_matrix_requires_one_axis(async_client, admin_user):
+    response = await async_client.post("/api/evaluation/matrix", json={"dataset_accessor": "dataset-1", "submission_accessor": "submission-1"},
+                                       headers={"Authorization": f"Bearer {admin_user}"})
+    assert response.status_code == 422
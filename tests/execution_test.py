@@ -0,0 +1,187 @@
+import asyncio
+import sys
+from contextlib import aclosing
+
+import numpy as np
+import pytest
+
+from src.core import workflow_informer
+from src.core.config import settings
+from src.core.execution_backend import (ArgoBackend, ExecutionError,
+                                        WorkflowEvent, WorkflowRun)
+from src.core.local_backend import LocalBackend
+from src.core.workflow_client import ApiException
+from src.core.workflow_informer import WorkflowInformer
+
+ENTRYPOINT = """
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+parser = argparse.ArgumentParser()
+parser.add_argument("template")
+parser.add_argument("--featureType")
+parser.add_argument("--dataPath")
+parser.add_argument("--model")
+parser.add_argument("--modelPath")
+args = parser.parse_args()
+
+if args.featureType == "fail":
+    raise SystemExit("model crashed")
+if args.featureType == "slow":
+    time.sleep(60)
+print(f"running {args.template}")
+np.save(Path(args.dataPath) / "results.npy", np.array([0, 1, 1]))
+"""
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TMP_DIR", str(tmp_path / "tmp"))
+    model_path = tmp_path / "models" / "test-model"
+    model_path.mkdir(parents=True)
+    (model_path / "main.py").write_text(ENTRYPOINT)
+    return LocalBackend(workers=2, entrypoint="main.py", python=sys.executable)
+
+
+def evaluation_run(tmp_path, workflow_name, feature_type="rgb_only"):
+    data_path = tmp_path / "tmp" / workflow_name
+    data_path.mkdir(parents=True)
+    return WorkflowRun(name=workflow_name, template="evaluation-workflow", parameters={
+        "featureType": feature_type,
+        "dataPath": str(data_path),
+        "model": "test-model",
+        "modelPath": str(tmp_path / "models"),
+    })
+
+
+async def final_phase(backend, workflow_name):
+    events = []
+    async with aclosing(backend.subscribe(workflow_name)) as subscription:
+        async for event in subscription:
+            events.append(event)
+            if event.kind == "workflow" and event.phase not in ("Pending", "Running"):
+                return event.phase, events
+
+
+@pytest.mark.asyncio
+async def test_local_run_writes_result(backend, tmp_path):
+    await backend.submit(evaluation_run(tmp_path, "workflow-1"))
+
+    phase, _ = await final_phase(backend, "workflow-1")
+
+    assert phase == "Succeeded"
+    assert np.load(backend.result_path("workflow-1")).tolist() == [0, 1, 1]
+    assert await backend.read_logs("workflow-1") == "running evaluation-workflow\n"
+
+
+@pytest.mark.asyncio
+async def test_local_run_failure_reports_pod_logs(backend, tmp_path):
+    await backend.submit(evaluation_run(tmp_path, "workflow-1", feature_type="fail"))
+
+    phase, events = await final_phase(backend, "workflow-1")
+
+    assert phase == "Failed"
+    assert ("pod", "workflow-1", "Failed") in events
+    assert "model crashed" in await backend.read_logs("workflow-1")
+
+
+@pytest.mark.asyncio
+async def test_local_runs_are_bounded_and_terminated(backend, tmp_path):
+    for index in range(3):
+        await backend.submit(evaluation_run(tmp_path, f"workflow-{index}", feature_type="slow"))
+    phases = []
+    for _ in range(100):
+        phases = sorted(backend._runs[f"workflow-{index}"].phase for index in range(3))
+        if phases == ["Pending", "Running", "Running"]:
+            break
+        await asyncio.sleep(0.05)
+    assert phases == ["Pending", "Running", "Running"]
+
+    for index in range(3):
+        await backend.terminate(f"workflow-{index}")
+        phase, _ = await final_phase(backend, f"workflow-{index}")
+        assert phase == "Failed"
+
+    await backend.delete("workflow-0")
+    with pytest.raises(ExecutionError):
+        await backend.read_logs("workflow-0")
+
+
+@pytest.mark.asyncio
+async def test_local_submit_requires_entrypoint(backend, tmp_path):
+    run = evaluation_run(tmp_path, "workflow-1")
+    run.parameters["model"] = "missing-model"
+
+    with pytest.raises(ExecutionError):
+        await backend.submit(run)
+
+
+def test_argo_manifest():
+    run = WorkflowRun(name="workflow-1", template="inference-workflow", parameters={"model": "test-model"})
+
+    manifest = ArgoBackend().manifest(run)
+
+    assert manifest["metadata"] == {"name": "workflow-1", "namespace": settings.ARGO_NAMESPACE}
+    assert manifest["spec"] == {
+        "workflowTemplateRef": {"name": "inference-workflow"},
+        "arguments": {"parameters": [{"name": "model", "value": "test-model"}]},
+    }
+
+
+class FakeWorkflowClient:
+    def __init__(self, workflows):
+        self.workflows = workflows
+
+    async def get_workflow(self, workflow_name):
+        if workflow_name not in self.workflows:
+            raise ApiException(status=404, reason="Not Found")
+        return {"metadata": {"name": workflow_name}, "status": {"phase": self.workflows[workflow_name]}}
+
+    async def get_workflow_phase(self, workflow_name):
+        return (await self.get_workflow(workflow_name))["status"]["phase"]
+
+
+def workflow(workflow_name, phase):
+    return {"metadata": {"name": workflow_name}, "status": {"phase": phase}}
+
+
+@pytest.mark.asyncio
+async def test_informer_ends_subscriptions_of_workflows_deleted_while_disconnected():
+    client = FakeWorkflowClient({"workflow-1": "Running", "workflow-2": "Running"})
+    informer = WorkflowInformer(client)
+    # As if the watches were started, they are fed by hand here
+    informer._loop = asyncio.get_running_loop()
+    informer._apply("workflow", "ADDED", workflow("workflow-1", "Running"))
+    subscriptions = {name: informer.subscribe(name) for name in ("workflow-1", "workflow-2")}
+    for subscription in subscriptions.values():
+        assert (await anext(subscription)).phase == "Running"
+
+    # workflow-1 is deleted while the watch is down, workflow-2 is created
+    # after the new list was taken
+    del client.workflows["workflow-1"]
+    await informer._forget_missing(set())
+
+    assert await anext(subscriptions["workflow-1"]) == WorkflowEvent("workflow", "workflow-1", "Deleted")
+    assert "workflow-1" not in informer._workflows
+    informer._apply("workflow", "MODIFIED", workflow("workflow-2", "Succeeded"))
+    assert (await anext(subscriptions["workflow-2"])).phase == "Succeeded"
+    for subscription in subscriptions.values():
+        await subscription.aclose()
+
+
+@pytest.mark.asyncio
+async def test_informer_evicts_finished_workflows(monkeypatch):
+    monkeypatch.setattr(workflow_informer, "FINISHED_GRACE_SECONDS", 0.01)
+    informer = WorkflowInformer(FakeWorkflowClient({}))
+    informer._loop = asyncio.get_running_loop()
+
+    informer._apply("workflow", "ADDED", workflow("workflow-1", "Running"))
+    informer._apply("workflow", "MODIFIED", workflow("workflow-1", "Succeeded"))
+    informer._apply("workflow", "ADDED", workflow("workflow-2", "Running"))
+    assert informer._workflows == {"workflow-1": "Succeeded", "workflow-2": "Running"}
+    await asyncio.sleep(0.05)
+
+    assert informer._workflows == {"workflow-2": "Running"}
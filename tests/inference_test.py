@@ -0,0 +1,483 @@
+import asyncio
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.core.config import settings
+from src.core.execution_backend import ExecutionBackend, WorkflowEvent
+from src.core.workflow_scheduler import (MemorySchedulerStore, Priority,
+                                        SlotRequest, WorkflowScheduler)
+from src.modules.inference import result_cache, service
+from src.modules.inference.model import (InferenceJob, InferenceJobStatus,
+                                         utc_now)
+from src.modules.inference.segments import (VideoSegment, merge_results,
+                                            plan_segments, probe_duration)
+from src.modules.inference.service import extract_intervals, parse_time
+from src.modules.submission.model import Submission, SubmissionStatus
+from src.modules.user.model import Role, User
+
+
+def reference_intervals(pred_binary, segment_seconds=0.96):
+    """Frame by frame extraction the vectorized one must match exactly."""
+    pred_binary = list(pred_binary)
+    result = {
+        "contains_violence": any(pred == 1 for pred in pred_binary),
+        "violence_intervals_seconds": [],
+        "violence_intervals_frames": [],
+    }
+    video_duration = int(np.ceil(len(pred_binary) * segment_seconds))
+    start_idx = None
+    for i, pred in enumerate(pred_binary):
+        if pred == 1:
+            if start_idx is None:
+                start_idx = i
+        elif start_idx is not None:
+            result["violence_intervals_frames"].append(
+                [start_idx, i - 1] if i - 1 != start_idx else [start_idx])
+            result["violence_intervals_seconds"].append([parse_time(
+                int(np.floor((start_idx + 1) * segment_seconds))), parse_time(int(np.ceil(i * segment_seconds)))])
+            start_idx = None
+    if start_idx is not None:
+        result["violence_intervals_frames"].append([start_idx, len(
+            pred_binary) - 1] if len(pred_binary) - 1 != start_idx else [start_idx])
+        result["violence_intervals_seconds"].append([parse_time(
+            int(np.floor((start_idx + 1) * segment_seconds))), parse_time(video_duration)])
+    return result
+
+
+@pytest.mark.parametrize("pred_binary", [
+    [],
+    [0, 0, 0],
+    [1],
+    [1, 1, 1],
+    [0, 1, 0, 1, 1, 0],
+    [1, 0, 0, 1],
+    [0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+])
+def test_extract_intervals(pred_binary):
+    assert extract_intervals(np.array(pred_binary, dtype=np.int64), 0.96) == reference_intervals(pred_binary)
+
+
+@pytest.mark.parametrize("seed, segment_seconds", [(0, 0.96), (1, 0.96), (2, 0.5), (3, 2.0)])
+def test_extract_intervals_random(seed, segment_seconds):
+    rng = np.random.default_rng(seed)
+    # Runs of random length, like real predictions, plus non binary noise
+    pred_binary = np.repeat(rng.integers(0, 2, 2000), rng.integers(1, 40, 2000))
+    pred_binary[rng.integers(0, pred_binary.size, 50)] = 2
+
+    assert extract_intervals(pred_binary, segment_seconds) == reference_intervals(pred_binary, segment_seconds)
+
+
+def test_extract_intervals_memory_mapped(tmp_path):
+    pred_binary = np.array([0, 1, 1, 0, 1], dtype=np.float32)
+    np.save(tmp_path / "results.npy", pred_binary)
+
+    result = extract_intervals(np.load(tmp_path / "results.npy", mmap_mode="r"), 0.96)
+    assert result == reference_intervals(pred_binary)
+
+
+class FakeBackend(ExecutionBackend):
+    """Workflows that end in `phase` as soon as they are watched."""
+
+    def __init__(self, phase):
+        self.phase = phase
+        self.submitted = []
+
+    async def submit(self, run):
+        self.submitted.append(run.name)
+
+    async def subscribe(self, workflow_name):
+        yield WorkflowEvent("workflow", workflow_name, "Running")
+        yield WorkflowEvent("workflow", workflow_name, self.phase)
+
+    async def terminate(self, workflow_name):
+        pass
+
+    async def delete(self, workflow_name):
+        pass
+
+    async def read_logs(self, pod_name, container=None):
+        return ""
+
+
+@pytest.fixture
+def job_session(engine, monkeypatch, tmp_path):
+    TestSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(service, "SessionLocal", TestSessionLocal)
+    monkeypatch.setattr(settings, "TMP_DIR", str(tmp_path))
+    # The result cache is best-effort and there is no Redis to update here
+    monkeypatch.setattr(result_cache, "store_result", lambda workflow_name, result: None)
+    return TestSessionLocal
+
+
+async def create_running_job(TestSessionLocal, tmp_path, workflow_name="workflow-1"):
+    async with TestSessionLocal() as session:
+        session.add(User(id=1, username="testuser", email="test@user.com", password="password"))
+        session.add(InferenceJob(id=1, workflow_name=workflow_name, user_id=1, model="test-model",
+                                 video_filename="video.mp4", video_sha256="0" * 64, status=InferenceJobStatus.RUNNING))
+        await session.commit()
+    (tmp_path / workflow_name).mkdir()
+    np.save(tmp_path / workflow_name / "results.npy", np.array([0, 1, 1, 0, 1]))
+
+
+@pytest.mark.asyncio
+async def test_inference_job_result_is_persisted(job_session, monkeypatch, tmp_path):
+    await create_running_job(job_session, tmp_path)
+    monkeypatch.setattr(service, "execution_backend", FakeBackend("Succeeded"))
+
+    await service.follow_job("workflow-1")
+    # A late reader finalizing again leaves the stored result untouched
+    await service.finalize_job("workflow-1")
+
+    async with job_session() as session:
+        job = await InferenceJob.get(session, id=1)
+    assert job.status == InferenceJobStatus.SUCCEEDED
+    assert job.result == reference_intervals([0, 1, 1, 0, 1])
+    assert job.completed_at is not None
+    assert not (tmp_path / "workflow-1").exists()
+
+    async with job_session() as session:
+        user = await User.get(session, id=1)
+        assert await service.get_workflow_result(session, user, "workflow-1") == job.result
+
+
+@pytest.mark.asyncio
+async def test_result_cache_runs_off_the_event_loop(job_session, monkeypatch, tmp_path):
+    calls = []
+
+    def record(name, value=None):
+        def call(*args):
+            calls.append((name, threading.current_thread() is threading.main_thread()))
+            return value
+        return call
+
+    monkeypatch.setattr(result_cache, "cache_key", record("cache_key", "key"))
+    monkeypatch.setattr(result_cache, "get_result", record("get_result"))
+    monkeypatch.setattr(result_cache, "store_result", record("store_result"))
+    await create_running_job(job_session, tmp_path)
+    async with job_session() as session:
+        session.add(Submission(id=1, title="Test Submission", accessor="test-model", authors="Test Author",
+                               description="", repository_url="test-repo.com", resource_title="Test Resource",
+                               resource_url="test-resource.com", modality="rgb_only", user_id=1,
+                               status=SubmissionStatus.PUBLISHED))
+        await session.commit()
+        assert await service.get_cached_result(session, "0" * 64, "test-model") is None
+
+    await service.finalize_job("workflow-1")
+
+    # Git and Redis calls block, none of them runs on the event loop thread
+    assert calls == [("cache_key", False), ("get_result", False), ("store_result", False)]
+
+
+@pytest.mark.asyncio
+async def test_inference_job_failed(job_session, monkeypatch, tmp_path):
+    await create_running_job(job_session, tmp_path)
+    monkeypatch.setattr(service, "execution_backend", FakeBackend("Failed"))
+
+    await service.follow_job("workflow-1")
+
+    async with job_session() as session:
+        job = await InferenceJob.get(session, id=1)
+    assert job.status == InferenceJobStatus.FAILED
+    assert job.result is None
+    assert not (tmp_path / "workflow-1").exists()
+
+
+@pytest.mark.asyncio
+async def test_queued_inference_job_runs_once_granted(job_session, monkeypatch, tmp_path):
+    await create_running_job(job_session, tmp_path)
+    async with job_session() as session:
+        session.add(InferenceJob(id=2, workflow_name="workflow-2", user_id=1, model="test-model",
+                                 video_filename="video.mp4", video_sha256="0" * 64))
+        await session.commit()
+    backend = FakeBackend("Succeeded")
+    scheduler = WorkflowScheduler(MemorySchedulerStore(), max_in_flight=1, poll_seconds=None)
+    monkeypatch.setattr(service, "execution_backend", backend)
+    monkeypatch.setattr(service, "workflow_scheduler", scheduler)
+
+    # Another workflow holds the only slot
+    await scheduler.enqueue("workflow-1", "user:2", Priority.INTERACTIVE)
+    await scheduler.schedule()
+    await scheduler.enqueue("workflow-2", "user:1", Priority.INTERACTIVE)
+    service.start_job("workflow-2", "rgb_only", "video.mp4", "test-model", plan_segments(None))
+    await scheduler.schedule()
+    await asyncio.sleep(0)
+
+    async with job_session() as session:
+        user = await User.get(session, id=1)
+        job = await service.get_job(session, user, 2)
+        assert (job["status"], job["queue_position"]) == (InferenceJobStatus.QUEUED, 0)
+        with pytest.raises(HTTPException) as exc_info:
+            await service.get_workflow_result(session, user, "workflow-2")
+        assert exc_info.value.status_code == 409
+    assert backend.submitted == []
+
+    (tmp_path / "workflow-2").mkdir()
+    np.save(tmp_path / "workflow-2" / "results.npy", np.array([1, 0]))
+    await scheduler.release("workflow-1")
+    await scheduler.schedule()
+    await service._job_runners["workflow-2"]
+
+    assert backend.submitted == ["workflow-2"]
+    assert await scheduler.statuses() == []
+    async with job_session() as session:
+        job = await InferenceJob.get(session, id=2)
+    assert job.status == InferenceJobStatus.SUCCEEDED
+    assert job.result == reference_intervals([1, 0])
+
+
+@pytest.mark.asyncio
+async def test_terminate_job_requires_owner(job_session, monkeypatch, tmp_path):
+    await create_running_job(job_session, tmp_path)
+    async with job_session() as session:
+        session.add(User(id=2, username="other", email="other@user.com", password="password"))
+        session.add(User(id=3, username="admin", email="admin@user.com", password="password", role=Role.ADMIN))
+        await session.commit()
+    monkeypatch.setattr(service, "execution_backend", FakeBackend("Running"))
+
+    async with job_session() as session:
+        other = await User.get(session, id=2)
+        for workflow_name in ("workflow-1", "missing-workflow"):
+            with pytest.raises(HTTPException) as exc_info:
+                await service.terminate_job(session, other, workflow_name)
+            assert exc_info.value.status_code == 404
+        job = await InferenceJob.get(session, id=1)
+        assert job.status == InferenceJobStatus.RUNNING
+        assert (tmp_path / "workflow-1").exists()
+
+        admin = await User.get(session, id=3)
+        await service.terminate_job(session, admin, "workflow-1")
+
+    async with job_session() as session:
+        job = await InferenceJob.get(session, id=1)
+    assert (job.status, job.status_message) == (InferenceJobStatus.FAILED, "Terminated")
+    assert not (tmp_path / "workflow-1").exists()
+
+
+@pytest.mark.asyncio
+async def test_recover_jobs_of_stopped_processes(job_session, monkeypatch, tmp_path):
+    await create_running_job(job_session, tmp_path)
+    stale = utc_now() - timedelta(seconds=settings.INFERENCE_JOB_LEASE_SECONDS + 1)
+    async with job_session() as session:
+        session.add(InferenceJob(id=2, workflow_name="workflow-2", user_id=1, model="test-model",
+                                 video_filename="video.mp4", video_sha256="0" * 64,
+                                 runner_id="stopped-pod", heartbeat_at=stale))
+        session.add(InferenceJob(id=3, workflow_name="workflow-3", user_id=1, model="test-model",
+                                 video_filename="video.mp4", video_sha256="0" * 64, segments=2,
+                                 status=InferenceJobStatus.RUNNING, runner_id="stopped-pod", heartbeat_at=stale))
+        # Still run by the previous pod of a rolling update
+        session.add(InferenceJob(id=4, workflow_name="workflow-4", user_id=1, model="test-model",
+                                 video_filename="video.mp4", video_sha256="0" * 64,
+                                 runner_id="live-pod", heartbeat_at=utc_now()))
+        await session.commit()
+    for name in ("workflow-2", "workflow-3", "workflow-3-0", "workflow-3-1", "workflow-4"):
+        (tmp_path / name).mkdir()
+    scheduler = WorkflowScheduler(MemorySchedulerStore(), max_in_flight=1, poll_seconds=None)
+    monkeypatch.setattr(service, "execution_backend", FakeBackend("Succeeded"))
+    monkeypatch.setattr(service, "workflow_scheduler", scheduler)
+    for slot_id in ("workflow-1", "workflow-2", "workflow-3-0", "workflow-3-1", "workflow-4"):
+        await scheduler.store.add(SlotRequest(slot_id, "user:1", Priority.INTERACTIVE, 0, 0))
+
+    await service.recover_jobs()
+    await asyncio.gather(*service._job_runners.values())
+    # Claimed by this process, not recovered twice
+    await service.recover_jobs()
+
+    assert [slot.id for slot in await scheduler.statuses()] == ["workflow-4"]
+    assert list(tmp_path.iterdir()) == [tmp_path / "workflow-4"]
+    async with job_session() as session:
+        jobs = {job.id: job for job in await InferenceJob.get_multi(session)}
+    assert jobs[1].status == InferenceJobStatus.SUCCEEDED
+    assert jobs[1].result == reference_intervals([0, 1, 1, 0, 1])
+    assert (jobs[2].status, jobs[3].status) == (InferenceJobStatus.FAILED, InferenceJobStatus.FAILED)
+    assert "stopped" in jobs[2].status_message
+    assert (jobs[4].status, jobs[4].runner_id) == (InferenceJobStatus.QUEUED, "live-pod")
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_jobs(job_session, monkeypatch, tmp_path):
+    await create_running_job(job_session, tmp_path)
+    stale = utc_now() - timedelta(seconds=settings.INFERENCE_JOB_LEASE_SECONDS + 1)
+    async with job_session() as session:
+        job = await InferenceJob.get(session, id=1)
+        await job.update(session, runner_id=service.RUNNER_ID, heartbeat_at=stale)
+    monkeypatch.setitem(service._job_runners, "workflow-1", None)
+
+    await service.heartbeat_jobs()
+    # Even without a local runner, the refreshed job is not stale
+    del service._job_runners["workflow-1"]
+    claimed = []
+
+    async def claim_job(job_id, stale_before):
+        claimed.append(job_id)
+        return False
+    monkeypatch.setattr(service, "_claim_job", claim_job)
+    await service.recover_jobs()
+
+    assert claimed == []
+    async with job_session() as session:
+        job = await InferenceJob.get(session, id=1)
+    assert job.status == InferenceJobStatus.RUNNING
+
+
+@pytest.mark.asyncio
+async def test_get_user_jobs(async_client, authenticated_user, session):
+    user = await User.get(session, username="testuser")
+    session.add(User(id=user.id + 1, username="other", email="other@user.com", password="password"))
+    for job_id in range(1, 6):
+        session.add(InferenceJob(id=job_id, workflow_name=f"workflow-{job_id}", user_id=user.id if job_id != 5 else user.id + 1,
+                                 model="test-model", video_filename="video.mp4", video_sha256="0" * 64,
+                                 status=InferenceJobStatus.SUCCEEDED if job_id % 2 else InferenceJobStatus.RUNNING))
+    await session.commit()
+    headers = {"Authorization": f"Bearer {authenticated_user}"}
+
+    response = await async_client.get("/api/inference/jobs", headers=headers, params={"limit": 2})
+    assert response.status_code == 200
+    assert [job["id"] for job in response.json()] == [1, 2]
+    assert "rel=\"next\"" in response.headers["Link"]
+
+    response = await async_client.get("/api/inference/jobs", headers=headers, params={"job_status": "succeeded"})
+    assert [job["id"] for job in response.json()] == [1, 3]
+
+    response = await async_client.get("/api/inference/jobs/3", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "succeeded"
+
+    response = await async_client.get("/api/inference/jobs/5", headers=headers)
+    assert response.status_code == 404
+
+    response = await async_client.get("/api/inference/result/workflow-2", headers=headers)
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize("duration_seconds, lengths", [
+    (None, [0]),
+    (30, [32]),
+    (60 * 10, [625]),
+    (60 * 25, [625, 625, 313]),
+])
+def test_plan_segments(monkeypatch, duration_seconds, lengths):
+    monkeypatch.setattr(settings, "INFERENCE_MAX_SEGMENT_SECONDS", 60 * 10)
+
+    segments = plan_segments(duration_seconds)
+
+    assert [segment.length for segment in segments] == lengths
+    assert [segment.start for segment in segments] == [sum(lengths[:index]) for index in range(len(lengths))]
+    assert segments[-1].start_seconds == round(segments[-1].start * 0.96, 6)
+
+
+def test_plan_segments_disabled_by_default():
+    assert plan_segments(60 * 25) == [VideoSegment(0, 0, 0)]
+
+
+@pytest.mark.parametrize("lengths, error", [
+    ([10, 11], None),
+    ([9, 10], None),
+    # The workflow ignored its part of the video
+    ([25, 10], "Segment 0 has 25 predictions, 10 were planned"),
+    ([10, 3], "Segment 1 has 3 predictions, 10 were planned"),
+])
+def test_merge_results(tmp_path, lengths, error):
+    segments = [VideoSegment(0, 0, 10), VideoSegment(1, 10, 10)]
+    paths = [tmp_path / f"segment-{index}.npy" for index in range(2)]
+    for index, (path, length) in enumerate(zip(paths, lengths)):
+        np.save(path, np.full(length, index))
+
+    if error is not None:
+        with pytest.raises(ValueError, match=error):
+            merge_results(segments, paths, tmp_path / "results.npy")
+        assert not (tmp_path / "results.npy").exists()
+        return
+    merge_results(segments, paths, tmp_path / "results.npy")
+    assert np.load(tmp_path / "results.npy").tolist() == [0] * 10 + [1] * lengths[1]
+
+
+@pytest.mark.asyncio
+async def test_probe_duration_without_ffprobe(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "FFPROBE_PATH", str(tmp_path / "missing-ffprobe"))
+
+    assert await probe_duration(tmp_path / "video.mp4") is None
+
+
+class SegmentBackend(ExecutionBackend):
+    """Segment workflows that only finish once all of them run at the same
+    time, each predicting its segment index, or failing for `failing`."""
+
+    def __init__(self, segments, failing=None):
+        self.segments = segments
+        self.failing = failing
+        self.parameters = {}
+        self.running = 0
+        self.all_running = asyncio.Event()
+
+    async def submit(self, run):
+        self.parameters[run.name] = run.parameters
+
+    async def subscribe(self, workflow_name):
+        self.running += 1
+        if self.running == self.segments:
+            self.all_running.set()
+        await self.all_running.wait()
+        index = int(workflow_name.rsplit("-", 1)[1])
+        if index == self.failing:
+            yield WorkflowEvent("workflow", workflow_name, "Failed")
+            return
+        length = int(float(self.parameters[workflow_name]["durationSeconds"]) / 0.96 + 0.5)
+        # One prediction too many, as models padding the last frame do
+        np.save(self.result_path(workflow_name), np.full(length + 1, index % 2))
+        yield WorkflowEvent("workflow", workflow_name, "Succeeded")
+
+    async def terminate(self, workflow_name):
+        pass
+
+    async def delete(self, workflow_name):
+        pass
+
+    async def read_logs(self, pod_name, container=None):
+        return ""
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failing", [None, 1])
+async def test_segmented_inference_job(job_session, monkeypatch, tmp_path, failing):
+    monkeypatch.setattr(settings, "INFERENCE_MAX_SEGMENT_SECONDS", 9.6)
+    segments = plan_segments(30)
+    backend = SegmentBackend(len(segments), failing)
+    scheduler = WorkflowScheduler(MemorySchedulerStore(), max_in_flight=len(segments), poll_seconds=None)
+    monkeypatch.setattr(service, "execution_backend", backend)
+    monkeypatch.setattr(service, "workflow_scheduler", scheduler)
+    async with job_session() as session:
+        session.add(User(id=1, username="testuser", email="test@user.com", password="password"))
+        session.add(InferenceJob(id=1, workflow_name="workflow-1", user_id=1, model="test-model", video_filename="video.mp4",
+                                 video_sha256="0" * 64, segments=len(segments)))
+        await session.commit()
+    (tmp_path / "workflow-1").mkdir()
+    (tmp_path / "workflow-1" / "rgb.list").touch()
+
+    for slot_id in service.slot_ids("workflow-1", len(segments)):
+        await scheduler.enqueue(slot_id, "user:1", Priority.INTERACTIVE)
+    service.start_job("workflow-1", "rgb_only", "video.mp4", "test-model", segments)
+    await scheduler.schedule()
+    await service._job_runners["workflow-1"]
+
+    assert [(backend.parameters[f"workflow-1-{segment.index}"]["startSeconds"],
+             backend.parameters[f"workflow-1-{segment.index}"]["videoPath"]) for segment in segments] == [
+        (str(segment.start_seconds), str(tmp_path / "workflow-1" / "video.mp4")) for segment in segments]
+    assert await scheduler.statuses() == []
+    # Segment data is removed along with the data of the job
+    assert list(tmp_path.iterdir()) == []
+    async with job_session() as session:
+        job = await InferenceJob.get(session, id=1)
+    if failing is not None:
+        assert job.status == InferenceJobStatus.FAILED
+        assert "Segment 1 workflow failed" in job.status_message
+        return
+    expected = np.concatenate([np.full(segment.length, segment.index % 2) for segment in segments[:-1]]
+                              + [np.full(segments[-1].length + 1, segments[-1].index % 2)])
+    assert job.status == InferenceJobStatus.SUCCEEDED
+    assert job.result == reference_intervals(expected)
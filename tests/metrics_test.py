@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (accuracy_score, average_precision_score, f1_score,
+                             precision_score, recall_score, roc_auc_score)
+
+from src.modules.evaluation.metrics import align_predictions, binary_metrics
+
+
+def sklearn_metrics(gt, pred):
+    return {
+        "precision": precision_score(gt, pred, zero_division=0),
+        "accuracy": accuracy_score(gt, pred),
+        "f1": f1_score(gt, pred, zero_division=0),
+        "recall": recall_score(gt, pred, zero_division=0),
+        "aoc_roc": roc_auc_score(gt, pred),
+        "aoc_pr": average_precision_score(gt, pred),
+    }
+
+
+@pytest.mark.parametrize("gt, pred", [
+    ([0, 1, 1, 0, 1], [0, 1, 0, 0, 1]),
+    ([0, 1, 1, 0, 1], [0, 0, 0, 0, 0]),
+    ([0, 1, 1, 0, 1], [1, 1, 1, 1, 1]),
+    ([0, 1, 1, 0, 1], [1, 0, 0, 1, 0]),
+    ([1, 0, 0, 0, 0, 0, 0], [1, 0, 0, 0, 0, 0, 0]),
+])
+def test_binary_metrics(gt, pred):
+    assert binary_metrics(np.array(gt), np.array(pred)) == sklearn_metrics(gt, pred)
+
+
+@pytest.mark.parametrize("seed, size, dtype", [(0, 10, np.int64), (1, 1000, np.int64), (2, 100_003, np.float32), (3, 7, bool)])
+def test_binary_metrics_random(seed, size, dtype):
+    rng = np.random.default_rng(seed)
+    gt = rng.integers(0, 2, size)
+    gt[:2] = [0, 1]
+    pred = rng.integers(0, 2, size).astype(dtype)
+
+    assert binary_metrics(gt, pred) == sklearn_metrics(gt, pred)
+
+
+@pytest.mark.parametrize("pred_size", [3, 5, 8])
+def test_binary_metrics_aligns_predictions(tmp_path, pred_size):
+    gt = np.array([0, 1, 1, 0, 1])
+    pred = np.resize([1, 1, 0], pred_size)
+    np.save(tmp_path / "gt.npy", gt)
+    np.save(tmp_path / "results.npy", pred)
+
+    metrics = binary_metrics(np.load(tmp_path / "gt.npy", mmap_mode="r"),
+                             np.load(tmp_path / "results.npy", mmap_mode="r"))
+    assert metrics == sklearn_metrics(gt, align_predictions(pred, gt))
+
+
+@pytest.mark.parametrize("gt, pred", [
+    ([1, 1, 1], [0, 1, 1]),
+    ([0, 1, 2], [0, 1, 1]),
+    ([0, 1, 1], [0, 0.5, 1]),
+    ([], []),
+])
+def test_binary_metrics_invalid(gt, pred):
+    with pytest.raises(ValueError):
+        binary_metrics(np.array(gt), np.array(pred))
@@ -0,0 +1,85 @@
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import status
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.core.database.query_stats import track_queries
+
+from src.modules.dataset.model import Dataset
+from src.modules.scores.model import Score, ScoreStatus
+from src.modules.submission.model import Submission, SubmissionStatus
+
+NUMBER_OF_DATASETS = 3
+
+
+@pytest_asyncio.fixture(scope="function", params=[2, 8])
+async def seeded_scores(request, session, admin_user):
+    for dataset_id in range(1, NUMBER_OF_DATASETS + 1):
+        session.add(Dataset(id=dataset_id, title=f"Dataset {dataset_id}",
+                    accessor=f"dataset-{dataset_id}", description=""))
+    for submission_id in range(1, request.param + 1):
+        session.add(Submission(id=submission_id, title=f"Submission {submission_id}", accessor=f"submission-{submission_id}",
+                               authors="Test Author", description="", repository_url="test-repo.com", resource_title="Test Resource",
+                               resource_url="test-resource.com", modality="rgb_only", status=SubmissionStatus.PUBLISHED, user_id=1))
+    await session.commit()
+    for submission_id in range(1, request.param + 1):
+        for dataset_id in range(1, NUMBER_OF_DATASETS + 1):
+            session.add(Score(dataset_id=dataset_id, submission_id=submission_id, status=ScoreStatus.SUCCESS,
+                              precision=0.5, accuracy=0.5, recall=0.5, f1=0.5, aoc_roc=0.5, aoc_pr=0.5))
+    await session.commit()
+    return admin_user
+
+
+# -- GET TESTS -- #
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url, max_queries", [
+    ("/api/dataset", 1),
+    ("/api/dataset/number-of-submissions", 1),
+    ("/api/dataset/1/submissions-metrics", 2),
+    ("/api/dataset/1/submissions-leaderboard", 1),
+    ("/api/scores/best-submissions", 1),
+    ("/api/submission/published", 4),
+    ("/api/submission/1/results", 5),
+    ("/api/submission/1/test-records", 4),
+])
+async def test_query_budget(async_client: httpx.AsyncClient, seeded_scores: str, assert_query_budget, url: str, max_queries: int):
+    headers = {"Authorization": f"Bearer {seeded_scores}"}
+
+    response = await async_client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert_query_budget(response, max_queries)
+
+
+@pytest.mark.asyncio
+async def test_get_query_stats(async_client: httpx.AsyncClient, admin_user: str):
+    headers = {"Authorization": f"Bearer {admin_user}"}
+
+    await async_client.get("/api/dataset", headers=headers)
+    response = await async_client.get("/api/debug/queries", params={"limit": 1}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["label"] == "GET /api/dataset"
+
+
+@pytest.mark.asyncio
+async def test_get_query_stats_forbidden(async_client: httpx.AsyncClient, authenticated_user: str):
+    headers = {"Authorization": f"Bearer {authenticated_user}"}
+
+    response = await async_client.get("/api/debug/queries", headers=headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_query_stats_survive_failing_statements(engine):
+    async with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            await conn.execute(text("SELECT * FROM missing_table"))
+        with track_queries() as stats:
+            await conn.execute(text("SELECT 1"))
+        info = (await conn.get_raw_connection()).info
+
+    assert stats.count == 1
+    assert "query_start" not in info
@@ -0,0 +1,173 @@
+import asyncio
+import random
+from typing import NamedTuple
+
+import pytest
+
+from src.core.workflow_scheduler import (MemorySchedulerStore, Priority,
+                                         SchedulerState, SlotRequest,
+                                         WorkflowScheduler)
+
+
+class Arrival(NamedTuple):
+    time: float
+    id: str
+    owner: str
+    priority: Priority
+    duration: float
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeArgo:
+    """Workflows that complete after their duration of virtual time, and
+    the most that were ever in flight at once."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.started = []
+        self.completions = {}
+        self.max_in_flight = 0
+
+    def create_workflow(self, workflow_name, duration):
+        self.started.append(workflow_name)
+        self.completions[workflow_name] = self.clock.now + duration
+        self.max_in_flight = max(self.max_in_flight, len(self.completions))
+
+    def next_completion(self):
+        return min(self.completions.values(), default=float("inf"))
+
+    def complete(self):
+        done = [name for name, time in self.completions.items() if time <= self.clock.now]
+        for name in done:
+            del self.completions[name]
+        return done
+
+
+async def simulate(arrivals, max_in_flight):
+    """Runs the arrivals through a scheduler, as a discrete event simulation,
+    and returns the fake Argo the workflows were submitted to."""
+    clock = VirtualClock()
+    scheduler = WorkflowScheduler(MemorySchedulerStore(), max_in_flight=max_in_flight, poll_seconds=None, clock=clock)
+    argo = FakeArgo(clock)
+    durations = {arrival.id: arrival.duration for arrival in arrivals}
+    pending = sorted(arrivals)
+
+    while pending or argo.completions:
+        clock.now = min(pending[0].time if pending else float("inf"), argo.next_completion())
+        for workflow_name in argo.complete():
+            await scheduler.release(workflow_name)
+        while pending and pending[0].time <= clock.now:
+            arrival = pending.pop(0)
+            await scheduler.enqueue(arrival.id, arrival.owner, arrival.priority)
+        await scheduler.schedule()
+        for status in await scheduler.statuses():
+            if status.running and status.id not in argo.started:
+                argo.create_workflow(status.id, durations[status.id])
+    return argo
+
+
+def request(request_id, owner, priority=Priority.EVALUATION, enqueued_at=0.0, granted_at=None):
+    return SlotRequest(request_id, owner, priority, enqueued_at, enqueued_at, granted_at)
+
+
+def test_order_by_priority_then_fair_share():
+    state = SchedulerState([
+        request("a-1", "a", enqueued_at=1),
+        request("a-2", "a", enqueued_at=2),
+        request("a-3", "a", enqueued_at=3),
+        request("b-1", "b", enqueued_at=4),
+        request("backfill", "c", Priority.BACKFILL, enqueued_at=0),
+        request("interactive", "c", Priority.INTERACTIVE, enqueued_at=5),
+    ], max_in_flight=2)
+
+    assert [slot.id for slot in state.order()] == ["interactive", "a-1", "b-1", "a-2", "a-3", "backfill"]
+
+    admitted = state.admit(now=6)
+    assert [slot.id for slot in admitted] == ["interactive", "a-1"]
+    assert state.free_slots == 0
+    assert state.admit(now=7) == []
+
+
+def test_owner_with_running_requests_goes_last():
+    state = SchedulerState([
+        request("a-1", "a", enqueued_at=1, granted_at=1),
+        request("a-2", "a", enqueued_at=2),
+        request("b-1", "b", enqueued_at=3),
+    ], max_in_flight=3)
+
+    assert [slot.id for slot in state.order()] == ["b-1", "a-2"]
+
+
+def test_statuses_estimate_wait():
+    state = SchedulerState([
+        request("running", "a", enqueued_at=0, granted_at=0),
+        *(request(f"waiting-{index}", f"owner-{index}", enqueued_at=index + 1) for index in range(4)),
+    ], max_in_flight=2)
+
+    statuses = state.statuses(average_duration=100)
+
+    assert [(slot.id, slot.running, slot.position, slot.estimated_wait_seconds) for slot in statuses] == [
+        ("running", True, None, None),
+        ("waiting-0", False, 0, 0),
+        ("waiting-1", False, 1, 100),
+        ("waiting-2", False, 2, 100),
+        ("waiting-3", False, 3, 200),
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("seed", range(5))
+async def test_simulation_never_exceeds_cap(seed):
+    rng = random.Random(seed)
+    arrivals = [Arrival(rng.uniform(0, 100), f"workflow-{index}", f"user:{rng.randrange(4)}",
+                        rng.choice(list(Priority)), rng.uniform(1, 50)) for index in range(60)]
+
+    argo = await simulate(arrivals, max_in_flight=4)
+
+    assert argo.max_in_flight == 4
+    assert sorted(argo.started) == sorted(arrival.id for arrival in arrivals)
+
+
+@pytest.mark.asyncio
+async def test_simulation_interactive_goes_first():
+    arrivals = [Arrival(0, f"backfill-{index}", "user:1", Priority.BACKFILL, duration)
+                for index, duration in enumerate([10, 25, 10])]
+    arrivals += [Arrival(1, "evaluation", "user:1", Priority.EVALUATION, 10),
+                 Arrival(2, "interactive", "user:2", Priority.INTERACTIVE, 10)]
+
+    argo = await simulate(arrivals, max_in_flight=2)
+
+    assert argo.started == ["backfill-0", "backfill-1", "interactive", "evaluation", "backfill-2"]
+
+
+@pytest.mark.asyncio
+async def test_simulation_owners_take_turns():
+    arrivals = [Arrival(0, f"a-{index}", "user:a", Priority.EVALUATION, 10) for index in range(4)]
+    arrivals += [Arrival(0.5, f"b-{index}", "user:b", Priority.EVALUATION, 10) for index in range(2)]
+
+    argo = await simulate(arrivals, max_in_flight=1)
+
+    assert argo.started == ["a-0", "b-0", "a-1", "b-1", "a-2", "a-3"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_wait_withdraws_request():
+    scheduler = WorkflowScheduler(MemorySchedulerStore(), max_in_flight=1, poll_seconds=None)
+    await scheduler.enqueue("running", "user:1", Priority.EVALUATION)
+    await scheduler.schedule()
+    await scheduler.enqueue("waiting", "user:2", Priority.EVALUATION)
+
+    waiter = asyncio.create_task(scheduler.wait("waiting"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert [slot.id for slot in await scheduler.statuses()] == ["running"]
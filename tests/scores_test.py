@@ -0,0 +1,112 @@
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.modules.scores import controller, rank_index
+from src.modules.scores.model import Score, weights
+
+
+class FakeRedis:
+    """The commands of the rank index on dicts, failing them all while
+    `down`, or only the pipelined writes with `failing_writes`."""
+
+    def __init__(self):
+        self.down = False
+        self.failing_writes = False
+        self.values = {}
+        self.hashes = {}
+        self.zsets = {}
+
+    def _check(self):
+        if self.down:
+            raise RedisConnectionError("Connection refused")
+
+    def set(self, key, value):
+        self._check()
+        self.values[key] = value
+
+    def exists(self, key):
+        self._check()
+        return int(key in self.values)
+
+    def hset(self, key, field, value):
+        self._check()
+        self.hashes.setdefault(key, {})[str(field)] = value
+
+    def hvals(self, key):
+        self._check()
+        return list(self.hashes.get(key, {}).values())
+
+    def zadd(self, key, mapping):
+        self._check()
+        self.zsets.setdefault(key, {}).update({str(member): score for member, score in mapping.items()})
+
+    def zrem(self, key, member):
+        self._check()
+        self.zsets.get(key, {}).pop(str(member), None)
+
+    def zscore(self, key, member):
+        self._check()
+        return self.zsets.get(key, {}).get(str(member))
+
+    def zcount(self, key, minimum, maximum):
+        self._check()
+        return sum(score > float(minimum.lstrip("(")) for score in self.zsets.get(key, {}).values())
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        self.client._check()
+        if self.client.failing_writes and any(name in ("hset", "zadd") for name, _ in self.commands):
+            raise RedisConnectionError("Connection reset")
+        return [getattr(self.client, name)(*args) for name, args in self.commands]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(rank_index, "redis_client", client)
+    monkeypatch.setattr(rank_index, "_dirty_unflagged", False)
+    return client
+
+
+def score(submission_id, dataset_id=1):
+    return Score(submission_id=submission_id, dataset_id=dataset_id,
+                 **{field: 0.5 for field in weights})
+
+
+def test_failed_index_write_marks_index_dirty(fake_redis):
+    rank_index.index_score(score(1))
+    assert rank_index.get_rank(1) == 1
+
+    fake_redis.failing_writes = True
+    rank_index.index_score(score(2))
+
+    assert fake_redis.exists(rank_index.DIRTY_KEY)
+    # Ranks are left to SQL, the index misses submission 2
+    assert rank_index.get_rank(1) is None
+    with pytest.raises(HTTPException) as exc_info:
+        controller.get_submissions_around(1, None, radius=1)
+    assert exc_info.value.status_code == 503
+
+
+def test_index_write_while_redis_is_down_marks_index_dirty_later(fake_redis):
+    fake_redis.down = True
+    rank_index.index_score(score(1))
+    fake_redis.down = False
+
+    assert rank_index.is_dirty()
+    assert rank_index.get_rank(1) is None
+    # The next write sets the flag for the other processes
+    rank_index.index_score(score(2))
+    assert fake_redis.exists(rank_index.DIRTY_KEY)
@@ -0,0 +1,164 @@
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from src.core.config import settings
+from src.core.utils import uploads
+from src.core.utils.staging import stage_tree
+from src.core.utils.uploads import stream_upload
+
+BOUNDARY = "test-boundary"
+
+
+def multipart_body(video=b"video-bytes", fields=None, file_field="file", filename="video.mp4"):
+    parts = []
+    for name, value in (fields or {"model": "test-model"}).items():
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    if video is not None:
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+                     'Content-Type: video/mp4\r\n\r\n'.encode() + video + b"\r\n")
+    parts.append(f"--{BOUNDARY}--\r\n".encode())
+    return b"".join(parts)
+
+
+def multipart_request(body, content_length=True, chunk_bytes=1024):
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    chunks = [body[start:start + chunk_bytes] for start in range(0, len(body), chunk_bytes)]
+
+    async def receive():
+        chunk = chunks.pop(0) if chunks else b""
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers}, receive)
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TMP_DIR", str(tmp_path / "tmp"))
+    directory = tmp_path / "tmp" / "workflow-1"
+    directory.mkdir(parents=True)
+    return directory
+
+
+@pytest.mark.asyncio
+async def test_staged_datasets_do_not_count_against_quota(upload_dir, tmp_path, monkeypatch):
+    dataset_path = tmp_path / "datasets" / "dataset-1"
+    dataset_path.mkdir(parents=True)
+    (dataset_path / "features.bin").write_bytes(b"0" * 64 * 1024)
+    stage_tree(dataset_path, tmp_path / "tmp" / "evaluation-1", mode="hardlink")
+    stage_tree(dataset_path, tmp_path / "tmp" / "evaluation-2", mode="symlink")
+    monkeypatch.setattr(settings, "UPLOAD_QUOTA_BYTES", 32 * 1024)
+
+    upload = await stream_upload(multipart_request(multipart_body()), upload_dir)
+
+    assert upload.size == len(b"video-bytes")
+    assert uploads.directory_size(settings.TMP_DIR) == len(b"video-bytes")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_bytes", [7, 1024 * 1024])
+async def test_stream_upload_hashes_file(upload_dir, chunk_bytes):
+    video = bytes(range(256)) * 64
+    request = multipart_request(multipart_body(video, {"model": "test-model", "note": "x"}), chunk_bytes=chunk_bytes)
+
+    upload = await stream_upload(request, upload_dir)
+
+    assert (upload.filename, upload.size, upload.fields) == ("video.mp4", len(video), {"model": "test-model", "note": "x"})
+    assert upload.sha256 == hashlib.sha256(video).hexdigest()
+    assert upload.path == upload_dir / "upload.mp4"
+    assert upload.path.read_bytes() == video
+    assert uploads._in_flight == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("filename, stored_name", [
+    ("..", "upload"),
+    (".", "upload"),
+    ("  ", "upload"),
+    ("", "upload"),
+    ("../../x.mp4", "upload.mp4"),
+    ("clip.mp4/..", "upload"),
+    (".mp4", "upload"),
+    ("clip.m p4", "upload"),
+])
+async def test_stream_upload_picks_stored_name(upload_dir, filename, stored_name):
+    request = multipart_request(multipart_body(filename=filename))
+
+    upload = await stream_upload(request, upload_dir)
+
+    assert upload.path == upload_dir / stored_name
+    assert upload.path.read_bytes() == b"video-bytes"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_length", [True, False])
+async def test_stream_upload_too_large(upload_dir, monkeypatch, content_length):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 4096)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_BYTES", 1024)
+    request = multipart_request(multipart_body(b"0" * 8192), content_length=content_length)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await stream_upload(request, upload_dir)
+
+    assert exc_info.value.status_code == 413
+    # Nothing is left behind, also when rejected while streaming
+    assert list(upload_dir.iterdir()) == []
+    assert uploads._in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_quota_exceeded(upload_dir, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_QUOTA_BYTES", 4096)
+    (upload_dir.parent / "workflow-0").mkdir()
+    (upload_dir.parent / "workflow-0" / "video.mp4").write_bytes(b"0" * 4000)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await stream_upload(multipart_request(multipart_body(b"0" * 200), content_length=False), upload_dir)
+
+    assert exc_info.value.status_code == 413
+    assert list(upload_dir.iterdir()) == []
+    assert uploads._in_flight == 0
+
+    # The space is available again once the other upload is gone
+    (upload_dir.parent / "workflow-0" / "video.mp4").unlink()
+    upload = await stream_upload(multipart_request(multipart_body(b"0" * 200)), upload_dir)
+    assert upload.size == 200
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_missing_file(upload_dir):
+    with pytest.raises(HTTPException) as exc_info:
+        await stream_upload(multipart_request(multipart_body(video=None)), upload_dir)
+
+    assert exc_info.value.status_code == 422
+    assert uploads._in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_requires_multipart(upload_dir):
+    request = Request({"type": "http", "method": "POST", "path": "/",
+                       "headers": [(b"content-type", b"application/json")]})
+
+    with pytest.raises(HTTPException) as exc_info:
+        await stream_upload(request, upload_dir)
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_submit_inference_rejects_too_large(async_client, authenticated_user, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "TMP_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1024)
+    body = multipart_body(b"0" * 4096)
+
+    response = await async_client.post("/api/inference", content=body, headers={
+        "Authorization": f"Bearer {authenticated_user}",
+        "Content-Type": f"multipart/form-data; boundary={BOUNDARY}",
+    })
+
+    assert response.status_code == 413
+    assert list(tmp_path.iterdir()) == []
@@ -2,6 +2,9 @@ import httpx
 import pytest
 from fastapi import status
 
+from src.core.database.base_crud import encode_cursor
+from src.modules.user.model import Role, User
+
 # -- CREATE TEST -- #
 
 @pytest.mark.asyncio
@@ -279,3 +282,60 @@ async def test_get_user_details_not_found(async_client: httpx.AsyncClient, admin
 
     response = await async_client.get(url, headers=headers)
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_get_users_paginated(async_client: httpx.AsyncClient, admin_user: str):
+    for index in range(2):
+        user_data = {
+            "username": f"testuser{index}",
+            "email": f"test{index}@user.com",
+            "password": "password"
+        }
+        response = await async_client.post("/api/user", json=user_data)
+        assert response.status_code == status.HTTP_201_CREATED
+
+    url = "/api/user?limit=2"
+    headers = {"Authorization": f"Bearer {admin_user}"}
+
+    response = await async_client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+    assert 'next' in response.links
+
+    next_response = await async_client.get(response.links['next']['url'], headers=headers)
+    assert next_response.status_code == status.HTTP_200_OK
+    assert len(next_response.json()) == 1
+    assert 'next' not in next_response.links
+    usernames = [user['username'] for user in response.json() + next_response.json()]
+    assert len(set(usernames)) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_users_invalid_cursor(async_client: httpx.AsyncClient, admin_user: str):
+    url = "/api/user?cursor=invalid"
+    headers = {"Authorization": f"Bearer {admin_user}"}
+
+    response = await async_client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("values", [{"id": "1"}, {"id": 1.5}, {"id": True}, {"id": None}, {"id": [1]}, {"name": 1}])
+async def test_get_users_cursor_of_wrong_type(async_client: httpx.AsyncClient, admin_user: str, values):
+    url = f"/api/user?cursor={encode_cursor(values)}"
+    headers = {"Authorization": f"Bearer {admin_user}"}
+
+    response = await async_client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_load_after_update(session):
+    user = await User.create(session, username="loaded", email="loaded@user.com", password="password")
+    assert await User.load(session, "loaded", key="username", role=Role.ADMIN) is None
+
+    await user.update(session, role=Role.ADMIN)
+
+    loaded = await User.load(session, "loaded", key="username", role=Role.ADMIN)
+    assert loaded is not None and loaded.id == user.id
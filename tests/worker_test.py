@@ -0,0 +1,213 @@
+import asyncio
+import time
+from collections import deque
+
+import pytest
+
+from src.core.job_queue import Job, function_path
+from src.core.worker import PermanentJobError, Worker, deferred_timeout, start_timeout
+
+running = 0
+max_running = 0
+calls = []
+
+
+class MemoryQueue:
+    """In-process stand-in for the Redis job queue."""
+
+    def __init__(self):
+        self.pending = deque()
+        self.scheduled = []
+        self.completed = []
+        self.failed = []
+        self.requeued = []
+
+    def enqueue(self, function, *args, on_failure=None):
+        job = Job(function=function_path(function), args=list(args),
+                  on_failure=function_path(on_failure) if on_failure else None)
+        self.pending.append(job.dumps().encode())
+        return job
+
+    async def dequeue(self, worker_id, timeout):
+        now = time.monotonic()
+        for due, raw in [entry for entry in self.scheduled if entry[0] <= now]:
+            self.scheduled.remove((due, raw))
+            self.pending.append(raw)
+        if not self.pending:
+            await asyncio.sleep(0.01)
+            return None
+        raw = self.pending.popleft()
+        return Job.loads(raw), raw
+
+    async def complete(self, worker_id, raw):
+        self.completed.append(Job.loads(raw))
+
+    async def retry(self, worker_id, raw, job, delay):
+        self.scheduled.append((time.monotonic() + delay, job.dumps().encode()))
+
+    async def requeue(self, worker_id, raw):
+        self.requeued.append(Job.loads(raw))
+        self.pending.appendleft(raw)
+
+    async def fail(self, worker_id, raw, job):
+        self.failed.append(job)
+
+    async def recover_orphans(self):
+        return 0
+
+    async def heartbeat(self, worker_id, ttl):
+        pass
+
+    async def stop_heartbeat(self, worker_id):
+        pass
+
+
+async def evaluation_job(duration):
+    global running, max_running  # pylint: disable=global-statement
+    running += 1
+    max_running = max(max_running, running)
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        running -= 1
+
+
+async def failing_job(name):
+    calls.append(name)
+    raise RuntimeError("Workflow submission failed")
+
+
+async def missing_dataset_job(name):
+    calls.append(name)
+    raise PermanentJobError("Dataset dataset-1 not found")
+
+
+async def slow_request_job(name):
+    calls.append(name)
+    # Raised by the job, not by the worker timeout
+    raise TimeoutError("Request timed out")
+
+
+@deferred_timeout
+async def queued_job(wait, duration):
+    # Waits for its turn, then runs
+    await asyncio.sleep(wait)
+    start_timeout()
+    await evaluation_job(duration)
+
+
+async def on_failure(name):
+    calls.append(f"{name} discarded")
+
+
+async def run_until(worker, condition, timeout=5):
+    task = asyncio.create_task(worker.run())
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    worker.stop()
+    await task
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    global running, max_running  # pylint: disable=global-statement
+    running, max_running = 0, 0
+    calls.clear()
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_jobs_concurrently():
+    queue = MemoryQueue()
+    for _ in range(40):
+        queue.enqueue(evaluation_job, 0.2)
+    worker = Worker(queue, concurrency=16, job_timeout=5, max_retries=0, retry_backoff=0, drain_timeout=5)
+
+    started = time.monotonic()
+    await run_until(worker, lambda: len(queue.completed) == 40)
+
+    assert len(queue.completed) == 40
+    assert max_running == 16
+    # Three rounds of 0.2s, not forty
+    assert time.monotonic() - started < 2
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_with_backoff():
+    queue = MemoryQueue()
+    queue.enqueue(failing_job, "evaluation", on_failure=on_failure)
+    worker = Worker(queue, concurrency=4, job_timeout=5, max_retries=2, retry_backoff=0.05, drain_timeout=5)
+
+    await run_until(worker, lambda: queue.failed)
+
+    assert calls == ["evaluation"] * 3 + ["evaluation discarded"]
+    assert queue.failed[0].attempt == 2
+    assert "Workflow submission failed" in queue.failed[0].error
+    assert not queue.completed
+
+
+@pytest.mark.asyncio
+async def test_worker_does_not_retry_permanent_errors():
+    queue = MemoryQueue()
+    queue.enqueue(missing_dataset_job, "evaluation", on_failure=on_failure)
+    worker = Worker(queue, concurrency=4, job_timeout=5, max_retries=2, retry_backoff=0.05, drain_timeout=5)
+
+    await run_until(worker, lambda: queue.failed)
+
+    assert calls == ["evaluation", "evaluation discarded"]
+    assert queue.failed[0].attempt == 0
+    assert "Dataset dataset-1 not found" in queue.failed[0].error
+
+
+@pytest.mark.asyncio
+async def test_worker_reports_timeouts_of_the_job_as_errors():
+    queue = MemoryQueue()
+    queue.enqueue(slow_request_job, "evaluation", on_failure=on_failure)
+    worker = Worker(queue, concurrency=4, job_timeout=5, max_retries=1, retry_backoff=0, drain_timeout=5)
+
+    await run_until(worker, lambda: queue.failed)
+
+    assert calls == ["evaluation"] * 2 + ["evaluation discarded"]
+    assert queue.failed[0].error == "TimeoutError('Request timed out')"
+
+
+@pytest.mark.asyncio
+async def test_worker_times_out_jobs():
+    queue = MemoryQueue()
+    queue.enqueue(evaluation_job, 10)
+    worker = Worker(queue, concurrency=4, job_timeout=0.05, max_retries=0, retry_backoff=0, drain_timeout=5)
+
+    await run_until(worker, lambda: queue.failed)
+
+    assert queue.failed[0].error == "Timed out after 0.05s"
+    assert running == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_times_out_deferred_jobs_from_their_start():
+    queue = MemoryQueue()
+    queue.enqueue(queued_job, 0.2, 0.05)
+    queue.enqueue(queued_job, 0, 10)
+    worker = Worker(queue, concurrency=4, job_timeout=0.1, max_retries=0, retry_backoff=0, drain_timeout=5)
+
+    await run_until(worker, lambda: queue.completed and queue.failed)
+
+    # Waiting longer than the timeout is fine, running longer is not
+    assert [job.args for job in queue.completed] == [[0.2, 0.05]]
+    assert [(job.args, job.error) for job in queue.failed] == [([0, 10], "Timed out after 0.1s")]
+    assert running == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_drains_on_stop():
+    queue = MemoryQueue()
+    queue.enqueue(evaluation_job, 0.05)
+    queue.enqueue(evaluation_job, 10)
+    worker = Worker(queue, concurrency=4, job_timeout=60, max_retries=0, retry_backoff=0, drain_timeout=0.2)
+
+    await run_until(worker, lambda: max_running == 2)
+
+    # The short job finished during the drain, the long one was put back
+    assert len(queue.completed) == 1
+    assert [job.args for job in queue.requeued] == [[10]]
+    assert running == 0